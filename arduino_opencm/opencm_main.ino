@@ -20,7 +20,19 @@ const float DXL_PROTOCOL_VERSION = 2.0;
 Dynamixel2Arduino dxl(DXL_SERIAL, DXL_DIR_PIN);
 
 char command_buffer[50];
-bool command_received = false;
+
+// 바이너리 sync 프레임: AA 55 | N | N × (ID u8, 위치 u16 LE, 속도 u16 LE) | 체크섬
+// 체크섬은 N부터 마지막 항목까지 바이트 합의 2의 보수입니다. 텍스트 명령에는
+// 0xAA가 나오지 않으므로 같은 시리얼 스트림에서 구분할 수 있습니다.
+const uint8_t SYNC_HEADER_1 = 0xAA;
+const uint8_t SYNC_HEADER_2 = 0x55;
+const int SYNC_ENTRY_SIZE = 5;
+// X 시리즈 컨트롤 테이블: Profile Velocity(112, 4바이트) 바로 뒤에 Goal Position(116, 4바이트)
+const uint16_t ADDR_PROFILE_VELOCITY = 112;
+const uint16_t SYNC_WRITE_LENGTH = 8;
+
+uint8_t sync_buffer[1 + NUM_MOTORS * SYNC_ENTRY_SIZE + 1];
+ParamForSyncWriteInst_t sync_write_param;
 
 void setup() {
   PC_SERIAL.begin(115200);
@@ -50,21 +62,49 @@ void setup() {
 }
 
 void loop() {
-  if (command_received) {
-    parseAndExecuteCommand();
-    command_received = false;
-  }
 }
 
-// 시리얼 이벤트는 변경할 필요 없이 그대로 사용합니다.
+// PC가 응답을 기다리지 않고 여러 줄을 연달아 보내므로(파이프라인 전송),
+// 한 줄이 완성될 때마다 바로 실행해야 다음 줄이 버퍼를 덮어쓰지 않습니다.
 void serialEvent() {
   static byte index = 0;
+  // 0: 텍스트 명령, 1: 첫 헤더 바이트 수신, 2: sync 프레임 본문 수신 중
+  static byte sync_state = 0;
+  static byte sync_index = 0;
+  static byte sync_length = 0;
   while (PC_SERIAL.available() > 0) {
     char received_char = PC_SERIAL.read();
+    uint8_t received_byte = (uint8_t)received_char;
+
+    if (sync_state == 0 && received_byte == SYNC_HEADER_1) {
+      sync_state = 1;
+      continue;
+    }
+    if (sync_state == 1) {
+      sync_state = (received_byte == SYNC_HEADER_2) ? 2 : 0;
+      sync_index = 0;
+      continue;
+    }
+    if (sync_state == 2) {
+      sync_buffer[sync_index++] = received_byte;
+      if (sync_index == 1) {
+        if (received_byte == 0 || received_byte > NUM_MOTORS) {
+          PC_SERIAL.println("Error: Invalid sync frame size.");
+          sync_state = 0;
+          continue;
+        }
+        sync_length = 1 + received_byte * SYNC_ENTRY_SIZE + 1;
+      } else if (sync_index == sync_length) {
+        executeSyncFrame();
+        sync_state = 0;
+      }
+      continue;
+    }
+
     if (received_char == '\n') {
       command_buffer[index] = '\0';
       index = 0;
-      command_received = true;
+      parseAndExecuteCommand();
     } else {
       command_buffer[index] = received_char;
       if (index < sizeof(command_buffer) - 1) {
@@ -76,6 +116,12 @@ void serialEvent() {
 
 // 수신된 "ID,위치,속도" 문자열을 분석하고 실행하는 함수
 void parseAndExecuteCommand() {
+  // 연결 확인용 핑: PC는 포트를 연 뒤 "?"를 보내 준비 여부를 확인합니다.
+  if (strcmp(command_buffer, "?") == 0 || strcmp(command_buffer, "?\r") == 0) {
+    PC_SERIAL.println("Ready");
+    return;
+  }
+
   // strtok는 내부적으로 버퍼를 수정하므로, 복사본을 만들어 사용 (안정성 향상)
   char temp_buffer[50];
   strncpy(temp_buffer, command_buffer, sizeof(temp_buffer) - 1);
@@ -83,17 +129,26 @@ void parseAndExecuteCommand() {
 
   // 첫 번째 토큰(ID) 분리
   char* id_token = strtok(temp_buffer, ",");
-  if (id_token == NULL) return;
+  if (id_token == NULL) {
+    PC_SERIAL.println("Error: Malformed command.");
+    return;
+  }
   int motor_id = atoi(id_token);
 
   // 두 번째 토큰(위치) 분리
   char* pos_token = strtok(NULL, ",");
-  if (pos_token == NULL) return;
+  if (pos_token == NULL) {
+    PC_SERIAL.println("Error: Malformed command.");
+    return;
+  }
   int position = atoi(pos_token);
 
   // 세 번째 토큰(속도) 분리
   char* speed_token = strtok(NULL, ",");
-  if (speed_token == NULL) return;
+  if (speed_token == NULL) {
+    PC_SERIAL.println("Error: Malformed command.");
+    return;
+  }
   int speed = atoi(speed_token);
 
   // ID가 유효한지 확인
@@ -113,12 +168,7 @@ void parseAndExecuteCommand() {
   }
   
   // 먼저 속도를 설정한 후, 목표 위치로 이동 명령을 내립니다.
-  PC_SERIAL.print("Command Received -> ID: ");
-  PC_SERIAL.print(motor_id);
-  PC_SERIAL.print(", Position: ");
-  PC_SERIAL.print(position);
-  PC_SERIAL.print(", Speed: ");
-  PC_SERIAL.println(speed);
+  // PC는 명령마다 응답 한 줄을 순서대로 매칭하므로, 성공/실패 중 정확히 한 줄만 출력합니다.
 
   // 프로파일 속도 설정
   if (!dxl.writeControlTableItem(PROFILE_VELOCITY, motor_id, speed)) {
@@ -133,4 +183,62 @@ void parseAndExecuteCommand() {
      PC_SERIAL.println(motor_id);
      return;
   }
-}
\ No newline at end of file
+
+  PC_SERIAL.print("Command Received -> ID: ");
+  PC_SERIAL.print(motor_id);
+  PC_SERIAL.print(", Position: ");
+  PC_SERIAL.print(position);
+  PC_SERIAL.print(", Speed: ");
+  PC_SERIAL.println(speed);
+}
+
+// 수신된 sync 프레임을 검증하고 SyncWrite 한 번으로 모든 모터에 적용하는 함수
+void executeSyncFrame() {
+  uint8_t count = sync_buffer[0];
+  uint8_t checksum = 0;
+  for (int i = 0; i < 1 + count * SYNC_ENTRY_SIZE + 1; i++) {
+    checksum += sync_buffer[i];
+  }
+  if (checksum != 0) {
+    PC_SERIAL.println("Error: Sync frame checksum mismatch.");
+    return;
+  }
+
+  sync_write_param.addr = ADDR_PROFILE_VELOCITY;
+  sync_write_param.length = SYNC_WRITE_LENGTH;
+  sync_write_param.id_count = 0;
+
+  for (int i = 0; i < count; i++) {
+    const uint8_t* entry = &sync_buffer[1 + i * SYNC_ENTRY_SIZE];
+    uint8_t motor_id = entry[0];
+    uint32_t position = entry[1] | (entry[2] << 8);
+    uint32_t speed = entry[3] | (entry[4] << 8);
+
+    bool is_valid_id = false;
+    for (int j = 0; j < NUM_MOTORS; j++) {
+      if (motor_id == DXL_IDS[j]) {
+        is_valid_id = true;
+        break;
+      }
+    }
+    if (!is_valid_id) {
+      PC_SERIAL.print("Error: Unknown Motor ID (");
+      PC_SERIAL.print(motor_id);
+      PC_SERIAL.println(").");
+      return;
+    }
+
+    XELInfoForSyncWriteParam_t& xel = sync_write_param.xel[sync_write_param.id_count++];
+    xel.id = motor_id;
+    memcpy(&xel.data[0], &speed, 4);
+    memcpy(&xel.data[4], &position, 4);
+  }
+
+  if (!dxl.syncWrite(sync_write_param)) {
+    PC_SERIAL.println("Error: SyncWrite failed.");
+    return;
+  }
+
+  PC_SERIAL.print("Sync OK -> ");
+  PC_SERIAL.println(count);
+}
@@ -1,5 +1,5 @@
 import os
-from typing import Dict
+from typing import Dict, List
 
 try:
     from dotenv import load_dotenv
@@ -14,9 +14,33 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 SERIAL_PORT = os.getenv("SERIAL_PORT", "COM5")
 SERIAL_BAUD = int(os.getenv("SERIAL_BAUD", "115200"))
+SERIAL_MAX_IN_FLIGHT = int(os.getenv("SERIAL_MAX_IN_FLIGHT", "4"))     # 응답 대기 중 허용 명령 수
+SERIAL_ACK_TIMEOUT = float(os.getenv("SERIAL_ACK_TIMEOUT", "1.0"))     # 명령당 응답 대기 시간 (초)
+SERIAL_HANDSHAKE_TIMEOUT = float(os.getenv("SERIAL_HANDSHAKE_TIMEOUT", "3.0"))  # 포트 연 뒤 준비 응답 대기 (초)
+SERIAL_CONNECT_WAIT = float(os.getenv("SERIAL_CONNECT_WAIT", "3.0"))   # 첫 연결 시도를 호출자가 기다리는 시간 (초)
+SERIAL_RECONNECT_MAX = float(os.getenv("SERIAL_RECONNECT_MAX", "30"))  # 재연결 백오프 최대 간격 (초)
+# 동시에 움직이는 모터들을 바이너리 sync 프레임 하나로 전송 (펌웨어가 sync 프레임을 지원할 때만 켜세요)
+SERIAL_SYNC_FRAMES = os.getenv("SERIAL_SYNC_FRAMES", "0").lower() in ("1", "true", "yes", "on")
 BASEBALL_ID = os.getenv("BASEBALL_ID", "")
+# auto: 데모 버튼으로 scenarios/demo.json 재생, script: 데모 버튼으로 SCRIPT_ID 시나리오 재생 (랜덤 진행 없음)
 GAME_MODE = (os.getenv("GAME_MODE") or "auto").lower()
 SCRIPT_ID = (os.getenv("SCRIPT_ID") or "kia_samsung_demo").strip()
+SCENARIO_DIR = os.getenv("SCENARIO_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+# 경기 상태 저널 (상태 변경마다 추가 기록). 디렉터리를 지정할 때만 사용 (예: data/journal)
+GAME_JOURNAL_DIR = (os.getenv("GAME_JOURNAL_DIR") or "").strip()
+GAME_JOURNAL_SNAPSHOT_EVERY = int(os.getenv("GAME_JOURNAL_SNAPSHOT_EVERY", "100"))  # 전체 상태를 기록하는 간격 (이벤트 수)
+GAME_JOURNAL_MAX_BYTES = int(os.getenv("GAME_JOURNAL_MAX_BYTES", str(8 * 1024 * 1024)))  # 넘으면 압축 (0이면 안 함)
+GAME_JOURNAL_MAX_OPEN = int(os.getenv("GAME_JOURNAL_MAX_OPEN", "32"))  # 동시에 열어 두는 저널 수 (넘으면 오래 안 쓴 것부터 닫음)
+GAME_JOURNAL_RECOVER = os.getenv("GAME_JOURNAL_RECOVER", "0").lower() in ("1", "true", "yes", "on")  # 방을 처음 열 때 저널의 마지막 상태로 복구
+# 경기 방 (?room=): 방마다 상태/잠금/데모 재생기가 따로 있음. 유휴 방은 GAME_ROOM_IDLE_SEC 뒤 정리 (저널 파일도 삭제)
+GAME_ROOM_IDLE_SEC = float(os.getenv("GAME_ROOM_IDLE_SEC", "600"))
+GAME_ROOM_MAX = int(os.getenv("GAME_ROOM_MAX", "16"))  # 동시에 열 수 있는 방 수 (default 포함)
+# 열 수 있는 방 id (쉼표 구분). 비어 있으면 영문/숫자/_/- 64자 이내의 아무 id나 허용
+GAME_ROOMS = {name.strip() for name in os.getenv("GAME_ROOMS", "").split(",") if name.strip()}
+# 로봇 매크로를 실행하는 방 (쉼표 구분, "*"이면 모든 방). 나머지 방은 전광판 상태만 진행
+GAME_ROOM_MACRO_ROOMS = {name.strip() for name in os.getenv("GAME_ROOM_MACRO_ROOMS", "default").split(",") if name.strip()}
+# 다음 중계(/api/daum/game): 이벤트 시퀀스를 기억하는 경기 수 (넘으면 오래 안 본 경기부터 잊음)
+DAUM_MAX_GAMES = int(os.getenv("DAUM_MAX_GAMES", "64"))
 MOTOR_ID_MAP: Dict[str, int] = {
     "R1": int(os.getenv("MOTOR_ID_R1", "25")),
     "R2": int(os.getenv("MOTOR_ID_R2", "50")),
@@ -25,6 +49,23 @@ MOTOR_ID_MAP: Dict[str, int] = {
     "L2": int(os.getenv("MOTOR_ID_L2", "125")),
     "LE": int(os.getenv("MOTOR_ID_LE", "150")),
 }
+# 모터 그룹: 서로 다른 그룹만 쓰는 매크로는 동시에 재생할 수 있습니다
+MOTOR_GROUPS: Dict[str, List[str]] = {
+    "left_arm": ["L1", "L2", "LE"],
+    "right_arm": ["R1", "R2", "RE"],
+}
+
+# 매크로 실행기 설정
+MACRO_MAX_ACTIVE = int(os.getenv("MACRO_MAX_ACTIVE", "2"))    # 동시에 재생할 수 있는 매크로 수 (모터 그룹이 겹치지 않을 때)
+MACRO_QUEUE_SIZE = int(os.getenv("MACRO_QUEUE_SIZE", "4"))    # 실행 대기 가능한 매크로 수
+MACRO_RUN_HISTORY = int(os.getenv("MACRO_RUN_HISTORY", "100"))  # 상태 조회용으로 보관할 최근 매크로 실행 수
+# 매크로 JSON 파일을 찾을 디렉터리 (기본: 프로젝트 루트). 새 파일을 넣으면 재시작 없이 인식됩니다
+MACRO_DIR = os.getenv("MACRO_DIR") or os.path.dirname(os.path.abspath(__file__))
+MACRO_RELOAD_INTERVAL = float(os.getenv("MACRO_RELOAD_INTERVAL", "1.0"))  # 매크로 파일 변경 확인 주기 (초)
+MACRO_CONTROL_RATE_HZ = float(os.getenv("MACRO_CONTROL_RATE_HZ", "50"))   # 키프레임 매크로 기본 보간 주기 (Hz)
+# 매크로 편집 저장소: json (macros.json 파일) | sqlite (매크로별 행, WAL, 동시 편집 충돌 감지)
+MACRO_STORE_BACKEND = os.getenv("MACRO_STORE_BACKEND", "json").lower()
+MACRO_DB_PATH = os.getenv("MACRO_DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "macros.db")
 
 # 음성 인식 설정
 VOICE_CONV_MODEL = "base"           # Whisper 모델 (모든 모드에서 사용)
@@ -1,14 +1,41 @@
 from __future__ import annotations
 
-from typing import Dict, Any
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
 
 from flask import Blueprint, jsonify, request
 import requests
-from macros_executor import run_macro_by_event_text_async, last_event_to_trigger_text
+from config import DAUM_MAX_GAMES
+from game_journal import append_journal, get_journal, journal_lookup
+from macros_executor import event_dispatcher, last_event_to_trigger_text
 
 
 daum_bp = Blueprint("daum", __name__)
 
+_GAME_ID_RE = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+# gameId별 (마지막 중계 문자 키, 이벤트 시퀀스 번호). 최근에 본 순서 (LRU, DAUM_MAX_GAMES개까지)
+_daum_events: "OrderedDict[str, Tuple[Tuple[int, str], int]]" = OrderedDict()
+_daum_events_lock = threading.Lock()
+
+
+def _daum_event_seq(game_id: str, live_count: int, last_text: str) -> int:
+    """중계 문자가 새로 바뀔 때만 증가하는 gameId별 이벤트 시퀀스 번호를 반환합니다."""
+    key = (live_count, last_text)
+    with _daum_events_lock:
+        prev_key, seq = _daum_events.get(game_id, (None, 0))
+        if key != prev_key:
+            seq += 1
+        _daum_events[game_id] = (key, seq)
+        _daum_events.move_to_end(game_id)
+        while len(_daum_events) > max(1, DAUM_MAX_GAMES):
+            old_id, _ = _daum_events.popitem(last=False)
+            # 시퀀스가 1부터 다시 시작하므로 디스패처 기록도 함께 잊음
+            event_dispatcher.forget(f"daum:{old_id}")
+        return seq
+
 
 def _map_daum_to_ui(doc: Dict[str, Any]) -> Dict[str, Any]:
     away_team_name = doc.get("away", {}).get("team", {}).get("shortNameKo") or doc.get("away", {}).get("team", {}).get("shortName") or "AWAY"
@@ -76,6 +103,14 @@ def api_daum_state():
     game_id = request.args.get("gameId")
     if not game_id:
         return jsonify({"error": "missing gameId"}), 400
+    # 다음 API 주소와 저널 파일 이름에 그대로 들어가므로 형식 확인
+    if not _GAME_ID_RE.fullmatch(game_id):
+        return jsonify({"error": "invalid gameId"}), 400
+
+    # ?at=<journal_seq>: 이 경기의 저널에 기록된 과거 시점의 상태
+    if request.args.get("at") is not None:
+        payload, status = journal_lookup(get_journal(f"daum-{game_id}"), request.args["at"])
+        return jsonify(payload), status
 
     url = (
         "https://issue.daum.net/api/arms/SPORTS_GAME"
@@ -97,10 +132,22 @@ def api_daum_state():
     doc = data.get("document") or {}
     mapped = _map_daum_to_ui(doc)
 
-    # 라이브 텍스트/상태로부터 이벤트 추출하여 매크로 트리거
+    live_text = (doc.get("liveData", {}) or {}).get("liveText", [])
+    live_count = len(live_text) if isinstance(live_text, list) else 0
+    mapped["event_seq"] = _daum_event_seq(game_id, live_count, mapped["last_event"]["description"])
+
+    # 경기별 저널에 기록 (바뀐 것이 없으면 기록하지 않음)
+    try:
+        journal_seq = append_journal(f"daum-{game_id}", dict(mapped), "daum")
+        if journal_seq is not None:
+            mapped["journal_seq"] = journal_seq
+    except OSError as e:
+        print(f"✗ 다음 중계 저널 기록 실패: {e}")
+
+    # 라이브 텍스트/상태로부터 이벤트 추출하여 매크로 트리거 (새 중계 문자마다 한 번만)
     trigger_text = last_event_to_trigger_text(mapped.get("last_event"))
     if trigger_text:
-        run_macro_by_event_text_async(trigger_text)
+        event_dispatcher.dispatch(f"daum:{game_id}", mapped["event_seq"], trigger_text)
 
     return jsonify(mapped)
 
@@ -0,0 +1,192 @@
+"""
+경기 이벤트 텍스트를 매크로 이름으로 바꾸는 매처.
+
+event_keywords.json의 키워드/정규식 표를 하나의 정규식으로 컴파일해, 규칙마다 텍스트를 다시 훑지 않습니다.
+표의 순서가 곧 우선순위이며, 텍스트 어디에서든 먼저 나오는 규칙이 이깁니다
+(규칙을 차례로 검사하던 이전 방식과 결과가 같습니다).
+
+마이크로벤치마크:
+    python event_matcher.py [반복 횟수]
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import time
+from typing import List, Optional, Set, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EVENT_KEYWORDS_PATH = os.path.join(BASE_DIR, "event_keywords.json")
+
+Rule = Tuple[str, str]  # (정규식, 매크로 이름)
+
+
+# 첫 글자를 정하지 않는 폭 0 조건
+_ZERO_WIDTH = ("\\b", "\\B", "\\A", "^")
+
+
+def _top_level_branches(pattern: str) -> List[str]:
+    """괄호/문자 집합 밖의 | 로 정규식을 나눕니다."""
+    branches: List[str] = []
+    depth, start, i, in_class = 0, 0, 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def _first_chars(pattern: str) -> Optional[Set[str]]:
+    """
+    정규식이 매치를 시작할 수 있는 첫 글자 집합. 모든 분기가 (폭 0 조건 뒤) 반복되지 않는
+    일반 글자로 시작할 때만 알 수 있으며, 그 밖의 구문이 보이면 None (가드 없음)을 돌려줍니다.
+    정규식 엔진 내부 구조에 의존하지 않도록 패턴 문자열만 보고 보수적으로 판단합니다.
+    """
+    chars: Set[str] = set()
+    for branch in _top_level_branches(pattern):
+        i = 0
+        while branch.startswith(_ZERO_WIDTH, i):
+            i += 1 if branch[i] == "^" else 2
+        c = branch[i:i + 1]
+        if c == "\\":
+            literal = branch[i + 1:i + 2]
+            if not literal or literal.isalnum():  # \d, \w, 역참조 등
+                return None
+            end = i + 2
+        elif not c or c in ".^$*+?{}[]()|":
+            return None
+        else:
+            literal, end = c, i + 1
+        if branch[end:end + 1] in ("?", "*", "{"):  # 생략될 수 있는 첫 글자
+            return None
+        chars.add(literal)
+    return chars
+
+
+def _guard_prefix(patterns: List[str]) -> str:
+    """
+    규칙들의 첫 글자 집합으로 만든 lookahead. 정규식 엔진이 후보가 아닌 위치를
+    분기를 하나씩 시도하지 않고 건너뛰게 합니다 (첫 글자를 알 수 없으면 빈 문자열).
+    """
+    chars: Set[str] = set()
+    for pattern in patterns:
+        first = _first_chars(pattern)
+        if first is None:
+            return ""
+        chars |= first
+    if not chars:
+        return ""
+    return "(?=[" + "".join(re.escape(c) for c in sorted(chars)) + "])"
+
+
+class EventMatcher:
+    """우선순위가 있는 규칙 목록을 한 번에 검사하는 매처입니다."""
+
+    def __init__(self, rules: List[Rule]) -> None:
+        self.names = [name for _, name in rules]
+        # _searches[i]: 규칙 0..i-1을 우선순위 순으로 묶은 정규식 (i번째보다 높은 규칙만 찾을 때 사용)
+        # _group_rule: 바깥 캡처 그룹 번호 → 규칙 번호
+        self._searches: List[Optional[re.Pattern]] = [None]
+        self._group_rule: List[int] = [-1]
+        patterns: List[str] = []
+        for index, (pattern, _) in enumerate(rules):
+            self._group_rule.append(index)
+            self._group_rule.extend([index] * re.compile(pattern).groups)
+            patterns.append(pattern)
+            alternation = "|".join(f"({p})" for p in patterns)
+            self._searches.append(re.compile(f"{_guard_prefix(patterns)}(?:{alternation})"))
+
+    @classmethod
+    def from_table(cls, keywords: List[List[str]], patterns: List[List[str]]) -> "EventMatcher":
+        rules: List[Rule] = [(re.escape(str(k).lower()), str(v)) for k, v in keywords]
+        rules += [(str(p), str(v)) for p, v in patterns]
+        return cls(rules)
+
+    def match(self, text: str) -> str:
+        """텍스트에 매치되는 규칙 중 우선순위가 가장 높은 규칙의 매크로 이름 (없으면 "")"""
+        if not text:
+            return ""
+        t = str(text).strip().lower()
+        best = len(self.names)
+        pos = 0
+        # 가장 왼쪽 매치 위치에서는 정규식 분기 순서대로 가장 높은 규칙이 선택됩니다.
+        # 그보다 높은 규칙만 남긴 정규식으로 다음 위치부터 다시 찾으며, 찾을 때마다 후보 규칙이 줄어듭니다.
+        while best > 0:
+            m = self._searches[best].search(t, pos)
+            if m is None:
+                break
+            best = self._group_rule[m.lastindex]
+            pos = m.start() + 1
+        return self.names[best] if best < len(self.names) else ""
+
+
+def load_event_matcher(path: str = EVENT_KEYWORDS_PATH) -> EventMatcher:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        matcher = EventMatcher.from_table(data.get("keywords", []), data.get("patterns", []))
+        print(f"✓ {os.path.basename(path)} 로드 완료: {len(matcher.names)}개 이벤트 규칙")
+        return matcher
+    except FileNotFoundError:
+        print(f"⚠️ {path} 파일을 찾을 수 없습니다. 이벤트 매크로가 실행되지 않습니다.")
+    except Exception as e:
+        print(f"✗ {path} 로드 실패: {e}")
+    return EventMatcher([])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 20000
+    samples = [
+        "홈런", "삼진 아웃", "볼넷으로 출루", "3구 스트라이크", "좌중간 2루타", "수비 실책으로 진루",
+        "HR", "strikeout swinging", "base on balls", "single to left", "stolen base",
+        "타자 교체: 대타 김선빈", "투수 교체", "7회말 공격 시작", "ball four", "",
+    ]
+    matcher = load_event_matcher()
+    with open(EVENT_KEYWORDS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    def legacy(text: str) -> str:
+        """비교용: 규칙을 하나씩 검사하던 이전 방식"""
+        if not text:
+            return ""
+        t = str(text).strip().lower()
+        for k, v in data["keywords"]:
+            if k in t:
+                return v
+        for pat, name in data["patterns"]:
+            if re.search(pat, t):
+                return name
+        return ""
+
+    for s in samples:
+        assert matcher.match(s) == legacy(s), s
+
+    for label, fn in (("legacy", legacy), ("compiled", matcher.match)):
+        start = time.perf_counter()
+        for i in range(count):
+            fn(samples[i % len(samples)])
+        elapsed = time.perf_counter() - start
+        print(f"{label:10s} {elapsed / count * 1e6:8.2f} µs/call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+하드웨어 없이 serial_api / macros_executor를 시험하기 위한 가짜 OpenCM 장치.
+
+의사 터미널(PTY)을 열고 opencm_main.ino와 같은 프로토콜로 응답합니다.
+- 텍스트 명령 'ID,위치,속도\\n' → "Command Received -> ..." 또는 "Error: ..."
+- 바이너리 sync 프레임 → "Sync OK -> N"
+- 연결 확인 핑 '?' → "Ready"
+
+사용 예:
+    python fake_opencm.py --latency-ms 3              # 장치 경로 출력 후 대기
+    SERIAL_PORT=/dev/pts/N python app.py              # 출력된 경로로 서버 연결
+    python fake_opencm.py --bench 2000 --sync-frames  # 처리량/지터 벤치마크
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pty
+    import tty
+except ImportError:  # pragma: no cover - Windows
+    pty = None
+    tty = None
+
+# opencm_main.ino의 DXL_IDS와 같은 고정 모터 ID
+# (config는 import 시점에 SERIAL_PORT를 읽으므로, 장치 경로를 정하기 전에는 불러오지 않습니다)
+DXL_IDS = (25, 50, 75, 100, 125, 150)
+
+SYNC_HEADER = b"\xAA\x55"
+SYNC_ENTRY_SIZE = 5
+
+
+class FakeOpenCM:
+    """PTY 위에서 동작하는 OpenCM 펌웨어 흉내 장치입니다."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        baud: int = 0,
+        drop_rate: float = 0.0,
+        error_rate: float = 0.0,
+        disconnect_after: Optional[int] = None,
+        motor_ids: Optional[List[int]] = None,
+        boot_banner: bool = True,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        latency_ms: 명령 하나를 처리하는 데 걸리는 시간 (SyncWrite 포함)
+        baud: 0보다 크면 송수신 바이트마다 10/baud초를 소모해 전송 속도를 흉내
+        drop_rate: 응답을 보내지 않을 확률 (응답 유실)
+        error_rate: 모터 쓰기 실패 응답을 보낼 확률
+        disconnect_after: 이 개수만큼 명령을 처리한 뒤 장치를 분리
+        """
+        if pty is None:
+            raise RuntimeError("fake_opencm은 PTY를 지원하는 OS(Linux/macOS)에서만 동작합니다")
+        self.latency_s = max(0.0, latency_ms) / 1000.0
+        self.byte_time = 10.0 / baud if baud > 0 else 0.0
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.disconnect_after = disconnect_after
+        self.motor_ids = set(motor_ids or DXL_IDS)
+        self.boot_banner = boot_banner
+        self._rng = random.Random(seed)
+
+        self.commands_received = 0
+        self.frames_received = 0
+        self.bytes_received = 0
+        self.positions: Dict[int, Tuple[int, int]] = {}
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FakeOpenCM":
+        self._thread = threading.Thread(target=self._run, name="fake-opencm", daemon=True)
+        self._thread.start()
+        if self.boot_banner:
+            self._reply("Arduino is ready. Waiting for commands from Flask API...")
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "FakeOpenCM":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    def _reply(self, text: str) -> None:
+        data = (text + "\r\n").encode("utf-8")
+        if self.byte_time:
+            time.sleep(len(data) * self.byte_time)
+        try:
+            os.write(self._master, data)
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                chunk = os.read(self._master, 1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            if self.byte_time:
+                time.sleep(len(chunk) * self.byte_time)
+            self.bytes_received += len(chunk)
+            buffer += chunk
+            while buffer and not self._stop.is_set():
+                if buffer.startswith(SYNC_HEADER):
+                    if len(buffer) < 3:
+                        break
+                    length = 2 + 1 + buffer[2] * SYNC_ENTRY_SIZE + 1
+                    if len(buffer) < length:
+                        break
+                    frame, buffer = bytes(buffer[:length]), buffer[length:]
+                    self._handle_frame(frame)
+                    continue
+                if b"\n" not in buffer:
+                    break
+                raw, _, rest = buffer.partition(b"\n")
+                buffer = bytearray(rest)
+                self._handle_line(raw.decode("utf-8", errors="ignore").strip())
+                if self.disconnect_after is not None and self.commands_received >= self.disconnect_after:
+                    self.stop()
+                    return
+
+    def _handle_line(self, line: str) -> None:
+        if line == "?":
+            self._reply("Ready")
+            return
+        parts = line.split(",")
+        if len(parts) < 3:
+            self._reply("Error: Malformed command.")
+            return
+        try:
+            motor_id, position, speed = (int(p) for p in parts[:3])
+        except ValueError:
+            self._reply("Error: Malformed command.")
+            return
+        self.commands_received += 1
+        self._execute([(motor_id, position, speed)])
+
+    def _handle_frame(self, frame: bytes) -> None:
+        count = frame[2]
+        if count == 0 or count > len(self.motor_ids):
+            self._reply("Error: Invalid sync frame size.")
+            return
+        if sum(frame[2:]) & 0xFF:
+            self._reply("Error: Sync frame checksum mismatch.")
+            return
+        entries = []
+        for i in range(count):
+            entry = frame[3 + i * SYNC_ENTRY_SIZE: 3 + (i + 1) * SYNC_ENTRY_SIZE]
+            entries.append((entry[0], int.from_bytes(entry[1:3], "little"), int.from_bytes(entry[3:5], "little")))
+        self.frames_received += 1
+        self.commands_received += count
+        self._execute(entries, sync=True)
+
+    def _execute(self, entries: List[Tuple[int, int, int]], sync: bool = False) -> None:
+        for motor_id, _, _ in entries:
+            if motor_id not in self.motor_ids:
+                self._reply(f"Error: Unknown Motor ID ({motor_id}).")
+                return
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        if self.drop_rate and self._rng.random() < self.drop_rate:
+            return
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self._reply("Error: SyncWrite failed." if sync else f"Error: Failed to set GoalPosition for ID {entries[0][0]}")
+            return
+        for motor_id, position, speed in entries:
+            self.positions[motor_id] = (position, speed)
+        if sync:
+            self._reply(f"Sync OK -> {len(entries)}")
+        else:
+            motor_id, position, speed = entries[0]
+            self._reply(f"Command Received -> ID: {motor_id}, Position: {position}, Speed: {speed}")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_benchmark(device: FakeOpenCM, count: int) -> Dict[str, float]:
+    """
+    가짜 장치에 serial_api를 연결해 처리량과 응답 지연 지터를 측정합니다.
+    config/serial_api는 이 함수 안에서 처음 import되어야 SERIAL_PORT가 장치를 가리킵니다.
+    """
+    os.environ["SERIAL_PORT"] = device.port
+    if "config" in sys.modules:
+        raise RuntimeError("벤치마크는 config를 import하기 전에 실행해야 합니다")
+    import serial_api
+
+    serial_api._ensure_open()
+    motor_ids = sorted(device.motor_ids)
+
+    # 1) 명령마다 응답을 기다리는 왕복 지연
+    latencies: List[float] = []
+    for i in range(count):
+        start = time.perf_counter()
+        serial_api._send_command(motor_ids[i % len(motor_ids)], 1000 + i % 2000, 100)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+
+    # 2) 포즈 단위 스트리밍 처리량 (포즈 안의 명령은 응답을 기다리지 않고 파이프라인 전송)
+    start = time.perf_counter()
+    futures = []
+    for i in range(count // len(motor_ids) or 1):
+        pose = [(motor_id, 1000 + i % 2000, 100) for motor_id in motor_ids]
+        futures += serial_api.send_pose_async(pose)
+        # 코얼레싱을 피하도록 이전 포즈가 전송될 때까지 대기
+        futures[-1].result()
+    for fut in futures:
+        fut.result()
+    elapsed = time.perf_counter() - start
+
+    serial_api._writer.close_port()
+    return {
+        "roundtrip_ms_p50": statistics.median(latencies),
+        "roundtrip_ms_p95": _percentile(latencies, 95),
+        "roundtrip_ms_max": max(latencies),
+        "roundtrip_jitter_ms": statistics.pstdev(latencies),
+        "pose_stream_commands": float(len(futures)),
+        "pose_stream_commands_per_s": len(futures) / elapsed if elapsed else 0.0,
+        "device_bytes_received": float(device.bytes_received),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PTY 기반 가짜 OpenCM 장치")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="명령당 처리 지연 (ms)")
+    parser.add_argument("--baud", type=int, default=115200, help="전송 속도 흉내 (0이면 제한 없음)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="응답 유실 확률 (0~1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="쓰기 실패 응답 확률 (0~1)")
+    parser.add_argument("--disconnect-after", type=int, default=None, help="N개 명령 후 장치 분리")
+    parser.add_argument("--seed", type=int, default=None, help="장애 주입 난수 시드")
+    parser.add_argument("--bench", type=int, default=0, metavar="N", help="N개 명령으로 벤치마크 실행 후 종료")
+    parser.add_argument("--sync-frames", action="store_true", help="벤치마크에서 sync 프레임 사용")
+    args = parser.parse_args(argv)
+
+    device = FakeOpenCM(
+        latency_ms=args.latency_ms,
+        baud=args.baud,
+        drop_rate=args.drop_rate,
+        error_rate=args.error_rate,
+        disconnect_after=args.disconnect_after,
+        seed=args.seed,
+    ).start()
+
+    if args.bench:
+        os.environ["SERIAL_SYNC_FRAMES"] = "1" if args.sync_frames else "0"
+        results = run_benchmark(device, args.bench)
+        device.stop()
+        for key, value in results.items():
+            print(f"{key:28s} {value:12.3f}")
+        return 0
+
+    print(f"✓ 가짜 OpenCM 장치 실행 중: {device.port}")
+    print(f"  → SERIAL_PORT={device.port} 로 서버를 실행하세요 (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+        print(f"명령 {device.commands_received}개 (sync 프레임 {device.frames_received}개) 처리")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+경기 상태 저널: 상태가 바뀔 때마다 이벤트 한 줄을 JSONL 파일에 덧붙입니다 (추가 전용).
+
+레코드 (한 줄에 하나)
+    {"seq": 12, "t": 1731234567.1, "cause": "random", "patch": {"set": {...}, "unset": [...]}}
+    {"seq": 13, "t": 1731234569.1, "cause": "random", "state": {...}}
+- patch: 이전 상태에서 바뀐 최상위 키만 통째로 기록
+- state: 전체 상태 (첫 레코드와 snapshot_every개마다). 특정 seq의 상태는 그 이전의 가장 가까운
+  전체 상태에서 시작해 이후 patch만 적용해 복원합니다
+프로세스가 쓰는 도중 끊겨 마지막 줄이 잘렸으면, 다시 열 때 그 줄을 잘라내고 이어서 씁니다.
+
+전체 상태 레코드의 위치는 <파일>.idx에 따로 기록해, 다시 열 때 마지막 전체 상태부터만 읽습니다.
+파일이 max_bytes를 넘으면 마지막 전체 상태 이전 기록을 버리고 다시 씁니다 (압축).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import GAME_JOURNAL_DIR, GAME_JOURNAL_MAX_BYTES, GAME_JOURNAL_MAX_OPEN, GAME_JOURNAL_SNAPSHOT_EVERY
+from state_snapshot import FrozenDict, freeze
+
+State = Dict[str, Any]
+
+
+def _diff(old: State, new: State) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {}
+    changed = {k: v for k, v in new.items() if k not in old or (old[k] is not v and old[k] != v)}
+    if changed:
+        patch["set"] = changed
+    removed = [k for k in old if k not in new]
+    if removed:
+        patch["unset"] = removed
+    return patch
+
+
+def _apply_patch(state: State, patch: Dict[str, Any]) -> State:
+    result = dict(state)
+    result.update(patch.get("set") or {})
+    for key in patch.get("unset") or []:
+        result.pop(key, None)
+    return result
+
+
+class JournalClosedError(OSError):
+    """닫힌 저널에 기록하려 함 (get_journal로 다시 얻어 기록하면 됨)"""
+
+
+class GameJournal:
+    """경기 상태 하나(스트림 하나)의 저널 파일입니다."""
+
+    def __init__(self, path: str, snapshot_every: int = GAME_JOURNAL_SNAPSHOT_EVERY,
+                 max_bytes: int = GAME_JOURNAL_MAX_BYTES) -> None:
+        self.path = path
+        # 전체 상태 레코드의 "seq 파일위치" 색인 (복구 시 마지막 전체 상태로 바로 이동)
+        self.index_path = path + ".idx"
+        self.snapshot_every = max(1, snapshot_every)
+        self.max_bytes = max_bytes
+        self.seq = 0
+        self._last: Optional[State] = None
+        self._since_snapshot = 0
+        # 전체 상태 레코드의 (seq, 파일 위치)
+        self._snapshots: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._index_file = None
+        self._closed = False
+        self._recover()
+
+    # ----- 복구 -----
+
+    def _recover(self) -> None:
+        """마지막 전체 상태 레코드부터 끝까지 읽어 마지막 상태를 만듭니다 (색인이 없거나 어긋나면 처음부터)."""
+        if not os.path.exists(self.path):
+            return
+        snapshots = self._read_index()
+        state: Optional[State] = None
+        with open(self.path, "rb") as f:
+            while snapshots:
+                seq, offset = snapshots[-1]
+                f.seek(offset)
+                try:
+                    line = f.readline()
+                    record = json.loads(line)
+                    if line.endswith(b"\n") and record.get("seq") == seq and "state" in record:
+                        break
+                except ValueError:
+                    pass
+                snapshots.pop()  # 잘려 나간 꼬리를 가리키는 색인
+            self._snapshots = snapshots
+            start = snapshots[-1][1] if snapshots else 0
+            if not snapshots and os.path.getsize(self.path) > 0:
+                print(f"⚠️ {os.path.basename(self.path)} 색인이 없어 처음부터 읽습니다")
+            good_end = start
+            f.seek(start)
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                try:
+                    record = json.loads(line)
+                    if not line.endswith(b"\n"):
+                        raise ValueError("truncated record")
+                    if "state" in record:
+                        state = record["state"]
+                        if not self._snapshots or self._snapshots[-1][1] < offset:
+                            self._snapshots.append((record["seq"], offset))
+                        self._since_snapshot = 0
+                    elif state is not None:
+                        state = _apply_patch(state, record.get("patch") or {})
+                        self._since_snapshot += 1
+                    else:
+                        raise ValueError("patch before first snapshot")
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ {os.path.basename(self.path)} {offset}바이트 이후 레코드 손상, 잘라냅니다: {e}")
+                    break
+                self.seq = record["seq"]
+                good_end = f.tell()
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        if snapshots != self._read_index():
+            self._write_index()
+        self._last = state
+        if state is not None:
+            print(f"✓ {os.path.basename(self.path)} 복구 완료: seq {self.seq}")
+
+    def _read_index(self) -> List[Tuple[int, int]]:
+        snapshots: List[Tuple[int, int]] = []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    seq, offset = line.split()
+                    snapshots.append((int(seq), int(offset)))
+        except (OSError, ValueError):
+            pass
+        return snapshots
+
+    def _write_index(self) -> None:
+        if self._index_file is not None:
+            self._index_file.close()
+            self._index_file = None
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{seq} {offset}\n" for seq, offset in self._snapshots)
+        os.replace(tmp, self.index_path)
+
+    def latest(self) -> Optional[FrozenDict]:
+        """마지막으로 기록된 상태 (없으면 None)"""
+        return freeze(self._last) if self._last is not None else None
+
+    # ----- 기록 -----
+
+    def append(self, state: State, cause: str = "") -> int:
+        """상태를 기록하고 seq를 반환합니다. 마지막 기록과 같으면 기록하지 않습니다."""
+        with self._lock:
+            if self._closed:
+                # 캐시에서 밀려난 뒤 새로 연 같은 파일의 저널과 seq가 겹치지 않도록 (append_journal이 다시 열어 재시도)
+                raise JournalClosedError(f"journal {os.path.basename(self.path)} is closed")
+            record: Dict[str, Any] = {"seq": self.seq + 1, "t": round(time.time(), 3), "cause": cause}
+            if self._last is None or self._since_snapshot + 1 >= self.snapshot_every:
+                if self._last is not None and not _diff(self._last, state):
+                    return self.seq
+                record["state"] = state
+            else:
+                patch = _diff(self._last, state)
+                if not patch:
+                    return self.seq
+                record["patch"] = patch
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "ab")
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self.seq += 1
+            self._last = freeze(state)
+            if "state" in record:
+                self._snapshots.append((self.seq, offset))
+                self._since_snapshot = 0
+                if self._index_file is None:
+                    self._index_file = open(self.index_path, "a", encoding="utf-8")
+                self._index_file.write(f"{self.seq} {offset}\n")
+                self._index_file.flush()
+                if self.max_bytes > 0 and offset + len(line) > self.max_bytes:
+                    self._compact_locked()
+            else:
+                self._since_snapshot += 1
+            return self.seq
+
+    def compact(self) -> None:
+        """마지막 전체 상태 레코드 이전을 버리고 파일을 다시 씁니다 (seq는 그대로)."""
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        if not self._snapshots or self._snapshots[-1][1] == 0:
+            return
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        base_seq, base = self._snapshots[-1]
+        tmp = self.path + ".tmp"
+        with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            src.seek(base)
+            while True:
+                chunk = src.read(1 << 20)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        os.replace(tmp, self.path)
+        self._snapshots = [(base_seq, 0)]
+        self._write_index()
+        print(f"✓ {os.path.basename(self.path)} 압축 완료: seq {base_seq} 이전 기록 삭제")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+
+    # ----- 조회 -----
+
+    def state_at(self, seq: int) -> Optional[Tuple[FrozenDict, float, str]]:
+        """seq 시점의 (상태, 기록 시각, 원인). 없는 seq면 None"""
+        # 압축이 파일을 다시 쓰는 동안 위치가 바뀌지 않도록 읽는 동안 잠금 유지 (최대 snapshot_every줄)
+        with self._lock:
+            if seq < 1 or seq > self.seq:
+                return None
+            index = bisect_right(self._snapshots, (seq, float("inf"))) - 1
+            if index < 0:
+                return None  # 압축으로 지워진 seq
+            _, offset = self._snapshots[index]
+            state: Optional[State] = None
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    record = json.loads(line)
+                    if record["seq"] > seq:
+                        break
+                    if "state" in record:
+                        state = record["state"]
+                    else:
+                        state = _apply_patch(state or {}, record.get("patch") or {})
+                    if record["seq"] == seq:
+                        return freeze(state), record["t"], record.get("cause", "")
+        return None
+
+
+def journal_lookup(journal: Optional[GameJournal], at: str) -> Tuple[Dict[str, Any], int]:
+    """?at=<seq> 조회 결과 (응답 본문, HTTP 상태 코드)"""
+    if journal is None:
+        return {"ok": False, "error": "journal_disabled"}, 404
+    try:
+        seq = int(at)
+    except ValueError:
+        return {"ok": False, "error": "at must be an integer"}, 400
+    found = journal.state_at(seq)
+    if found is None:
+        return {"ok": False, "error": "unknown_seq", "latest": journal.seq}, 404
+    state, recorded_at, cause = found
+    return {**state, "journal_seq": seq, "journal_t": recorded_at, "journal_cause": cause}, 200
+
+
+# 스트림 이름 → 열린 저널 (최근 사용 순). GAME_JOURNAL_MAX_OPEN개를 넘으면 가장 오래 안 쓴 것부터 닫음
+_journals: "OrderedDict[str, GameJournal]" = OrderedDict()
+_journals_lock = threading.Lock()
+
+# 파일 이름이 되므로 영문/숫자/_/-만 허용 (클라이언트가 보낸 gameId 등이 그대로 들어옴)
+_STREAM_RE = re.compile(r"[0-9A-Za-z][0-9A-Za-z_-]{0,79}")
+
+
+def valid_stream_name(stream: str) -> bool:
+    return bool(_STREAM_RE.fullmatch(stream))
+
+
+def get_journal(stream: str) -> Optional[GameJournal]:
+    """
+    스트림 이름("game", "daum-<gameId>" 등)의 저널. GAME_JOURNAL_DIR가 비어 있으면 None
+    저널 객체를 오래 붙잡아 두지 말고 쓸 때마다 다시 얻으세요 (캐시에서 밀려나면 닫힘). 기록은 append_journal로
+    ValueError: 스트림 이름이 잘못됨
+    """
+    if not GAME_JOURNAL_DIR:
+        return None
+    if not valid_stream_name(stream):
+        raise ValueError(f"invalid journal stream name: {stream!r}")
+    with _journals_lock:
+        journal = _journals.get(stream)
+        if journal is None:
+            journal = _journals[stream] = GameJournal(os.path.join(GAME_JOURNAL_DIR, f"{stream}.jsonl"))
+            while len(_journals) > max(1, GAME_JOURNAL_MAX_OPEN):
+                # 잠금 안에서 닫아, 같은 파일을 새로 연 저널이 닫히기 전 기록을 놓치지 않게 함
+                _journals.popitem(last=False)[1].close()
+        else:
+            _journals.move_to_end(stream)
+    return journal
+
+
+def append_journal(stream: str, state: State, cause: str = "") -> Optional[int]:
+    """
+    스트림의 저널에 상태를 기록하고 seq를 반환합니다 (저널을 쓰지 않으면 None).
+    얻은 저널이 기록 직전에 캐시에서 밀려나 닫혔으면 다시 열어 기록하므로 기록이 빠지지 않습니다.
+    """
+    while True:
+        journal = get_journal(stream)
+        if journal is None:
+            return None
+        try:
+            return journal.append(state, cause)
+        except JournalClosedError:
+            continue  # 방금 다시 연 저널은 캐시의 가장 최근 항목이라 곧바로 다시 밀려나지 않음
+
+
+def release_journal(stream: str, delete: bool = False) -> None:
+    """
+    스트림의 저널 파일을 닫고 캐시에서 뺍니다. 다시 get_journal하면 파일에서 복구합니다.
+    delete: 저널 파일과 색인도 지움 (정리한 경기 방 등)
+    """
+    with _journals_lock:
+        journal = _journals.pop(stream, None)
+        if journal is not None:
+            journal.close()
+        if delete and GAME_JOURNAL_DIR and valid_stream_name(stream):
+            path = os.path.join(GAME_JOURNAL_DIR, f"{stream}.jsonl")
+            for name in (path, path + ".idx"):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"✗ 저널 파일 삭제 실패: {os.path.basename(name)}: {e}")
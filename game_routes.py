@@ -1,26 +1,47 @@
 from __future__ import annotations
 
+import itertools
+import json
+import os
 import random
+import re
 import threading
 import time
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
 
-from flask import Blueprint, jsonify, render_template, request
+from flask import Blueprint, Response, jsonify, render_template, request, stream_with_context
 from macros_executor import (
-    run_macro_by_event_text_async,
+    event_dispatcher,
     last_event_to_trigger_text,
     run_macro_by_name_async,
 )
 from macros_executor import trigger_macro
-from config import BASEBALL_ID
+from config import (
+    BASEBALL_ID,
+    GAME_JOURNAL_RECOVER,
+    GAME_MODE,
+    GAME_ROOM_IDLE_SEC,
+    GAME_ROOM_MACRO_ROOMS,
+    GAME_ROOM_MAX,
+    GAME_ROOMS,
+    SCRIPT_ID,
+)
+from game_journal import GameJournal, append_journal, get_journal, journal_lookup, release_journal
+from scenario_engine import ScenarioLibrary, ScenarioPlayer
+from state_snapshot import FrozenDict, freeze, thaw
 
 
 game_bp = Blueprint("game", __name__)
 
-lock = threading.Lock()
+# ETag에 붙이는 프로세스별 값 (서버를 재시작해 버전이 0부터 다시 시작해도 이전 ETag와 겹치지 않도록)
+_ETAG_PREFIX = os.urandom(4).hex()
+
+# SSE 연결 유지용 주석 전송 간격 (초)
+STREAM_KEEPALIVE_SEC = 15.0
 
 
-def _initial_game_state() -> Dict[str, Any]:
+def _initial_game_state(event_seq: int = 0) -> Dict[str, Any]:
     return {
         "teams": {
             "away": {"name": "AWAY", "runs": 0, "hits": 0, "errors": 0},
@@ -44,12 +65,10 @@ def _initial_game_state() -> Dict[str, Any]:
             "rf": {"active": True, "name": ""},
         },
         "last_event": {"type": "start", "description": "경기 시작"},
+        "event_seq": event_seq,
     }
 
 
-game_state: Dict[str, Any] = _initial_game_state()
-
-
 DEMO_MACRO_MAP = {
     "차렷자세": ("차렷자세", "차렷자세"),  # hold.json
     "김지찬 응원가": ("김지찬 응원가", "김지찬 응원가"),  # kimjichan.json
@@ -60,510 +79,294 @@ DEMO_MACRO_MAP = {
 }
 
 
-DEMO_SCENARIO_STEPS = [
-    {
-        "delay": 0,
-        "description": "데모 시나리오 시작 – 기본 자세",
-        "event_type": "info",
-        "macro": "차렷자세",
-        "set_teams": {"home": "기아", "away": "삼성"},
-        "set_scores": {"home": 0, "away": 0},
-        "set_hits": {"home": 0, "away": 0},
-        "set_errors": {"home": 0, "away": 0},
-        "inning": 1,
-        "half": "T",
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-        "bases": {"first": False, "second": False, "third": False},
-        "fielders": {
-            "p": {"active": True, "name": "양현종"},
-            "c": {"active": True, "name": "김태군"},
-            "1b": {"active": True, "name": "김석환"},
-            "2b": {"active": True, "name": "김선빈"},
-            "3b": {"active": True, "name": "김도영"},
-            "ss": {"active": True, "name": "박찬호"},
-            "lf": {"active": True, "name": "김호령"},
-            "cf": {"active": True, "name": "최형우"},
-            "rf": {"active": True, "name": "소크라테스"},
-        },
-    },
-    {
-        "delay": 3,
-        "description": "경기 시작 삼성 공격 기아 수비",
-        "event_type": "start",
-    },
-    {
-        "delay": 3,
-        "description": "김지찬 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "김지찬", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-    },
-    {
-        "delay": 0,
-        "description": "김지찬 응원가",
-        "event_type": "chant",
-        "macro": "김지찬 응원가",
-        "batter": {"name": "김지찬", "active": True},
-    },
-    {
-        "delay": 10,
-        "description": "응원 종료 후 잠시 휴식",
-        "event_type": "info",
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 0, "outs": 0},
-        "batter": {"name": "김지찬", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 1, "strikes": 1, "outs": 0},
-        "batter": {"name": "김지찬", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 2, "strikes": 1, "outs": 0},
-        "batter": {"name": "김지찬", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 2, "strikes": 2, "outs": 0},
-        "batter": {"name": "김지찬", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "김지찬, 삼진 아웃",
-        "event_type": "strikeout",
-        "count": {"balls": 2, "strikes": 2, "outs": 1},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "", "second": "", "third": ""},
-    },
-    {
-        "delay": 0,
-        "description": "삐끼삐끼 동작",
-        "event_type": "info",
-        "macro": "아웃(삐끼삐끼)",
-    },
-    {
-        "delay": 3,
-        "description": "구자욱 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "구자욱", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 1},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 0, "strikes": 1, "outs": 1},
-        "batter": {"name": "구자욱", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 1, "outs": 1},
-        "batter": {"name": "구자욱", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "구자욱, 우중간 안타로 1루에 출루",
-        "event_type": "single",
-        "count": {"balls": 1, "strikes": 1, "outs": 1},
-        "bases": {"first": True, "second": False, "third": False},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "구자욱", "second": "", "third": ""},
-        "hits_delta": {"away": 1},
-    },
-    {
-        "delay": 3,
-        "description": "오재일 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "오재일", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 1},
-        "bases": {"first": True, "second": False, "third": False},
-        "runners": {"first": "구자욱", "second": "", "third": ""},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 0, "outs": 1},
-        "batter": {"name": "오재일", "active": True},
-        "bases": {"first": True, "second": False, "third": False},
-        "runners": {"first": "구자욱", "second": "", "third": ""},
-    },
-    {
-        "delay": 2,
-        "description": "오재일, 플라이 아웃",
-        "event_type": "out",
-        "count": {"balls": 1, "strikes": 0, "outs": 2},
-        "bases": {"first": True, "second": False, "third": False},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "구자욱", "second": "", "third": ""},
-    },
-    {
-        "delay": 3,
-        "description": "이닝 종료",
-        "event_type": "change",
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-        "bases": {"first": False, "second": False, "third": False},
-    },
-    {
-        "delay": 3,
-        "description": "공수 교대 기아 공격 삼성 수비",
-        "event_type": "change",
-        "half": "B",
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-        "bases": {"first": False, "second": False, "third": False},
-        "fielders": {
-            "p": {"active": True, "name": "원태인"},
-            "c": {"active": True, "name": "강민호"},
-            "1b": {"active": True, "name": "오재일"},
-            "2b": {"active": True, "name": "김지찬"},
-            "3b": {"active": True, "name": "이원석"},
-            "ss": {"active": True, "name": "이재현"},
-            "lf": {"active": True, "name": "김헌곤"},
-            "cf": {"active": True, "name": "구자욱"},
-            "rf": {"active": True, "name": "박해민"},
-        },
-    },
-    {
-        "delay": 0,
-        "description": "기본 자세 복귀",
-        "event_type": "info",
-        "macro": "차렷자세",
-    },
-    {
-        "delay": 3,
-        "description": "김도영 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "김도영", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-    },
-    {
-        "delay": 0,
-        "description": "김도영 응원가",
-        "event_type": "chant",
-        "macro": "김도영 응원가가",
-        "batter": {"name": "김도영", "active": True},
-    },
-    {
-        "delay": 10,
-        "description": "응원 종료",
-        "event_type": "info",
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 0, "strikes": 1, "outs": 0},
-        "batter": {"name": "김도영", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 1, "outs": 0},
-        "batter": {"name": "김도영", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 2, "strikes": 1, "outs": 0},
-        "batter": {"name": "김도영", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 2, "strikes": 2, "outs": 0},
-        "batter": {"name": "김도영", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "김도영 좌중월 솔로 홈런!",
-        "event_type": "hr",
-        "score_delta": {"home": 1},
-        "hits_delta": {"home": 1},
-        "bases": {"first": False, "second": False, "third": False},
-        "count": {"balls": 2, "strikes": 2, "outs": 0},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "", "second": "", "third": ""},
-    },
-    {
-        "delay": 0,
-        "description": "홈런 동작",
-        "event_type": "info",
-        "macro": "홈런",
-    },
-    {
-        "delay": 5,
-        "description": "홈런 연출 유지",
-        "event_type": "info",
-    },
-    {
-        "delay": 2,
-        "description": "최형우 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "최형우", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 0, "outs": 0},
-        "batter": {"name": "최형우", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 1, "strikes": 1, "outs": 0},
-        "batter": {"name": "최형우", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "스트라이크",
-        "event_type": "strike",
-        "count": {"balls": 1, "strikes": 2, "outs": 0},
-        "batter": {"name": "최형우", "active": True},
-    },
-    {
-        "delay": 2,
-        "description": "최형우, 중전 안타로 1루에 출루",
-        "event_type": "single",
-        "count": {"balls": 1, "strikes": 2, "outs": 0},
-        "bases": {"first": True, "second": False, "third": False},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "최형우", "second": "", "third": ""},
-        "hits_delta": {"home": 1},
-    },
-    {
-        "delay": 3,
-        "description": "박찬호 타석 입장",
-        "event_type": "live",
-        "batter": {"name": "박찬호", "active": True},
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-        "bases": {"first": True, "second": False, "third": False},
-        "runners": {"first": "최형우", "second": "", "third": ""},
-    },
-    {
-        "delay": 2,
-        "description": "볼",
-        "event_type": "ball",
-        "count": {"balls": 1, "strikes": 0, "outs": 0},
-        "batter": {"name": "박찬호", "active": True},
-        "bases": {"first": True, "second": False, "third": False},
-        "runners": {"first": "최형우", "second": "", "third": ""},
-    },
-    {
-        "delay": 2,
-        "description": "박찬호, 번트로 아웃, 주자는 2루로 진루",
-        "event_type": "out",
-        "count": {"balls": 1, "strikes": 0, "outs": 1},
-        "bases": {"first": False, "second": True, "third": False},
-        "batter": {"name": "", "active": False},
-        "runners": {"first": "", "second": "최형우", "third": ""},
-    },
-    {
-        "delay": 3,
-        "description": "이닝 종료",
-        "event_type": "change",
-        "count": {"balls": 0, "strikes": 0, "outs": 0},
-        "bases": {"first": False, "second": False, "third": False},
-    },
-    {
-        "delay": 0,
-        "description": "기아 우승! 열광하라",
-        "event_type": "info",
-        "macro": "최강기아",
-    },
-    {
-        "delay": 10,
-        "description": "열광 연출 유지",
-        "event_type": "info",
-    },
-    {
-        "delay": 0,
-        "description": "경기 종료 – KIA 승리",
-        "event_type": "end",
-        "set_scores": {"home": 1, "away": 0},
-        "half": "F",
-        "popup_description": "🏆 KIA 타이거즈 우승 🏆",
-    },
-    {
-        "delay": 0,
-        "description": "기본 자세 복귀",
-        "event_type": "info",
-        "macro": "차렷자세",
-    },
-]
-
-
-class DemoScenarioRunner:
-    def __init__(self) -> None:
-        self._thread: Optional[threading.Thread] = None
-        self._running = False
-        self._stop_event = threading.Event()
-        self.current_step: Optional[str] = None
+def _trigger_demo_macro(macro_name: str) -> None:
+    file_key, macro_key = DEMO_MACRO_MAP.get(macro_name, (None, None))
+    if not (file_key and macro_key):
+        # 매핑이 없으면 매크로 이름으로 실행 (scripted_game 스크립트 등)
+        if not run_macro_by_name_async(macro_name):
+            print(f"⚠️ 데모 매크로 '{macro_name}' 실행 실패")
+            print(f"  → DEMO_MACRO_MAP 또는 매크로 파일에 '{macro_name}' 키가 없습니다")
+        return
+    try:
+        success = trigger_macro(file_key, macro_key)
+        if not success:
+            print(f"⚠️ 데모 매크로 '{file_key}:{macro_key}' 실행 실패")
+            print(f"  → 매크로 파일 '{file_key}' 또는 매크로 이름 '{macro_key}' 확인 필요")
+    except Exception as e:
+        print(f"✗ 데모 매크로 '{file_key}:{macro_key}' 실행 중 예외 발생: {type(e).__name__}: {e}")
+
+
+def _scenario_base_state() -> Dict[str, Any]:
+    state = _initial_game_state()
+    del state["event_seq"]  # 게시할 때 붙임
+    return state
+
+
+# 데모 버튼으로 재생할 시나리오 (scenarios/<id>.json 또는 scripted_game 스크립트)
+DEFAULT_SCENARIO_ID = SCRIPT_ID if GAME_MODE == "script" else "demo"
+
+scenario_library = ScenarioLibrary(_scenario_base_state)
+
+
+DEFAULT_ROOM = "default"
+_ROOM_ID_RE = re.compile(r"[0-9A-Za-z_-]{1,64}")
+
+
+class GameRoom:
+    """
+    경기 하나(방 하나)의 상태, 잠금, 버전, 데모 재생기, 저널입니다.
+    상태를 바꾸는 쪽끼리만 방의 lock으로 직렬화합니다. 읽는 쪽은 불변 스냅샷 참조를 읽으므로 잠그지 않습니다.
+    """
+
+    def __init__(self, room_id: str) -> None:
+        self.id = room_id
+        default = room_id == DEFAULT_ROOM
+        # 기존 단일 경기와 같은 저널 파일/이벤트 소스를 default 방이 이어받음
+        self.journal_stream = "game" if default else f"game-{room_id}"
+        self.event_source = "game" if default else f"game:{room_id}"
+        # 로봇은 하나이므로 GAME_ROOM_MACRO_ROOMS에 있는 방만 매크로를 실행
+        self.macros_enabled = "*" in GAME_ROOM_MACRO_ROOMS or room_id in GAME_ROOM_MACRO_ROOMS
+
+        self.lock = threading.Lock()
+        # 상태가 바뀔 때마다 증가하는 버전과 변경 알림 (lock을 공유하므로 lock을 잡은 상태에서 notify)
+        self.version = 0
+        self.changed = threading.Condition(self.lock)
+        # 열려 있는 SSE 연결 수와 마지막 요청 시각 (유휴 방 정리용)
+        self.streams = 0
+        self.last_access = time.monotonic()
+
+        # 마지막으로 게시한 시나리오 이벤트 (시나리오 id, event_mark). 바뀌면 새 event_seq를 붙입니다.
+        self.scenario_event_key: Optional[Tuple[str, int]] = None
+        # 마지막으로 직렬화한 (응답 스냅샷, JSON 바이트). 스냅샷이 같으면 그대로 재사용합니다.
+        self._serialized: Optional[Tuple[FrozenDict, bytes]] = None
+
+        # 현재 경기 상태 (불변 스냅샷). 바꿀 때는 mutate()/replace()로 새 스냅샷을 만들어 교체합니다.
+        recovered = self._recovered_state()
+        # 이벤트 시퀀스 번호: last_event가 바뀔 때마다 증가하며, 리셋하거나 방을 다시 열어도 되돌아가지 않습니다
+        last_seq = int(recovered.get("event_seq") or 0) if recovered is not None else 0
+        self._event_seq = itertools.count(max(last_seq, event_dispatcher.last_seen(self.event_source)) + 1)
+        self.state: FrozenDict = recovered or freeze(_initial_game_state(self.next_event_seq()))
+        append_journal(self.journal_stream, self.state, "start")
+
+        self.runner = ScenarioPlayer(self._publish_scenario_state, self._trigger_macro)
+        # 응답으로 내보내는 스냅샷: state + 데모 진행 상태 + 버전 (하위 구조는 state와 공유)
+        self.view: FrozenDict = self._build_view()
 
     @property
-    def is_running(self) -> bool:
-        return self._running
-
-    def start(self) -> bool:
-        if self._running:
-            return False
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        self._running = True
-        return True
-
-    def stop(self) -> None:
-        if not self._running:
+    def journal(self) -> Optional[GameJournal]:
+        """상태가 바뀔 때마다 기록하는 저널 (GAME_JOURNAL_DIR가 비어 있으면 None). 캐시에서 밀려나면 다시 엶"""
+        return get_journal(self.journal_stream)
+
+    def next_event_seq(self) -> int:
+        return next(self._event_seq)
+
+    def _recovered_state(self) -> Optional[FrozenDict]:
+        """저널의 마지막 상태. 복구한 이벤트는 다시 트리거하지 않습니다."""
+        journal = self.journal
+        if journal is None or not GAME_JOURNAL_RECOVER:
+            return None
+        state = journal.latest()
+        if state is None:
+            return None
+        event_dispatcher.mark_seen(self.event_source, int(state.get("event_seq") or 0))
+        return state
+
+    def _build_view(self) -> FrozenDict:
+        journal = self.journal
+        return FrozenDict({
+            **self.state,
+            "demo_active": self.runner.is_running,
+            "demo_step": self.runner.current_step,
+            "version": self.version,
+            "journal_seq": journal.seq if journal is not None else None,
+            "room": self.id,
+        })
+
+    # ----- 상태 변경 -----
+
+    def _mark_changed_locked(self) -> None:
+        """state(또는 데모 진행 상태)가 바뀐 뒤 lock을 잡은 상태에서 호출합니다."""
+        self.version += 1
+        self.view = self._build_view()
+        self.changed.notify_all()
+
+    def _set_state_locked(self, state: FrozenDict, cause: str) -> None:
+        """새 스냅샷을 게시하고 저널에 기록합니다 (lock을 잡은 상태에서 호출)."""
+        if state is not self.state:
+            self.state = state
+            try:
+                append_journal(self.journal_stream, state, cause)
+            except OSError as e:
+                print(f"✗ 경기 저널 기록 실패 ({self.id}): {e}")
+        self._mark_changed_locked()
+
+    @contextmanager
+    def mutate(self, cause: str) -> Iterator[Dict[str, Any]]:
+        """
+        state의 가변 사본을 넘겨주고, 블록이 끝나면 새 스냅샷으로 교체합니다.
+        바뀌지 않은 하위 구조는 이전 스냅샷과 공유하며, 블록에서 예외가 나면 교체하지 않습니다.
+        """
+        with self.lock:
+            draft = thaw(self.state)
+            yield draft
+            self._set_state_locked(freeze(draft, self.state), cause)
+
+    def replace(self, new_state: Dict[str, Any], cause: str) -> None:
+        with self.lock:
+            self._set_state_locked(freeze(new_state, self.state), cause)
+
+    def _publish_scenario_state(self, state: Optional[FrozenDict], event_mark: int) -> None:
+        with self.lock:
+            if state is not None:
+                scenario = self.runner.scenario
+                key = (scenario.id if scenario else "", event_mark)
+                seq = self.state.get("event_seq")
+                if key != self.scenario_event_key:
+                    seq = self.next_event_seq()
+                    self.scenario_event_key = key
+                # 시나리오 상태를 그대로 공유하고 event_seq만 덧붙임
+                self._set_state_locked(freeze({**state, "event_seq": seq}, self.state), "scenario")
+            else:
+                self._mark_changed_locked()
+
+    def _trigger_macro(self, macro_name: str) -> None:
+        if self.macros_enabled:
+            _trigger_demo_macro(macro_name)
+
+    def dispatch_event(self, view: FrozenDict) -> None:
+        """
+        비동기 매크로 트리거 (스냅샷은 불변이므로 복사 없이 그대로 읽음)
+        같은 이벤트를 여러 클라이언트가 반복 폴링해도 이벤트마다 한 번만 실행
+        """
+        if not self.macros_enabled:
             return
-        self._stop_event.set()
-        if self._thread:
-            self._thread.join(timeout=1)
-
-    def _run(self) -> None:
-        global game_state
+        trigger_text = last_event_to_trigger_text(view.get("last_event"))
+        if trigger_text:
+            event_dispatcher.dispatch(self.event_source, view["event_seq"], trigger_text)
+
+    # ----- 조회 -----
+
+    def serialized(self) -> Tuple[FrozenDict, bytes]:
+        """현재 응답 스냅샷과 그 JSON 바이트. 스냅샷마다 한 번만 직렬화합니다 (잠금 불필요)."""
+        view = self.view
+        cached = self._serialized
+        if cached is None or cached[0] is not view:
+            # 동시에 여러 요청이 같은 스냅샷을 직렬화할 수 있지만 결과가 같으므로 무해
+            cached = (view, json.dumps(view, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            self._serialized = cached
+        return cached
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "room": self.id,
+            "version": self.version,
+            "event_seq": self.state.get("event_seq"),
+            "demo_active": self.runner.is_running,
+            "streams": self.streams,
+            "idle_sec": round(time.monotonic() - self.last_access, 1),
+            "macros": self.macros_enabled,
+        }
+
+    # ----- 정리 -----
+
+    def is_idle(self, now: float) -> bool:
+        return (
+            self.id != DEFAULT_ROOM
+            and self.streams == 0
+            and not self.runner.is_running
+            and now - self.last_access >= GAME_ROOM_IDLE_SEC
+        )
+
+    def close(self) -> None:
+        """재생을 멈추고 저널 파일을 지웁니다 (정리한 방을 다시 열면 새 경기로 시작)."""
+        self.runner.stop()
+        release_journal(self.journal_stream, delete=True)
+
+
+# 방 id → 방. 방 목록만 이 잠금으로 보호하고, 상태 변경은 방마다의 lock을 씁니다.
+_rooms: Dict[str, GameRoom] = {}
+_rooms_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+
+
+def _evict_idle_rooms_locked(now: float) -> None:
+    for room_id in [room_id for room_id, room in _rooms.items() if room.is_idle(now)]:
+        room = _rooms.pop(room_id)
+        room.close()
+        print(f"✓ 유휴 경기 방 정리: {room_id}")
+
+
+def get_room(room_id: Optional[str] = None) -> GameRoom:
+    """
+    방을 찾고, 없으면 만듭니다 (GAME_JOURNAL_RECOVER이면 저널의 마지막 상태로 복구).
+    ValueError: 방 id 형식이 잘못됨 / LookupError: 방이 GAME_ROOM_MAX개로 가득 참
+    """
+    room_id = (room_id or "").strip() or DEFAULT_ROOM
+    if not _ROOM_ID_RE.fullmatch(room_id):
+        raise ValueError("room must be 1-64 characters of letters, digits, '_' or '-'")
+    if GAME_ROOMS and room_id != DEFAULT_ROOM and room_id not in GAME_ROOMS:
+        raise ValueError(f"unknown room: {room_id}")
+    # 찾기와 last_access 갱신을 정리 스레드와 같은 잠금 안에서 해야, 찾은 방이 그 사이에 정리되지 않음
+    with _rooms_lock:
+        now = time.monotonic()
+        room = _rooms.get(room_id)
+        if room is None:
+            _evict_idle_rooms_locked(now)
+            if len(_rooms) >= GAME_ROOM_MAX:
+                raise LookupError("too_many_rooms")
+            room = _rooms[room_id] = GameRoom(room_id)
+            _start_sweeper_locked()
+        room.last_access = now
+        return room
+
+
+def sweep_idle_rooms() -> None:
+    with _rooms_lock:
+        _evict_idle_rooms_locked(time.monotonic())
+
+
+def _sweep_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
         try:
-            with lock:
-                game_state = _initial_game_state()
-                game_state["teams"]["home"]["name"] = "기아"
-                game_state["teams"]["away"]["name"] = "삼성"
-            for step in DEMO_SCENARIO_STEPS:
-                if self._stop_event.is_set():
-                    break
-                self.current_step = step.get("description")
-                delay = float(step.get("delay", 0))
-                if delay > 0:
-                    waited = 0.0
-                    while waited < delay and not self._stop_event.is_set():
-                        chunk = min(0.5, delay - waited)
-                        time.sleep(chunk)
-                        waited += chunk
-                if self._stop_event.is_set():
-                    break
-                self._apply_step(step)
-            self.current_step = None
-        finally:
-            self._running = False
-            self._stop_event.clear()
-
-    def _apply_step(self, step: Dict[str, Any]) -> None:
-        global game_state
-        with lock:
-            state = game_state
-            teams = state["teams"]
-
-            team_names = step.get("set_teams")
-            if team_names:
-                if "home" in team_names:
-                    teams["home"]["name"] = team_names["home"]
-                if "away" in team_names:
-                    teams["away"]["name"] = team_names["away"]
-
-            if "set_scores" in step:
-                for side, value in step["set_scores"].items():
-                    if side in teams:
-                        teams[side]["runs"] = max(0, int(value))
-
-            if "set_hits" in step:
-                for side, value in step["set_hits"].items():
-                    if side in teams:
-                        teams[side]["hits"] = max(0, int(value))
-
-            if "set_errors" in step:
-                for side, value in step["set_errors"].items():
-                    if side in teams:
-                        teams[side]["errors"] = max(0, int(value))
-
-            if "score_delta" in step:
-                for side, delta in step["score_delta"].items():
-                    if side in teams:
-                        teams[side]["runs"] = max(0, teams[side]["runs"] + int(delta))
-
-            if "hits_delta" in step:
-                for side, delta in step["hits_delta"].items():
-                    if side in teams:
-                        teams[side]["hits"] = max(0, teams[side]["hits"] + int(delta))
-
-            if "errors_delta" in step:
-                for side, delta in step["errors_delta"].items():
-                    if side in teams:
-                        teams[side]["errors"] = max(0, teams[side]["errors"] + int(delta))
-
-            if "inning" in step:
-                state["inning"] = int(step["inning"])
-
-            if "half" in step:
-                state["half"] = step["half"]
-
-            if "count" in step:
-                state["count"].update(step["count"])
-
-            if "bases" in step:
-                state["bases"].update(step["bases"])
-                # runners 정보도 함께 업데이트 (선택적)
-                if "runners" in step:
-                    if "runners" not in state:
-                        state["runners"] = {"first": "", "second": "", "third": ""}
-                    state["runners"].update(step["runners"])
-
-            if "batter" in step:
-                if "batter" not in state:
-                    state["batter"] = {"name": "", "active": False}
-                state["batter"].update(step["batter"])
-
-            if "fielders" in step:
-                state["fielders"].update(step["fielders"])
-
-            # 경기 관련 이벤트만 last_event 업데이트 (UI에 표시)
-            # 응원가(chant), 휴식(info), 삐끼삐끼(info), 기본 자세 복귀(info), 홈런 동작(info) 등은 내부 처리만 하고 UI에 표시 안 함
-            event_type = step.get("event_type", "live")
-            GAME_RELATED_EVENTS = {"start", "live", "strikeout", "hr", "single", "double", "triple", "out", "sac_fly", "walk", "error", "change", "end", "ball", "strike"}
-            
-            if event_type in GAME_RELATED_EVENTS:
-                # popup_description이 명시적으로 있으면 사용, 없으면 None
-                popup_desc = step.get("popup_description")
-                state["last_event"] = {
-                    "type": event_type,
-                    "description": step.get("description", ""),
-                    "popup_description": popup_desc if popup_desc is not None else None,
-                }
-            # 응원가, 휴식 등은 last_event를 업데이트하지 않음 (이전 경기 이벤트 유지)
-
-        macro_name = step.get("macro")
-        if macro_name:
-            file_key, macro_key = DEMO_MACRO_MAP.get(macro_name, (None, None))
-            if file_key and macro_key:
-                try:
-                    success = trigger_macro(file_key, macro_key)
-                    if not success:
-                        print(f"⚠️ 데모 매크로 '{file_key}:{macro_key}' 실행 실패")
-                        print(f"  → 매크로 파일 '{file_key}' 또는 매크로 이름 '{macro_key}' 확인 필요")
-                except Exception as e:
-                    print(f"✗ 데모 매크로 '{file_key}:{macro_key}' 실행 중 예외 발생: {type(e).__name__}: {e}")
-            else:
-                print(f"⚠️ 데모 매크로 매핑 없음: '{macro_name}'")
-                print(f"  → DEMO_MACRO_MAP에 '{macro_name}' 키가 없습니다")
+            sweep_idle_rooms()
+        except Exception as e:
+            print(f"✗ 유휴 경기 방 정리 실패: {e}")
+
 
+def _start_sweeper_locked() -> None:
+    """처음 방을 만들 때 유휴 방을 주기적으로 정리하는 스레드를 시작합니다."""
+    global _sweeper
+    if _sweeper is not None:
+        return
+    interval = max(1.0, min(60.0, GAME_ROOM_IDLE_SEC / 2))
+    _sweeper = threading.Thread(target=_sweep_loop, args=(interval,), name="game-room-sweeper", daemon=True)
+    _sweeper.start()
+
+
+# 랜덤 진행 이벤트와 가중치 (game_sim.py 몬테카를로 시뮬레이션도 같은 값을 사용)
+RANDOM_EVENTS = ["pitch", "ball", "strike", "out", "single", "double", "triple", "hr", "walk", "error"]
+RANDOM_EVENT_WEIGHTS = [20, 10, 10, 8, 12, 7, 3, 4, 10, 6]
+
+# 랜덤 진행이 남기는 last_event 종류 → 설명
+RANDOM_EVENT_DESCRIPTIONS = {
+    "change": "이닝 전환",
+    "pitch": "투구",
+    "ball": "볼",
+    "walk": "볼넷",
+    "strike": "스트라이크",
+    "strikeout": "삼진 아웃",
+    "out": "타구 아웃",
+    "single": "안타(1루타)",
+    "double": "2루타",
+    "triple": "3루타",
+    "hr": "홈런",
+    "error": "수비 실책으로 진루",
+}
 
-demo_runner = DemoScenarioRunner()
+
+def _random_last_event(event_type: str) -> Dict[str, Any]:
+    return {"type": event_type, "description": RANDOM_EVENT_DESCRIPTIONS[event_type]}
 
 
 def _advance_random_event(state: Dict[str, Any]) -> None:
@@ -575,14 +378,10 @@ def _advance_random_event(state: Dict[str, Any]) -> None:
         else:
             state["half"] = "T"
             state["inning"] += 1
-        state["last_event"] = {"type": "change", "description": "이닝 전환"}
+        state["last_event"] = _random_last_event("change")
         return
 
-    event = random.choices(
-        population=["pitch", "ball", "strike", "out", "single", "double", "triple", "hr", "walk", "error"],
-        weights=[20, 10, 10, 8, 12, 7, 3, 4, 10, 6],
-        k=1,
-    )[0]
+    event = random.choices(population=RANDOM_EVENTS, weights=RANDOM_EVENT_WEIGHTS, k=1)[0]
 
     batting = "away" if state["half"] == "T" else "home"
 
@@ -591,66 +390,66 @@ def _advance_random_event(state: Dict[str, Any]) -> None:
         state["count"]["strikes"] = 0
 
     if event == "pitch":
-        state["last_event"] = {"type": "pitch", "description": "투구"}
+        state["last_event"] = _random_last_event("pitch")
         return
 
     if event == "ball":
         state["count"]["balls"] = min(3, state["count"]["balls"] + 1)
-        state["last_event"] = {"type": "ball", "description": "볼"}
+        state["last_event"] = _random_last_event("ball")
         if state["count"]["balls"] >= 4:
             clear_count()
-            state["last_event"] = {"type": "walk", "description": "볼넷"}
+            state["last_event"] = _random_last_event("walk")
             _advance_runners(state, bases_to_advance=1, batting=batting)
         return
 
     if event == "strike":
         state["count"]["strikes"] = min(2, state["count"]["strikes"] + 1)
-        state["last_event"] = {"type": "strike", "description": "스트라이크"}
+        state["last_event"] = _random_last_event("strike")
         if state["count"]["strikes"] >= 3:
             clear_count()
             state["count"]["outs"] += 1
-            state["last_event"] = {"type": "strikeout", "description": "삼진 아웃"}
+            state["last_event"] = _random_last_event("strikeout")
         return
 
     if event == "out":
         clear_count()
         state["count"]["outs"] += 1
-        state["last_event"] = {"type": "out", "description": "타구 아웃"}
+        state["last_event"] = _random_last_event("out")
         return
 
     if event == "single":
         clear_count()
         state["teams"][batting]["hits"] += 1
         _advance_runners(state, 1, batting)
-        state["last_event"] = {"type": "single", "description": "안타(1루타)"}
+        state["last_event"] = _random_last_event("single")
         return
 
     if event == "double":
         clear_count()
         state["teams"][batting]["hits"] += 1
         _advance_runners(state, 2, batting)
-        state["last_event"] = {"type": "double", "description": "2루타"}
+        state["last_event"] = _random_last_event("double")
         return
 
     if event == "triple":
         clear_count()
         state["teams"][batting]["hits"] += 1
         _advance_runners(state, 3, batting)
-        state["last_event"] = {"type": "triple", "description": "3루타"}
+        state["last_event"] = _random_last_event("triple")
         return
 
     if event == "hr":
         clear_count()
         state["teams"][batting]["hits"] += 1
         _advance_runners(state, 4, batting)
-        state["last_event"] = {"type": "hr", "description": "홈런"}
+        state["last_event"] = _random_last_event("hr")
         return
 
     if event == "error":
         clear_count()
         state["teams"]["home" if batting == "away" else "away"]["errors"] += 1
         _advance_runners(state, random.choice([1, 2]), batting)
-        state["last_event"] = {"type": "error", "description": "수비 실책으로 진루"}
+        state["last_event"] = _random_last_event("error")
         return
 
 
@@ -690,52 +489,229 @@ def index():
     return render_template("game.html")
 
 
+def _request_room() -> Tuple[Optional[GameRoom], Optional[Tuple[Response, int]]]:
+    """?room= (없으면 default)의 방, 또는 오류 응답"""
+    try:
+        return get_room(request.args.get("room")), None
+    except ValueError as e:
+        return None, (jsonify({"ok": False, "error": str(e)}), 400)
+    except LookupError as e:
+        return None, (jsonify({"ok": False, "error": str(e), "max": GAME_ROOM_MAX}), 503)
+
+
 @game_bp.route("/api/game-state")
 def api_game_state():
-    global game_state
-    should_advance = request.args.get("advance", "0") == "1"
-    demo_active = demo_runner.is_running
-    with lock:
-        if should_advance and not demo_active:
-            _advance_random_event(game_state)
-        # 응답 복제
-        response = dict(game_state)
-        response["teams"] = {k: dict(v) for k, v in game_state["teams"].items()}
-        response["count"] = dict(game_state["count"])
-        response["bases"] = dict(game_state["bases"])
-        response["runners"] = dict(game_state.get("runners", {"first": "", "second": "", "third": ""}))
-        response["batter"] = dict(game_state.get("batter", {"name": "", "active": False}))
-        response["fielders"] = {k: dict(v) for k, v in game_state.get("fielders", {}).items()}
-        response["last_event"] = dict(game_state["last_event"]) if game_state.get("last_event") else None
-    response["demo_active"] = demo_active
-    response["demo_step"] = demo_runner.current_step
-
-    # 락 밖에서 비동기 매크로 트리거 (락 홀드 시간 최소화)
-    trigger_text = last_event_to_trigger_text(response.get("last_event"))
-    if trigger_text and not demo_active:
-        run_macro_by_event_text_async(trigger_text)
-
-    return jsonify(response)
+    """
+    현재 경기 상태. ETag(상태 버전)를 붙이며, If-None-Match가 같으면 본문 없이 304를 돌려줍니다.
+    같은 버전의 응답은 한 번 직렬화한 바이트를 모든 클라이언트가 공유합니다.
+    ?room=<방 id>: 경기 방 (기본 default)
+    ?at=<journal_seq>: 저널에 기록된 과거 시점의 상태
+    """
+    room, error = _request_room()
+    if error is not None:
+        return error
+    if request.args.get("at") is not None:
+        payload, status = journal_lookup(room.journal, request.args["at"])
+        return jsonify(payload), status
+
+    # script 모드에서는 시나리오만 상태를 바꿈
+    should_advance = request.args.get("advance", "0") == "1" and GAME_MODE != "script"
+    demo_active = room.runner.is_running
+    if should_advance and not demo_active:
+        with room.mutate("random") as state:
+            previous_event = state["last_event"]
+            _advance_random_event(state)
+            # 아무 일도 없었던 진행(walk 뽑기 등)은 이전 이벤트를 다시 트리거하지 않도록 번호를 그대로 둠
+            # (같은 종류가 연달아 나와도 새 dict가 들어오므로 동일성으로 비교)
+            if state["last_event"] is not previous_event:
+                state["event_seq"] = room.next_event_seq()
+    response, body = room.serialized()
+    if not demo_active:
+        room.dispatch_event(response)
+
+    etag = f"{_ETAG_PREFIX}-{room.id}-{response['version']}"
+    if etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    # 캐시는 하되 매번 서버에 확인하도록 (브라우저가 If-None-Match를 보냄)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@game_bp.route("/api/game-state/stream")
+def api_game_state_stream():
+    """
+    Server-Sent Events: 방의 상태가 바뀔 때마다 새 스냅샷을 'state' 이벤트로 보냅니다 (id = 상태 버전).
+    연결 직후 현재 상태를 한 번 보내며, 재연결 시 Last-Event-ID가 현재 버전과 같으면 생략합니다.
+    변경이 없는 동안에는 STREAM_KEEPALIVE_SEC마다 주석 한 줄만 보냅니다.
+    """
+    room, error = _request_room()
+    if error is not None:
+        return error
+    try:
+        last_sent = int(request.headers.get("Last-Event-ID", "-1"))
+    except ValueError:
+        last_sent = -1
+
+    def generate():
+        nonlocal last_sent
+        # 연결이 열려 있는 동안은 방을 정리하지 않음
+        with room.lock:
+            room.streams += 1
+        try:
+            while True:
+                with room.changed:
+                    room.changed.wait_for(lambda: room.version != last_sent, timeout=STREAM_KEEPALIVE_SEC)
+                view, body = room.serialized()
+                if view["version"] == last_sent:
+                    yield ": keepalive\n\n"
+                    continue
+                last_sent = view["version"]
+                yield f"id: {last_sent}\nevent: state\ndata: ".encode("utf-8") + body + b"\n\n"
+        finally:
+            # streams가 0이 되기 전에 last_access부터 갱신 (정리 스레드가 방금 닫힌 방을 유휴로 보지 않도록)
+            with room.lock:
+                room.last_access = time.monotonic()
+                room.streams -= 1
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @game_bp.route("/api/reset", methods=["POST"])
 def api_reset():
-    global game_state
-    with lock:
-        game_state = _initial_game_state()
-    return jsonify({"ok": True})
+    room, error = _request_room()
+    if error is not None:
+        return error
+    room.replace(_initial_game_state(room.next_event_seq()), "reset")
+    return jsonify({"ok": True, "room": room.id})
+
+
+@game_bp.route("/api/rooms")
+def api_rooms():
+    """열려 있는 경기 방 목록 (조회하면서 유휴 방을 정리)"""
+    sweep_idle_rooms()
+    rooms = sorted(_rooms.values(), key=lambda room: room.id)
+    return jsonify({
+        "ok": True,
+        "rooms": [room.summary() for room in rooms],
+        "idle_sec": GAME_ROOM_IDLE_SEC,
+        "max": GAME_ROOM_MAX,
+    })
+
+
+def _float_arg(payload: Dict[str, Any], key: str) -> Optional[float]:
+    value = payload.get(key)
+    if value is None or value == "":
+        return None
+    return float(value)
 
 
 @game_bp.route("/api/demo/start", methods=["POST"])
 def api_demo_start():
-    if demo_runner.start():
-        return jsonify({"ok": True})
+    """
+    ?room=의 방에서 데모 시나리오 재생 시작.
+    body(선택): {"scenario": id, "at": 시작 위치(초), "step": 설명에 들어간 텍스트로 시작 위치 지정, "speed": 배속}
+    """
+    room, error = _request_room()
+    if error is not None:
+        return error
+    payload = request.get_json(silent=True) or {}
+    scenario_id = str(payload.get("scenario") or DEFAULT_SCENARIO_ID)
+    try:
+        scenario = scenario_library.get(scenario_id)
+        at = _float_arg(payload, "at") or 0.0
+        speed = _float_arg(payload, "speed") or 1.0
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if scenario is None:
+        return jsonify({"ok": False, "error": "unknown_scenario", "scenario": scenario_id}), 404
+    if payload.get("step"):
+        found = scenario.find(str(payload["step"]))
+        if found is None:
+            return jsonify({"ok": False, "error": "unknown_step"}), 404
+        at = found
+    if room.runner.is_running:
+        return jsonify({"ok": False, "error": "demo_running"}), 409
+    with room.lock:
+        room.scenario_event_key = None
+    try:
+        started = room.runner.start(scenario, at=at, speed=speed)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if started:
+        return jsonify({"ok": True, "room": room.id, "scenario": scenario.id, "duration": scenario.duration})
     return jsonify({"ok": False, "error": "demo_running"}), 409
 
 
+@game_bp.route("/api/demo/<action>", methods=["POST"])
+def api_demo_control(action: str):
+    """
+    ?room=의 방에서 재생 중인 데모 제어: stop | pause | resume | seek {"at": 초 또는 "step": 텍스트} | speed {"speed": 배속}
+    """
+    room, error = _request_room()
+    if error is not None:
+        return error
+    runner = room.runner
+    payload = request.get_json(silent=True) or {}
+    try:
+        if action == "stop":
+            runner.stop()
+            return jsonify({"ok": True})
+        if action == "pause":
+            ok = runner.pause()
+        elif action == "resume":
+            ok = runner.resume()
+        elif action == "seek":
+            at = _float_arg(payload, "at")
+            scenario = runner.scenario
+            if payload.get("step") and scenario is not None:
+                at = scenario.find(str(payload["step"]))
+                if at is None:
+                    return jsonify({"ok": False, "error": "unknown_step"}), 404
+            if at is None:
+                return jsonify({"ok": False, "error": "at or step required"}), 400
+            ok = runner.seek(at)
+        elif action == "speed":
+            speed = _float_arg(payload, "speed")
+            if speed is None:
+                return jsonify({"ok": False, "error": "speed required"}), 400
+            ok = runner.set_speed(speed)
+        else:
+            return jsonify({"ok": False, "error": "unknown_action"}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    if not ok:
+        return jsonify({"ok": False, "error": "demo_not_running"}), 409
+    return jsonify({"ok": True, **runner.status()})
+
+
 @game_bp.route("/api/demo/status")
 def api_demo_status():
-    return jsonify({"ok": True, "running": demo_runner.is_running, "step": demo_runner.current_step})
+    room, error = _request_room()
+    if error is not None:
+        return error
+    return jsonify({"ok": True, "room": room.id, **room.runner.status()})
+
+
+@game_bp.route("/api/demo/scenarios")
+def api_demo_scenarios():
+    """시나리오 목록, 또는 ?id=로 지정한 시나리오의 스텝 시각표"""
+    scenario_id = request.args.get("id")
+    if scenario_id:
+        try:
+            scenario = scenario_library.get(scenario_id)
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+        if scenario is None:
+            return jsonify({"ok": False, "error": "unknown_scenario"}), 404
+        return jsonify({"ok": True, "scenario": scenario.to_dict()})
+    return jsonify({"ok": True, "scenarios": scenario_library.ids(), "default": DEFAULT_SCENARIO_ID})
 
 
 @game_bp.route("/api/config")
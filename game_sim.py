@@ -0,0 +1,255 @@
+"""
+랜덤 경기 진행(game_routes._advance_random_event)을 수천 경기 단위로 한꺼번에 시뮬레이션합니다.
+
+경기마다 볼/스트라이크/아웃/주자/점수 상태를 NumPy 배열로 두고, 폴링 한 번(= 이벤트 한 번)을
+모든 경기에 대해 벡터 연산으로 진행합니다. 진행 규칙은 _advance_random_event/_advance_runners와 같습니다.
+- 볼은 3, 스트라이크는 2에서 멈춤 (볼넷/삼진으로 이어지지 않음), "walk" 이벤트는 상태를 바꾸지 않음
+- 진루는 베이스 수만큼 밀어내기를 반복하고, 홈런이 아니면 매번 타자 주자가 1루에 섬
+- last_event가 새로 바뀐 폴링에서만 event_seq가 올라가 그 매크로가 한 번 트리거됨 (walk처럼 아무 일 없는 폴링은 트리거 없음)
+
+가중치를 바꾸기 전에 득점 분포, 이벤트 빈도, 매크로 트리거 빈도와 점유율(duty cycle)을 미리 확인하는 용도입니다.
+
+    python game_sim.py [--games 10000] [--innings 9] [--seed 1] [--weights 20,10,...] [--poll-ms 2000] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from game_routes import RANDOM_EVENT_DESCRIPTIONS, RANDOM_EVENT_WEIGHTS, RANDOM_EVENTS
+from macros_executor import _normalize_event_name, get_compiled_macro, last_event_to_trigger_text
+
+# 스코어보드 폴링 주기 (static/js/main.js의 POLL_MS)
+DEFAULT_POLL_MS = 2000
+
+# last_event 종류 코드 ("start"는 경기 시작 직후 상태)
+LAST_TYPES = ["start"] + list(RANDOM_EVENT_DESCRIPTIONS)
+_CODE = {name: code for code, name in enumerate(LAST_TYPES)}
+
+# 진루하는 이벤트 → 진루 베이스 수 ("error"는 1 또는 2를 무작위로)
+_ADVANCE = {"single": 1, "double": 2, "triple": 3, "hr": 4}
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "mean": round(float(values.mean()), 3),
+        "std": round(float(values.std()), 3),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": float(values.max()),
+    }
+
+
+def _macro_for(event_type: str) -> str:
+    """last_event 종류가 폴링 때 트리거하는 매크로 이름 (없으면 "")"""
+    if event_type == "start":
+        last_event = {"type": "start", "description": "경기 시작"}
+    else:
+        last_event = {"type": event_type, "description": RANDOM_EVENT_DESCRIPTIONS[event_type]}
+    return _normalize_event_name(last_event_to_trigger_text(last_event))
+
+
+def simulate_games(
+    games: int = 10000,
+    innings: int = 9,
+    seed: Optional[int] = None,
+    weights: Optional[Sequence[float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    games 경기를 innings회까지 진행하고 경기별 결과 배열을 반환합니다.
+    반환: runs/hits/errors (games, 2: away/home), polls (경기별 폴링 수),
+          event_counts (RANDOM_EVENTS 순서 + 이닝 전환), last_counts (LAST_TYPES별 last_event가 새로 바뀐 횟수 = 매크로 트리거 횟수)
+    """
+    weights = np.asarray(RANDOM_EVENT_WEIGHTS if weights is None else weights, dtype=float)
+    if weights.shape != (len(RANDOM_EVENTS),) or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"weights must be {len(RANDOM_EVENTS)} non-negative numbers")
+    cumulative = np.cumsum(weights / weights.sum())
+    rng = np.random.default_rng(seed)
+
+    rows = np.arange(games)
+    balls = np.zeros(games, dtype=np.int8)
+    strikes = np.zeros(games, dtype=np.int8)
+    outs = np.zeros(games, dtype=np.int8)
+    bases = np.zeros(games, dtype=np.int8)  # 비트 0: 1루, 1: 2루, 2: 3루
+    half = np.zeros(games, dtype=np.int8)  # 0: 초(원정 공격), 1: 말(홈 공격)
+    inning = np.ones(games, dtype=np.int16)
+    runs = np.zeros((games, 2), dtype=np.int32)
+    hits = np.zeros((games, 2), dtype=np.int32)
+    errors = np.zeros((games, 2), dtype=np.int32)
+    polls = np.zeros(games, dtype=np.int32)
+    last = np.full(games, _CODE["start"], dtype=np.int8)
+    live = np.ones(games, dtype=bool)
+    event_counts = np.zeros(len(RANDOM_EVENTS) + 1, dtype=np.int64)
+    last_counts = np.zeros(len(LAST_TYPES), dtype=np.int64)
+
+    event_codes = {name: i for i, name in enumerate(RANDOM_EVENTS)}
+    advance_by_event = np.zeros(len(RANDOM_EVENTS), dtype=np.int8)
+    for name, n in _ADVANCE.items():
+        advance_by_event[event_codes[name]] = n
+    last_by_event = np.array([-1 if name == "walk" else _CODE[name] for name in RANDOM_EVENTS], dtype=np.int8)
+
+    while live.any():
+        polls[live] += 1
+
+        # 3아웃이면 이닝 전환만 하고 이벤트는 뽑지 않음
+        change = live & (outs >= 3)
+        balls[change] = strikes[change] = outs[change] = bases[change] = 0
+        to_bottom = change & (half == 0)
+        to_top = change & (half == 1)
+        half[to_bottom] = 1
+        half[to_top] = 0
+        inning[to_top] += 1
+        last[change] = _CODE["change"]
+        event_counts[-1] += int(change.sum())
+
+        act = live & ~change
+        event = np.minimum(np.searchsorted(cumulative, rng.random(games), side="right"), len(RANDOM_EVENTS) - 1)
+        event[~act] = -1
+        event_counts[:-1] += np.bincount(event[act], minlength=len(RANDOM_EVENTS))
+        batting = half.astype(np.intp)
+
+        is_ball = event == event_codes["ball"]
+        balls[is_ball] = np.minimum(3, balls[is_ball] + 1)
+        is_strike = event == event_codes["strike"]
+        strikes[is_strike] = np.minimum(2, strikes[is_strike] + 1)
+
+        # 볼/스트라이크/투구/walk 외에는 카운트 초기화
+        clears = act & ~np.isin(event, [event_codes[n] for n in ("pitch", "ball", "strike", "walk")])
+        balls[clears] = strikes[clears] = 0
+        outs[event == event_codes["out"]] += 1
+
+        advance = np.where(act & (event >= 0), advance_by_event[np.maximum(event, 0)], 0)
+        hits[rows, batting] += advance > 0
+        is_error = event == event_codes["error"]
+        errors[rows, 1 - batting] += is_error
+        advance[is_error] = rng.integers(1, 3, size=int(is_error.sum()))
+
+        for step in range(1, 5):
+            moving = advance >= step
+            if not moving.any():
+                break
+            scored = ((bases >> 2) & 1) * moving
+            bases[moving] = (bases[moving] << 1) & 0b110
+            homer = moving & (advance >= 4)
+            bases[moving & ~homer] |= 1
+            runs[rows, batting] += scored + homer
+
+        # "walk"는 last_event를 바꾸지 않음
+        updates = act & (event >= 0)
+        new_last = last_by_event[np.maximum(event, 0)]
+        updates &= new_last >= 0
+        last[updates] = new_last[updates]
+        # 디스패처는 event_seq마다 한 번만 트리거하므로 last_event가 새로 바뀐 경기만 셈
+        last_counts += np.bincount(last[updates | change], minlength=len(LAST_TYPES))
+
+        live &= inning <= innings
+
+    return {
+        "runs": runs,
+        "hits": hits,
+        "errors": errors,
+        "polls": polls,
+        "event_counts": event_counts,
+        "last_counts": last_counts,
+    }
+
+
+def summarize(result: Dict[str, np.ndarray], poll_ms: int = DEFAULT_POLL_MS) -> Dict[str, Any]:
+    """simulate_games 결과를 득점 분포, 이벤트 빈도, 매크로 트리거 통계로 요약합니다."""
+    runs, polls = result["runs"], result["polls"]
+    games = len(polls)
+    total_polls = int(polls.sum())
+    total_minutes = total_polls * poll_ms / 60000.0
+    totals = runs.sum(axis=1)
+
+    event_counts = result["event_counts"]
+    names = RANDOM_EVENTS + ["change"]
+    events = {
+        name: {"count": int(count), "per_poll": round(float(count) / total_polls, 4)}
+        for name, count in zip(names, event_counts)
+    }
+
+    macros: Dict[str, Dict[str, Any]] = {}
+    for code, count in enumerate(result["last_counts"]):
+        name = _macro_for(LAST_TYPES[code])
+        if not name or not count:
+            continue
+        entry = macros.setdefault(name, {"triggers": 0, "events": []})
+        entry["triggers"] += int(count)
+        entry["events"].append(LAST_TYPES[code])
+    for name, entry in macros.items():
+        timeline = get_compiled_macro(name)
+        duration_ms = timeline.duration_ms if timeline is not None else None
+        entry["per_game"] = round(entry["triggers"] / games, 2)
+        entry["per_minute"] = round(entry["triggers"] / total_minutes, 3) if total_minutes else None
+        entry["duration_ms"] = duration_ms
+        entry["steps_per_game"] = round(entry["per_game"] * len(timeline), 1) if timeline is not None else None
+        # 매크로가 재생 중인 시간 비율 (1을 넘으면 폴링 속도를 따라가지 못해 대기열에서 밀림)
+        entry["duty_cycle"] = (
+            round(entry["triggers"] * duration_ms / (total_polls * poll_ms), 4)
+            if duration_ms is not None and total_polls else None
+        )
+
+    return {
+        "games": games,
+        "poll_ms": poll_ms,
+        "polls_per_game": _percentiles(polls),
+        "minutes_per_game": round(total_minutes / games, 2),
+        "runs": {
+            "away": _percentiles(runs[:, 0]),
+            "home": _percentiles(runs[:, 1]),
+            "total": _percentiles(totals),
+            "histogram": {int(k): int(v) for k, v in zip(*np.unique(np.minimum(totals, 60), return_counts=True))},
+        },
+        "home_win_rate": round(float((runs[:, 1] > runs[:, 0]).mean()), 4),
+        "tie_rate": round(float((runs[:, 1] == runs[:, 0]).mean()), 4),
+        "hits_per_game": round(float(result["hits"].sum(axis=1).mean()), 2),
+        "errors_per_game": round(float(result["errors"].sum(axis=1).mean()), 2),
+        "events": events,
+        "macros": dict(sorted(macros.items(), key=lambda item: -item[1]["triggers"])),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="랜덤 경기 진행 몬테카를로 시뮬레이션")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--innings", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--weights", type=str, default=None,
+                        help="쉼표로 구분한 가중치 (" + ",".join(RANDOM_EVENTS) + ")")
+    parser.add_argument("--poll-ms", type=int, default=DEFAULT_POLL_MS)
+    parser.add_argument("--json", action="store_true", help="요약 전체를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    weights = [float(w) for w in args.weights.split(",")] if args.weights else None
+    summary = summarize(simulate_games(args.games, args.innings, args.seed, weights), args.poll_ms)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{summary['games']}경기, {args.innings}이닝, 폴링 {args.poll_ms}ms")
+    print(f"  경기당 폴링 {summary['polls_per_game']['mean']:.0f}회 (약 {summary['minutes_per_game']}분)")
+    for side in ("away", "home", "total"):
+        stats = summary["runs"][side]
+        print(f"  득점 {side:5s} 평균 {stats['mean']:6.2f}  p50 {stats['p50']:5.0f}  p90 {stats['p90']:5.0f}  p99 {stats['p99']:5.0f}")
+    print(f"  홈 승률 {summary['home_win_rate']:.3f}, 무승부 {summary['tie_rate']:.3f}")
+    print("이벤트 (폴링당 비율)")
+    for name, stats in summary["events"].items():
+        print(f"  {name:8s} {stats['per_poll']:.4f}")
+    print("매크로 트리거")
+    for name, stats in summary["macros"].items():
+        duty = stats["duty_cycle"]
+        print(f"  {name:12s} 경기당 {stats['per_game']:8.2f}회  분당 {stats['per_minute']:6.2f}회  "
+              f"점유율 {'-' if duty is None else f'{duty:.3f}'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+키프레임 매크로를 모터별 촘촘한 스텝으로 펼칩니다.
+
+매크로 파일에서 스텝 목록 대신 다음 형식을 쓸 수 있습니다.
+
+    "홈런(부드럽게)": {
+        "rate_hz": 50,
+        "keyframes": [
+            {"t_ms": 0,    "pose": {"R1": 2048, "RE": 2048}},
+            {"t_ms": 600,  "pose": {"R1": 3000}, "easing": "ease_in_out"},
+            {"t_ms": 1200, "pose": {"R1": 2048, "RE": 1500}, "easing": "ease_out", "speed": 200}
+        ]
+    }
+
+- t_ms: 매크로 시작 기준 절대 시각, pose: {모터 키 또는 ID: 위치}
+- easing: 이전 키프레임에서 이 키프레임으로 가는 구간의 곡선 (기본 linear)
+- speed: 이 구간의 Profile Velocity. 생략하면 제어 주기마다 다음 위치에 도달할 수 있는 값으로 계산
+- 모터별로 자기 키프레임 사이만 보간하며, 키프레임에 없는 모터는 그 구간에서 움직이지 않습니다
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import MACRO_CONTROL_RATE_HZ
+
+EASINGS: Dict[str, Callable[[float], float]] = {
+    "linear": lambda u: u,
+    "ease_in": lambda u: u * u * u,
+    "ease_out": lambda u: 1 - (1 - u) ** 3,
+    "ease_in_out": lambda u: 4 * u * u * u if u < 0.5 else 1 - (-2 * u + 2) ** 3 / 2,
+    "step": lambda u: 1.0 if u >= 1.0 else 0.0,
+}
+
+# Dynamixel X 시리즈: 한 바퀴 4096 스텝, Profile Velocity 단위 0.229 rpm
+POSITION_STEPS_PER_REV = 4096
+VELOCITY_UNIT_RPM = 0.229
+MAX_PROFILE_VELOCITY = 1023
+# 보간 없이 바로 이동하는 위치(첫 키프레임, 같은 시각 키프레임)의 기본 속도
+DEFAULT_JUMP_SPEED = 100
+
+# (시각 ms, 모터 ID, 위치, 속도)
+Step = Tuple[int, int, int, int]
+
+
+def is_keyframe_macro(spec: Any) -> bool:
+    return isinstance(spec, dict) and "keyframes" in spec
+
+
+def _speed_for(delta: float, period_ms: float) -> int:
+    """period_ms 안에 delta 스텝만큼 움직일 수 있는 Profile Velocity (0은 '최대 속도'라 최소 1)"""
+    rpm = abs(delta) / POSITION_STEPS_PER_REV * 60000.0 / period_ms
+    return max(1, min(MAX_PROFILE_VELOCITY, math.ceil(rpm / VELOCITY_UNIT_RPM)))
+
+
+def expand_keyframes(spec: Dict[str, Any], resolve_motor_id: Callable[[Any], int]) -> Tuple[List[Step], int]:
+    """
+    키프레임 매크로를 시각순 스텝 목록과 전체 길이(ms)로 펼칩니다.
+    형식이 잘못되면 ValueError를 던집니다.
+    """
+    rate_hz = float(spec.get("rate_hz", MACRO_CONTROL_RATE_HZ))
+    if rate_hz <= 0:
+        raise ValueError(f"rate_hz must be positive: {rate_hz}")
+    period_ms = 1000.0 / rate_hz
+
+    keyframes = spec.get("keyframes")
+    if not isinstance(keyframes, list) or not keyframes:
+        raise ValueError("keyframes must be a non-empty list")
+
+    # 모터별 트랙: [(시각, 위치, easing, speed 또는 None), ...]
+    tracks: Dict[int, List[Tuple[int, int, Callable[[float], float], Any]]] = {}
+    last_t = -1
+    for idx, frame in enumerate(keyframes):
+        if not isinstance(frame, dict) or not isinstance(frame.get("pose"), dict):
+            raise ValueError(f"keyframe {idx + 1}: missing pose")
+        t_ms = int(frame.get("t_ms", 0))
+        if t_ms < last_t:
+            raise ValueError(f"keyframe {idx + 1}: t_ms must not decrease ({t_ms} < {last_t})")
+        last_t = t_ms
+        easing_name = frame.get("easing", "linear")
+        if easing_name not in EASINGS:
+            raise ValueError(f"keyframe {idx + 1}: unknown easing '{easing_name}'")
+        speed = frame.get("speed")
+        for key, position in frame["pose"].items():
+            tracks.setdefault(resolve_motor_id(key), []).append(
+                (t_ms, int(position), EASINGS[easing_name], None if speed is None else int(speed))
+            )
+
+    steps: List[Step] = []
+    for motor_id, track in tracks.items():
+        t0, p0, _, speed0 = track[0]
+        steps.append((t0, motor_id, p0, DEFAULT_JUMP_SPEED if speed0 is None else speed0))
+        last_sent, last_at = p0, t0
+        for (ta, pa, _, _), (tb, pb, ease, speed) in zip(track, track[1:]):
+            span = tb - ta
+            if span <= 0:
+                if pb != last_sent:
+                    steps.append((tb, motor_id, pb, DEFAULT_JUMP_SPEED if speed is None else speed))
+                    last_sent, last_at = pb, tb
+                continue
+            # 모든 모터가 같은 시각 격자(period_ms의 배수)에서 움직여 한 포즈로 묶이도록 하고,
+            # 구간 끝(tb)은 항상 포함해 키프레임 위치에 정확히 도달
+            times = [int(round(k * period_ms)) for k in range(int(ta // period_ms) + 1, math.ceil(tb / period_ms))]
+            times = [at for at in times if ta < at < tb] + [tb]
+            for at in times:
+                position = int(round(pa + (pb - pa) * ease((at - ta) / span)))
+                if position == last_sent:
+                    continue
+                if speed is None:
+                    speed_value = _speed_for(position - last_sent, max(1, at - last_at))
+                else:
+                    speed_value = speed
+                steps.append((at, motor_id, position, speed_value))
+                last_sent, last_at = position, at
+
+    steps.sort(key=lambda s: (s[0], s[1]))
+    return steps, max(0, last_t)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import MACRO_DIR, MACRO_RELOAD_INTERVAL
+from macro_store import MACROS_PATH, macro_store
+
+# 기존 코드/음성 트리거에서 쓰던 파일 키 → 파일 이름 (MACRO_DIR 기준)
+# 이 표에 없는 파일도 파일 이름(확장자 제외)으로 찾을 수 있습니다 (예: "kia")
+MACRO_FILE_ALIASES = {
+    "hello": "hello.json",
+    "hifive": "hifive.json",
+    "fighting": "fighting.json",
+    "차렷자세": "hold.json",
+    "김지찬 응원가": "kimjichan.json",
+    "김도영 응원가": "kimdoyoung.json",
+    "아웃(삐끼삐끼)": "out.json",
+    "외쳐라 최강기아": "kia.json",
+    "홈런": "homerun.json",
+}
+
+Signature = Tuple[int, int]
+
+
+@dataclass
+class MacroSource:
+    """매크로 파일 하나의 마지막으로 읽은 내용입니다."""
+
+    path: str
+    signature: Any  # 파일: (mtime_ns, 크기), 매크로 저장소: 저장소 버전
+    macros: Optional[Dict[str, Any]]  # "macros" 키가 없는 JSON은 None
+    stamp: int  # 파일을 다시 읽을 때마다 바뀌는 값 (컴파일 캐시 무효화용)
+    names: List[str] = field(default_factory=list)
+
+
+class MacroRegistry:
+    """
+    디렉터리 안의 모든 매크로 JSON 파일을 이름으로 색인합니다.
+    파일 변경은 백그라운드 스레드가 주기적으로 확인해 반영하므로, 조회 시에는 stat 없이 dict 조회만 합니다.
+
+    같은 이름이 여러 파일에 있으면 다음 순서로 우선합니다.
+    1) 매크로 저장소 (매크로 편집 화면에서 저장하는 macros.json 또는 SQLite)
+    2) 별칭 키와 같은 이름의 매크로를 가진 별칭 파일 (예: "아웃(삐끼삐끼)" → out.json)
+    3) 나머지 파일 (파일 이름 순)
+    """
+
+    def __init__(self, directory: str = MACRO_DIR, aliases: Optional[Dict[str, str]] = None,
+                 interval: float = MACRO_RELOAD_INTERVAL) -> None:
+        self.directory = os.path.abspath(directory)
+        self.primary = os.path.abspath(macro_store.path)
+        self.aliases = {key: os.path.join(self.directory, name) for key, name in (aliases or {}).items()}
+        self.interval = interval
+        self.version = 0
+        self._sources: Dict[str, MacroSource] = {}
+        self._index: Dict[str, Tuple[MacroSource, Any]] = {}
+        self._stamps = itertools.count(1)
+        self._lock = threading.Lock()
+        self._started = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- 조회 -----
+
+    def get(self, name: str) -> Optional[Tuple[MacroSource, Any]]:
+        """이름으로 (소스 파일, 스텝 목록 또는 키프레임 매크로)를 찾습니다."""
+        self.start()
+        return self._index.get(name)
+
+    def source(self, file_key: str) -> Optional[MacroSource]:
+        """별칭 키, 파일 이름(확장자 제외) 또는 경로로 매크로 파일을 찾습니다."""
+        self.start()
+        path = self._resolve_path(file_key)
+        return self._sources.get(path) if path else None
+
+    def names(self) -> Dict[str, str]:
+        """모든 매크로 이름 → 해당 파일 이름"""
+        self.start()
+        return {name: os.path.basename(src.path) for name, (src, _) in self._index.items()}
+
+    def _resolve_path(self, file_key: str) -> Optional[str]:
+        if file_key in self.aliases:
+            return self.aliases[file_key]
+        if os.path.isabs(file_key):
+            return file_key
+        stem = file_key[:-5] if file_key.endswith(".json") else file_key
+        return os.path.join(self.directory, stem + ".json")
+
+    # ----- 재로딩 -----
+
+    def start(self) -> None:
+        """처음 호출될 때 동기적으로 한 번 스캔하고 감시 스레드를 시작합니다."""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._scan_locked()
+            macro_store.add_listener(self.reload)
+            if self.interval > 0:
+                self._thread = threading.Thread(target=self._watch, name="macro-registry", daemon=True)
+                self._thread.start()
+            self._started = True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def scan(self) -> bool:
+        """디렉터리를 다시 확인합니다. 바뀐 파일이 있으면 True."""
+        with self._lock:
+            return self._scan_locked()
+
+    def reload(self, path: str) -> None:
+        """파일 하나를 즉시 다시 읽습니다 (저장 직후 감시 주기를 기다리지 않도록)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            changed = self._load_primary_locked() if path == self.primary else self._load_locked(path)
+            if changed:
+                self._rebuild_index_locked()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"✗ 매크로 디렉터리 확인 실패: {e}")
+
+    def _candidate_paths(self) -> List[str]:
+        # macros.json은 매크로 저장소가 관리하므로 (SQLite 백엔드에서는 가져온 뒤 남은 사본) 일반 파일로 읽지 않음
+        skip = {self.primary, os.path.abspath(MACROS_PATH)}
+        try:
+            return [
+                entry.path for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json") and entry.is_file() and os.path.abspath(entry.path) not in skip
+            ]
+        except OSError as e:
+            print(f"✗ 매크로 디렉터리 {self.directory} 확인 실패: {e}")
+            return []
+
+    def _scan_locked(self) -> bool:
+        paths = self._candidate_paths()
+        changed = self._load_primary_locked()
+        for path in paths:
+            changed |= self._load_locked(path)
+        for path in set(self._sources) - set(paths) - {self.primary}:
+            del self._sources[path]
+            print(f"⚠️ 매크로 파일 제거됨: {os.path.basename(path)}")
+            changed = True
+        if changed:
+            self._rebuild_index_locked()
+        return changed
+
+    def _load_primary_locked(self) -> bool:
+        version, data = macro_store.snapshot()
+        current = self._sources.get(self.primary)
+        if current is not None and current.signature == version:
+            return False
+        macros = data.get("macros", {})
+        self._sources[self.primary] = MacroSource(self.primary, version, macros, next(self._stamps), sorted(macros))
+        print(f"✓ {os.path.basename(self.primary)} 로드 완료: {len(macros)}개 매크로")
+        return True
+
+    def _load_locked(self, path: str) -> bool:
+        try:
+            st = os.stat(path)
+            signature: Optional[Signature] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        current = self._sources.get(path)
+        if current is not None and current.signature == signature:
+            return False
+        if signature is None:
+            if current is None:
+                return False
+            del self._sources[path]
+            return True
+
+        macros: Optional[Dict[str, Any]] = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and isinstance(data.get("macros"), dict):
+                macros = data["macros"]
+        except Exception as e:
+            print(f"✗ {os.path.basename(path)} 로드 실패: {e}")
+        self._sources[path] = MacroSource(path, signature, macros, next(self._stamps), sorted(macros or {}))
+        if macros is not None:
+            print(f"✓ {os.path.basename(path)} 로드 완료: {len(macros)}개 매크로")
+        return True
+
+    def _rebuild_index_locked(self) -> None:
+        index: Dict[str, Tuple[MacroSource, Any]] = {}
+
+        def add(src: Optional[MacroSource], names: List[str]) -> None:
+            if src is None or src.macros is None:
+                return
+            for name in names:
+                steps = src.macros.get(name)
+                # 스텝 목록 또는 키프레임 매크로(dict)
+                if name not in index and isinstance(steps, (list, dict)):
+                    index[name] = (src, steps)
+
+        primary = self._sources.get(self.primary)
+        add(primary, primary.names if primary else [])
+        for key, path in self.aliases.items():
+            add(self._sources.get(path), [key])
+        for path in sorted(self._sources):
+            src = self._sources[path]
+            add(src, src.names)
+        # 조회 스레드는 잠금 없이 읽으므로 통째로 교체
+        self._index = index
+        self.version += 1
+
+
+# 앱 전체에서 공유하는 매크로 레지스트리
+macro_registry = MacroRegistry(aliases=MACRO_FILE_ALIASES)
@@ -0,0 +1,186 @@
+"""
+하드웨어 없이 매크로를 가상 시계로 재생해 길이, 모터별 궤적, 명령 빈도, 시리얼 대역폭을 계산합니다.
+
+전송 규칙은 serial_api.SerialWriter와 같습니다.
+- 마지막으로 보낸 위치/속도와 같은 명령은 전송하지 않음
+- 텍스트 모드: 명령마다 'ID,위치,속도\\n' 한 줄, 응답 "Command Received -> ..." 한 줄
+- sync 프레임 모드: 같은 시각의 명령을 최대 SYNC_FRAME_MAX_MOTORS개씩 프레임 하나로 (명령이 1개면 텍스트)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import MOTOR_ID_MAP, SERIAL_BAUD
+from macro_registry import macro_registry
+from macros_executor import MacroTimeline, compile_macro, get_compiled_file_macro, get_compiled_macro
+
+try:
+    from serial_api import SYNC_FRAME_MAX_MOTORS, _fits_sync_frame
+except Exception:  # pragma: no cover
+    SYNC_FRAME_MAX_MOTORS = 6
+
+    def _fits_sync_frame(motor_id: int, position: int, speed: int) -> bool:
+        return 0 <= motor_id <= 0xFF and 0 <= position <= 0xFFFF and 0 <= speed <= 0xFFFF
+
+# UART 8N1: 바이트당 10비트
+BITS_PER_BYTE = 10
+RATE_WINDOW_MS = 1000
+
+_analysis_cache: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+_analysis_lock = threading.Lock()
+
+
+def _text_tx(motor_id: int, position: int, speed: int) -> int:
+    return len(f"{motor_id},{position},{speed}\n")
+
+
+def _text_rx(motor_id: int, position: int, speed: int) -> int:
+    return len(f"Command Received -> ID: {motor_id}, Position: {position}, Speed: {speed}\r\n")
+
+
+def _sync_tx(count: int) -> int:
+    return 2 + 1 + 5 * count + 1
+
+
+def _sync_rx(count: int) -> int:
+    return len(f"Sync OK -> {count}\r\n")
+
+
+def _peak_per_window(events: List[Tuple[int, int]], window_ms: int = RATE_WINDOW_MS) -> int:
+    """(시각 ms, 양) 목록에서 길이 window_ms인 구간 합의 최댓값"""
+    peak = total = 0
+    start = 0
+    for at, amount in events:
+        total += amount
+        while events[start][0] <= at - window_ms:
+            total -= events[start][1]
+            start += 1
+        peak = max(peak, total)
+    return peak
+
+
+def simulate_timeline(timeline: MacroTimeline, baud: int = SERIAL_BAUD) -> Dict[str, Any]:
+    """컴파일된 타임라인을 가상 시계로 재생한 결과를 반환합니다."""
+    motor_keys = {motor_id: key for key, motor_id in MOTOR_ID_MAP.items()}
+    byte_ms = BITS_PER_BYTE * 1000.0 / baud if baud > 0 else 0.0
+    last_sent: Dict[int, Tuple[int, int]] = {}
+    series: Dict[int, List[List[int]]] = {}
+    commands: List[Tuple[int, int]] = []
+    modes: Dict[str, Dict[str, Any]] = {
+        mode: {"tx_bytes": 0, "rx_bytes": 0, "writes": 0, "tx_events": [], "overrun_poses": 0, "max_pose_link_ms": 0.0}
+        for mode in ("text", "sync")
+    }
+
+    poses = list(timeline.poses())
+    for at, pose, wait_ms in poses:
+        sent = []
+        for motor_id, position, speed in pose:
+            series.setdefault(motor_id, []).append([at, position])
+            if last_sent.get(motor_id) == (position, speed):
+                continue
+            last_sent[motor_id] = (position, speed)
+            sent.append((motor_id, position, speed))
+        if not sent:
+            continue
+        commands.append((at, len(sent)))
+
+        # 텍스트 모드
+        text = modes["text"]
+        tx = sum(_text_tx(*cmd) for cmd in sent)
+        text["tx_bytes"] += tx
+        text["rx_bytes"] += sum(_text_rx(*cmd) for cmd in sent)
+        text["writes"] += len(sent)
+        text["tx_events"].append((at, tx))
+        link_ms = tx * byte_ms
+        text["max_pose_link_ms"] = max(text["max_pose_link_ms"], link_ms)
+        if wait_ms > 0 and link_ms > wait_ms:
+            text["overrun_poses"] += 1
+
+        # sync 프레임 모드
+        sync = modes["sync"]
+        tx = 0
+        if all(_fits_sync_frame(*cmd) for cmd in sent):
+            for i in range(0, len(sent), SYNC_FRAME_MAX_MOTORS):
+                chunk = sent[i:i + SYNC_FRAME_MAX_MOTORS]
+                if len(chunk) == 1:
+                    tx += _text_tx(*chunk[0])
+                    sync["rx_bytes"] += _text_rx(*chunk[0])
+                else:
+                    tx += _sync_tx(len(chunk))
+                    sync["rx_bytes"] += _sync_rx(len(chunk))
+                sync["writes"] += 1
+        else:
+            tx = sum(_text_tx(*cmd) for cmd in sent)
+            sync["rx_bytes"] += sum(_text_rx(*cmd) for cmd in sent)
+            sync["writes"] += len(sent)
+        sync["tx_bytes"] += tx
+        sync["tx_events"].append((at, tx))
+        link_ms = tx * byte_ms
+        sync["max_pose_link_ms"] = max(sync["max_pose_link_ms"], link_ms)
+        if wait_ms > 0 and link_ms > wait_ms:
+            sync["overrun_poses"] += 1
+
+    duration_s = timeline.duration_ms / 1000.0
+    serial: Dict[str, Any] = {}
+    for mode, stats in modes.items():
+        tx_events = stats.pop("tx_events")
+        peak_bytes_per_s = _peak_per_window(tx_events)
+        serial[mode] = {
+            **stats,
+            "max_pose_link_ms": round(stats["max_pose_link_ms"], 3),
+            "peak_tx_bytes_per_s": peak_bytes_per_s,
+            "avg_tx_bytes_per_s": round(stats["tx_bytes"] / duration_s, 1) if duration_s else None,
+            # 최대 1초 구간에서 송신이 링크를 차지하는 비율 (응답 방향은 별도 선로)
+            "peak_link_utilization": round(peak_bytes_per_s * BITS_PER_BYTE / baud, 4) if baud > 0 else None,
+        }
+
+    return {
+        "duration_ms": timeline.duration_ms,
+        "steps": len(timeline),
+        "poses": len(poses),
+        "commands_sent": sum(n for _, n in commands),
+        "commands_skipped_unchanged": len(timeline) - sum(n for _, n in commands),
+        "peak_commands_per_s": _peak_per_window(commands),
+        "baud": baud,
+        "motors": {
+            str(motor_id): {"key": motor_keys.get(motor_id), "steps": len(points), "series": points}
+            for motor_id, points in sorted(series.items())
+        },
+        "serial": serial,
+    }
+
+
+def analyze_macro(name: str, file_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    이름(및 선택적 파일 키)으로 매크로를 찾아 시뮬레이션 결과를 반환합니다.
+    매크로 파일이 바뀌지 않았으면 이전 결과를 재사용합니다.
+    """
+    if file_key:
+        src = macro_registry.source(file_key)
+        if src is None or not (src.macros or {}).get(name):
+            return None
+    else:
+        entry = macro_registry.get(name)
+        if entry is None:
+            return None
+        src = entry[0]
+
+    key = (src.path, name, src.stamp)
+    with _analysis_lock:
+        cached = _analysis_cache.get(key)
+    if cached is not None:
+        return cached
+
+    timeline = get_compiled_file_macro(file_key, name) if file_key else get_compiled_macro(name)
+    if timeline is None:
+        timeline = compile_macro([], label=name)
+    result = {"name": name, "source": os.path.basename(src.path), **simulate_timeline(timeline)}
+    with _analysis_lock:
+        # 이전 버전 결과는 버림
+        for old in [k for k in _analysis_cache if k[:2] == key[:2]]:
+            del _analysis_cache[old]
+        _analysis_cache[key] = result
+    return result
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import MACRO_STORE_BACKEND, MACRO_DB_PATH
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MACROS_PATH = os.path.join(BASE_DIR, "macros.json")
+
+
+class MacroVersionConflict(Exception):
+    """저장하려는 매크로가 그 사이 다른 편집자에 의해 바뀌었을 때 발생합니다."""
+
+    def __init__(self, name: str, current: Optional[int]) -> None:
+        super().__init__(f"macro '{name}' was modified (current version: {current})")
+        self.name = name
+        self.current = current
+
+
+def _content_version(steps: Any) -> int:
+    """스텝 내용에서 계산한 양수 버전 (JSON 숫자로 안전한 48비트)"""
+    canonical = json.dumps(steps, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return int.from_bytes(hashlib.sha1(canonical.encode("utf-8")).digest()[:6], "big") or 1
+
+
+class MacroStore:
+    """
+    macros.json을 메모리에 캐시하고 여러 모듈이 함께 쓰는 저장소입니다.
+    - 읽기: 파일 (mtime, 크기)가 바뀌었을 때만 다시 파싱
+    - 쓰기: 임시 파일에 쓴 뒤 os.replace로 교체 (중간에 끊겨도 기존 파일 유지)
+    - version: 내용이 바뀔 때마다 증가하므로, 읽는 쪽은 같은 version이면 재처리를 건너뛸 수 있습니다
+    load()가 돌려주는 dict는 캐시 자체이므로 수정하지 말고 set_macro/delete_macro/replace_all을 사용하세요.
+
+    JSON 파일 백엔드는 저장할 때마다 파일 전체를 다시 씁니다. 매크로별 버전은 파일에 따로 저장하지 않고
+    스텝 내용의 해시로 계산하므로, 파일을 직접 고쳐도 expected_version 확인이 그대로 동작합니다.
+    """
+
+    def __init__(self, path: str = MACROS_PATH) -> None:
+        self.path = path
+        self.version = 0
+        self._data: Dict[str, Any] = {"macros": {}}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """저장이 끝날 때마다 파일 경로와 함께 호출할 함수를 등록합니다."""
+        self._listeners.append(callback)
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self) -> None:
+        signature = self._stat_signature()
+        if self._loaded and signature == self._signature:
+            return
+        data: Dict[str, Any] = {"macros": {}}
+        if signature is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    loaded = json.load(f)
+                if isinstance(loaded, dict) and isinstance(loaded.get("macros"), dict):
+                    data = loaded
+            except Exception as e:
+                print(f"✗ {os.path.basename(self.path)} 로드 실패: {e}")
+        self._data = data
+        self._signature = signature
+        self._loaded = True
+        self.version += 1
+
+    def load(self) -> Dict[str, Any]:
+        """{"macros": {...}} 전체를 반환합니다 (읽기 전용)."""
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """(version, 데이터)를 한 번에 반환합니다."""
+        with self._lock:
+            self._refresh()
+            return self.version, self._data
+
+    def get_macro(self, name: str) -> List[Dict[str, Any]]:
+        return self.load()["macros"].get(name) or []
+
+    def macro_version(self, name: str) -> Optional[int]:
+        """매크로 내용의 버전 (없는 매크로는 None)"""
+        steps = self.load()["macros"].get(name)
+        return _content_version(steps) if steps is not None else None
+
+    def _check_version_locked(self, name: str, expected_version: Optional[int]) -> None:
+        # 새 매크로는 0으로 확인
+        if expected_version is not None and expected_version != (self.macro_version(name) or 0):
+            raise MacroVersionConflict(name, self.macro_version(name))
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback(self.path)
+            except Exception as e:
+                print(f"✗ 매크로 저장 알림 실패: {e}")
+
+    def save(self, data: Dict[str, Any]) -> None:
+        """데이터 전체를 원자적으로 기록하고 캐시를 갱신합니다."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(prefix=".macros-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self._data = data
+            self._signature = self._stat_signature()
+            self._loaded = True
+            self.version += 1
+        self._notify()
+
+    def set_macro(self, name: str, steps: List[Dict[str, Any]], expected_version: Optional[int] = None) -> Optional[int]:
+        """매크로 하나를 저장하고 새 매크로 버전을 반환합니다. expected_version과 다르면 MacroVersionConflict"""
+        with self._lock:
+            self._check_version_locked(name, expected_version)
+            current = self.load()
+            macros = dict(current.get("macros", {}))
+            macros[name] = steps
+            self.save({**current, "macros": macros})
+        return _content_version(steps)
+
+    def delete_macro(self, name: str, expected_version: Optional[int] = None) -> bool:
+        with self._lock:
+            current = self.load()
+            if name not in current.get("macros", {}):
+                return False
+            self._check_version_locked(name, expected_version)
+            macros = dict(current["macros"])
+            del macros[name]
+            self.save({**current, "macros": macros})
+            return True
+
+    def replace_all(self, macros: Dict[str, Any]) -> None:
+        self.save({"macros": dict(macros)})
+
+
+class SqliteMacroStore(MacroStore):
+    """
+    매크로를 SQLite(WAL) 데이터베이스에 매크로 한 행씩 저장합니다.
+    - 매크로 하나 저장/삭제는 그 행만 바꾸는 트랜잭션 하나 (파일 전체를 다시 쓰지 않음)
+    - 행마다 version이 있어 expected_version으로 동시 편집 충돌을 감지
+    - meta 테이블의 전체 버전으로 다른 프로세스의 변경도 감지해 캐시를 갱신
+    처음 만들 때 데이터베이스가 비어 있으면 기존 macros.json을 가져옵니다.
+    """
+
+    def __init__(self, path: str = MACRO_DB_PATH, import_from: Optional[str] = MACROS_PATH) -> None:
+        super().__init__(path)
+        self._db_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS macros ("
+            " name TEXT PRIMARY KEY, steps TEXT NOT NULL,"
+            " version INTEGER NOT NULL DEFAULT 1, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        empty = conn.execute("SELECT COUNT(*) FROM macros").fetchone()[0] == 0
+        if empty and import_from and os.path.exists(import_from):
+            try:
+                with open(import_from, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                macros = data.get("macros") if isinstance(data, dict) else None
+                if isinstance(macros, dict) and macros:
+                    self.replace_all(macros)
+                    print(f"✓ {os.path.basename(import_from)} → {os.path.basename(path)} 가져오기 완료: {len(macros)}개 매크로")
+            except Exception as e:
+                print(f"✗ {os.path.basename(import_from)} 가져오기 실패: {e}")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 연결은 스레드마다 따로 엽니다
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _refresh(self) -> None:
+        conn = self._conn()
+        db_version = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+        if self._loaded and db_version == self._db_version:
+            return
+        macros: Dict[str, Any] = {}
+        versions: Dict[str, int] = {}
+        for name, steps, version in conn.execute("SELECT name, steps, version FROM macros ORDER BY rowid"):
+            try:
+                macros[name] = json.loads(steps)
+            except ValueError as e:
+                print(f"✗ 매크로 '{name}' 데이터 손상: {e}")
+                continue
+            versions[name] = version
+        self._data = {"macros": macros}
+        self._versions = versions
+        self._db_version = db_version
+        self._loaded = True
+        self.version += 1
+
+    def macro_version(self, name: str) -> Optional[int]:
+        with self._lock:
+            self._refresh()
+            return self._versions.get(name)
+
+    def _write(self, apply: Callable[[sqlite3.Connection], Any]) -> Any:
+        """BEGIN IMMEDIATE 트랜잭션 안에서 apply를 실행하고 전체 버전을 올립니다."""
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = apply(conn)
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._refresh()
+        self._notify()
+        return result
+
+    def save(self, data: Dict[str, Any]) -> None:
+        self.replace_all(data.get("macros", {}))
+
+    def replace_all(self, macros: Dict[str, Any]) -> None:
+        def apply(conn: sqlite3.Connection) -> None:
+            now = time.time()
+            old_versions = dict(conn.execute("SELECT name, version FROM macros"))
+            conn.execute("DELETE FROM macros")
+            conn.executemany(
+                "INSERT INTO macros (name, steps, version, updated_at) VALUES (?, ?, ?, ?)",
+                [
+                    (name, json.dumps(steps, ensure_ascii=False), old_versions.get(name, 0) + 1, now)
+                    for name, steps in macros.items()
+                ],
+            )
+        self._write(apply)
+
+    def set_macro(self, name: str, steps: List[Dict[str, Any]], expected_version: Optional[int] = None) -> Optional[int]:
+        def apply(conn: sqlite3.Connection) -> int:
+            row = conn.execute("SELECT version FROM macros WHERE name = ?", (name,)).fetchone()
+            current = row[0] if row else None
+            if expected_version is not None and expected_version != (current or 0):
+                raise MacroVersionConflict(name, current)
+            conn.execute(
+                "INSERT INTO macros (name, steps, version, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(name) DO UPDATE SET steps = excluded.steps, "
+                "version = macros.version + 1, updated_at = excluded.updated_at",
+                (name, json.dumps(steps, ensure_ascii=False), time.time()),
+            )
+            return (current or 0) + 1
+        return self._write(apply)
+
+    def delete_macro(self, name: str, expected_version: Optional[int] = None) -> bool:
+        def apply(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT version FROM macros WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return False
+            if expected_version is not None and expected_version != row[0]:
+                raise MacroVersionConflict(name, row[0])
+            conn.execute("DELETE FROM macros WHERE name = ?", (name,))
+            return True
+        with self._lock:
+            if name not in self.load()["macros"]:
+                return False
+            return self._write(apply)
+
+
+def _create_store(backend: str) -> MacroStore:
+    if backend == "sqlite":
+        return SqliteMacroStore()
+    if backend != "json":
+        print(f"⚠️ 알 수 없는 MACRO_STORE_BACKEND '{backend}', json을 사용합니다.")
+    return MacroStore()
+
+
+# 앱 전체에서 공유하는 매크로 저장소 (MACRO_STORE_BACKEND: json | sqlite)
+macro_store = _create_store(MACRO_STORE_BACKEND)
@@ -1,40 +1,45 @@
 from __future__ import annotations
 
-import json
-import os
-import re
+import itertools
 import threading
 import time
-from typing import Dict, Any, List, Optional
-
-
-# macros.json 경로
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MACROS_PATH = os.path.join(BASE_DIR, "macros.json")
-
-# 여러 매크로 파일 지원 (데모 시나리오용)
-MACRO_FILES = {
-    "hello": os.path.join(BASE_DIR, "hello.json"),
-    "hifive": os.path.join(BASE_DIR, "hifive.json"),
-    "fighting": os.path.join(BASE_DIR, "fighting.json"),
-    "차렷자세": os.path.join(BASE_DIR, "hold.json"),
-    "김지찬 응원가": os.path.join(BASE_DIR, "kimjichan.json"),
-    "김도영 응원가": os.path.join(BASE_DIR, "kimdoyoung.json"),
-    "아웃(삐끼삐끼)": os.path.join(BASE_DIR, "out.json"),
-    "외쳐라 최강기아": os.path.join(BASE_DIR, "kia.json"),
-    "홈런": os.path.join(BASE_DIR, "homerun.json"),
-}
+from collections import OrderedDict
+from array import array
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, FrozenSet, Iterator, List, Optional, Tuple
 
-_macro_file_cache: Dict[str, Dict[str, Any]] = {}
-_macro_file_mtime: Dict[str, Optional[float]] = {key: None for key in MACRO_FILES}
-_macro_file_lock = threading.Lock()
+from macro_registry import macro_registry
+from event_matcher import load_event_matcher
+from macro_keyframes import expand_keyframes, is_keyframe_macro
 
-_macro_file_cache: Dict[str, Dict[str, Any]] = {}
-_macro_file_mtime: Dict[str, Optional[float]] = {key: None for key in MACRO_FILES}
-_macro_file_lock = threading.Lock()
+# 컴파일된 타임라인 캐시: (소스 경로, 매크로 이름) → (소스 stamp, 타임라인)
+_compiled_cache: Dict[Tuple[str, str], Tuple[Optional[float], "MacroTimeline"]] = {}
+_compiled_lock = threading.Lock()
 
 # 모터 ID 매핑 가져오기
-from config import MOTOR_ID_MAP
+from config import MOTOR_ID_MAP, MOTOR_GROUPS, MACRO_MAX_ACTIVE, MACRO_QUEUE_SIZE, MACRO_RUN_HISTORY
+
+# 모터 ID → 모터 그룹 이름
+_MOTOR_GROUP_BY_ID: Dict[int, str] = {
+    MOTOR_ID_MAP[key]: group for group, keys in MOTOR_GROUPS.items() for key in keys if key in MOTOR_ID_MAP
+}
+
+# 매크로 우선순위: 높은 우선순위 매크로는 실행 중인 낮은 우선순위 매크로를 중단시키고,
+# 같거나 낮은 우선순위는 대기열에서 차례를 기다립니다.
+MACRO_PRIORITY_LEVELS = {
+    "safety": 30,    # 기본 자세 복귀 등 안전 동작
+    "chant": 20,     # 응원가
+    "reaction": 10,  # 경기 이벤트 반응
+}
+MACRO_PRIORITY_BY_NAME = {
+    "차렷자세": "safety",
+    "김지찬 응원가": "chant",
+    "김도영 응원가": "chant",
+    "최강기아": "chant",
+    "외쳐라 최강기아": "chant",
+}
+DEFAULT_MACRO_PRIORITY = "reaction"
 
 
 def resolve_motor_id(motor_id_value: Any) -> int:
@@ -60,148 +65,121 @@ def resolve_motor_id(motor_id_value: Any) -> int:
     return int(motor_id_value)
 
 
-def _load_macros() -> Dict[str, Any]:
-    if not os.path.exists(MACROS_PATH):
-        return {"macros": {}}
-    try:
-        with open(MACROS_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict) or "macros" not in data:
-                return {"macros": {}}
-            return data
-    except Exception:
-        return {"macros": {}}
+# 이벤트 텍스트 → 매크로 이름 규칙 (event_keywords.json, 시작 시 한 번 컴파일)
+_event_matcher = load_event_matcher()
 
 
 def _normalize_event_name(text: str) -> str:
     """
     다양한 원본 텍스트(예: '삼진 아웃', '삼진아웃', '홈런', 'HR', 'strikeout', '볼넷', 'walk')를
     매크로 키로 사용할 표준 명칭으로 변환합니다.
-    우선순위: 한국어 키워드 우선, 이후 영어/코드 매핑.
+    우선순위: event_keywords.json의 순서 (한국어 키워드 우선, 이후 영어/코드 패턴).
     """
-    if not text:
-        return ""
-    t = str(text).strip().lower()
-
-    # 한글 키워드 우선 매핑
-    ko_map = {
-        "홈런": "홈런",
-        "아웃": "아웃",
-        "삼진": "삼진아웃",
-        "삼진아웃": "삼진아웃",
-        "스트라이크": "스트라이크",
-        "볼": "볼",
-        "볼넷": "볼넷",
-        "안타": "1루타",
-        "1루타": "1루타",
-        "2루타": "2루타",
-        "3루타": "3루타",
-        "도루": "도루",
-        "에러": "에러",
-        "실책": "에러",
-    }
-    for k, v in ko_map.items():
-        if k in t:
-            return v
-
-    # 영문/코드 패턴 매핑
-    patterns = [
-        (r"\bhr\b|home\s*run|homerun", "홈런"),
-        (r"\bso\b|strike\s*out|strikeout", "삼진아웃"),
-        (r"\bout\b", "아웃"),
-        (r"\bwalk\b|base\s*on\s*balls|bb\b", "볼넷"),
-        (r"\berror\b|e\b", "에러"),
-        (r"\bsingle\b|1b\b", "1루타"),
-        (r"\bdouble\b|2b\b", "2루타"),
-        (r"\btriple\b|3b\b", "3루타"),
-        (r"\bsteal\b|sb\b", "도루"),
-        (r"\bstrike\b", "스트라이크"),
-        (r"\bball\b", "볼"),
-    ]
-    for pat, name in patterns:
-        if re.search(pat, t):
-            return name
-
-    return ""
-
-
-def _get_macro_steps_by_name(name: str) -> List[Dict[str, Any]]:
-    data = _load_macros()
-    return data.get("macros", {}).get(name) or []
-
-
-def _get_macro_steps_by_event_text(event_text: str) -> List[Dict[str, Any]]:
-    key = _normalize_event_name(event_text)
-    if not key:
-        return []
-    return _get_macro_steps_by_name(key)
+    return _event_matcher.match(text)
 
 
 try:
-    from serial_api import _send_command  # type: ignore
+    from serial_api import send_pose_async, _ensure_open  # type: ignore
 except Exception:  # pragma: no cover
-    _send_command = None  # type: ignore
+    send_pose_async = None  # type: ignore
+    _ensure_open = None  # type: ignore
+
+from motion_scheduler import MotionScheduler, Playback, Pose
+
+# 모든 매크로 재생은 하나의 스케줄러 스레드가 절대 마감 시각 기준으로 실행
+_scheduler = MotionScheduler()
 
 # 전역 포트 오류 표시 플래그 (한 번만 출력)
 _global_port_error_shown = False
 _port_error_lock = threading.Lock()
 
 
+def _report_async_send_error(fut: Future) -> None:
+    """전송 스레드에서 실패한 명령의 오류를 한 번만 출력합니다."""
+    global _global_port_error_shown
+    if fut.cancelled() or fut.exception() is None:
+        return
+    with _port_error_lock:
+        if not _global_port_error_shown:
+            print(f"⚠️ 시리얼 명령 전송 실패: {fut.exception()}")
+            _global_port_error_shown = True
+
+
 def load_macro_file(file_key: str) -> Dict[str, Any]:
-    """특정 매크로 파일을 로드합니다 (캐싱 지원)"""
-    path = MACRO_FILES.get(file_key)
-    if not path:
+    """특정 매크로 파일의 매크로들을 반환합니다 (파일 키, 파일 이름 또는 경로)"""
+    src = macro_registry.source(file_key)
+    if src is None or src.macros is None:
         return {}
-    
-    with _macro_file_lock:
-        try:
-            mtime = os.path.getmtime(path)
-        except FileNotFoundError:
-            if file_key not in _macro_file_cache:
-                print(f"⚠️ {path} 파일을 찾을 수 없습니다.")
-            _macro_file_cache[file_key] = {}
-            _macro_file_mtime[file_key] = None
-            return _macro_file_cache[file_key]
-        except Exception as e:
-            print(f"✗ {path} 상태 확인 실패: {e}")
-            _macro_file_cache[file_key] = {}
-            _macro_file_mtime[file_key] = None
-            return _macro_file_cache[file_key]
-
-        if file_key in _macro_file_cache and _macro_file_mtime.get(file_key) == mtime:
-            return _macro_file_cache[file_key]
+    return src.macros
 
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                macros = data.get("macros", {})
-                if not isinstance(macros, dict):
-                    macros = {}
-                _macro_file_cache[file_key] = macros
-                _macro_file_mtime[file_key] = mtime
-                print(f"✓ {os.path.basename(path)} 로드 완료: {len(macros)}개 매크로")
-                return macros
-        except Exception as e:
-            print(f"✗ {path} 로드 실패: {e}")
-            _macro_file_cache[file_key] = {}
-            _macro_file_mtime[file_key] = None
-            return _macro_file_cache[file_key]
 
+@dataclass(frozen=True)
+class MacroTimeline:
+    """
+    로드 시점에 한 번 검증/변환된 매크로입니다.
+    스텝 i는 times_ms[i] (매크로 시작 기준 절대 시각)에 전송되며,
+    각 열은 정수 배열로 보관되어 재생 시 문자열 조회나 변환이 없습니다.
+    """
 
-def _run_macro_steps_with_error_handling(steps: List[Dict[str, Any]]) -> bool:
-    """매크로 스텝을 실행합니다 (에러 핸들링 포함)"""
-    global _global_port_error_shown
-    if not isinstance(steps, list) or not steps:
-        print("✗ 매크로 스텝이 비어있거나 유효하지 않습니다")
-        return False
-    if _send_command is None:
-        print("✗ 시리얼 제어 모듈(_send_command) 미준비")
-        return False
-    
-    # 포트 연결 상태 추적
-    port_was_disconnected = False
-    
-    for idx, step in enumerate(steps):
+    times_ms: array
+    motor_ids: array
+    positions: array
+    speeds: array
+    duration_ms: int
+
+    def __len__(self) -> int:
+        return len(self.times_ms)
+
+    def poses(self) -> Iterator[Tuple[int, List[Tuple[int, int, int]], int]]:
+        """
+        같은 시각의 스텝을 하나의 포즈로 묶어 (시각 ms, [(모터 ID, 위치, 속도), ...], 다음 포즈까지 대기 ms)를 돌려줍니다.
+        마지막 포즈의 대기는 매크로 끝(duration_ms)까지입니다.
+        """
+        n = len(self.times_ms)
+        i = 0
+        while i < n:
+            at = self.times_ms[i]
+            j = i
+            while j < n and self.times_ms[j] == at:
+                j += 1
+            pose = [(self.motor_ids[k], self.positions[k], self.speeds[k]) for k in range(i, j)]
+            next_at = self.times_ms[j] if j < n else self.duration_ms
+            yield at, pose, next_at - at
+            i = j
+
+
+def _compile_keyframes(spec: Dict[str, Any], label: str = "") -> MacroTimeline:
+    """키프레임 매크로를 제어 주기 간격의 스텝으로 펼쳐 컴파일합니다 (형식 오류 시 빈 타임라인)."""
+    times = array("q")
+    motor_ids = array("i")
+    positions = array("i")
+    speeds = array("i")
+    try:
+        steps, duration_ms = expand_keyframes(spec, resolve_motor_id)
+    except Exception as e:
+        print(f"✗ 키프레임 매크로{f' {label}' if label else ''} 파싱 실패: {e}")
+        return MacroTimeline(times, motor_ids, positions, speeds, 0)
+    for at, motor_id, position, speed in steps:
+        times.append(at)
+        motor_ids.append(motor_id)
+        positions.append(position)
+        speeds.append(speed)
+    return MacroTimeline(times, motor_ids, positions, speeds, duration_ms)
+
+
+def compile_macro(steps: Any, label: str = "") -> MacroTimeline:
+    """
+    스텝 목록(또는 키프레임 매크로)을 MacroTimeline으로 컴파일합니다.
+    해석할 수 없는 스텝은 경고를 출력하고 건너뜁니다.
+    """
+    if is_keyframe_macro(steps):
+        return _compile_keyframes(steps, label)
+    times = array("q")
+    motor_ids = array("i")
+    positions = array("i")
+    speeds = array("i")
+    at = 0
+    for idx, step in enumerate(steps if isinstance(steps, list) else []):
         try:
             motor_id = resolve_motor_id(step.get("motor_id"))
             position = int(step.get("position"))
@@ -210,20 +188,75 @@ def _run_macro_steps_with_error_handling(steps: List[Dict[str, Any]]) -> bool:
             delay_raw = step.get("delay_ms", 200)
             delay_ms = int(delay_raw) if str(delay_raw).lstrip("-").isdigit() else 200
         except Exception as e:
-            print(f"✗ 매크로 스텝 {idx+1}/{len(steps)} 파싱 실패: {e}")
+            print(f"✗ 매크로{f' {label}' if label else ''} 스텝 {idx+1}/{len(steps)} 파싱 실패: {e}")
             print(f"  스텝 데이터: {step}")
             continue
-        
-        # 명령 전송 시도 (매 스텝마다 포트 연결 재시도)
+        times.append(at)
+        motor_ids.append(motor_id)
+        positions.append(position)
+        speeds.append(speed)
+        at += max(0, delay_ms)
+    return MacroTimeline(times, motor_ids, positions, speeds, at)
+
+
+def _get_compiled(source: str, name: str, stamp: Optional[float], steps: Any) -> MacroTimeline:
+    key = (source, name)
+    with _compiled_lock:
+        cached = _compiled_cache.get(key)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            return cached[1]
+    timeline = compile_macro(steps, label=f"'{name}'")
+    with _compiled_lock:
+        _compiled_cache[key] = (stamp, timeline)
+    return timeline
+
+
+def get_compiled_macro(name: str) -> Optional[MacroTimeline]:
+    """모든 매크로 파일에서 이름으로 찾아 컴파일된 타임라인을 반환합니다 (파일이 바뀌지 않았으면 캐시 사용)."""
+    entry = macro_registry.get(name)
+    if entry is None or not entry[1]:
+        return None
+    src, steps = entry
+    timeline = _get_compiled(src.path, name, src.stamp, steps)
+    return timeline if len(timeline) else None
+
+
+def get_compiled_file_macro(file_key: str, macro_name: str) -> Optional[MacroTimeline]:
+    """특정 매크로 파일의 매크로를 컴파일된 타임라인으로 반환합니다."""
+    src = macro_registry.source(file_key)
+    steps = (src.macros or {}).get(macro_name) if src is not None else None
+    if not steps:
+        return None
+    timeline = _get_compiled(src.path, macro_name, src.stamp, steps)
+    return timeline if len(timeline) else None
+
+
+def _make_reporting_sender(label: str, on_error: Optional[Callable[[str], None]] = None) -> Callable[[Pose], List[Future]]:
+    """
+    포트 오류를 한 번만 출력하고 시뮬레이션 모드로 계속 진행하는 전송 함수를 만듭니다.
+    스케줄러 스레드를 막지 않도록 첫 연결도 기다리지 않습니다.
+    on_error: 전송하지 못한 포즈마다 오류 메시지와 함께 호출 (실행 기록용)
+    """
+    port_was_disconnected = False
+
+    def _send(pose: Pose) -> List[Future]:
+        global _global_port_error_shown
+        nonlocal port_was_disconnected
+        # 명령 전송 시도 (매 포즈마다 포트 연결 확인, 응답은 기다리지 않고 전송 스레드에 맡김)
         try:
-            _send_command(motor_id, position, speed)
+            futures = send_pose_async(pose, connect_wait=0)
+            for fut in futures:
+                fut.add_done_callback(_report_async_send_error)
             # 포트가 이전에 끊겼다가 다시 연결된 경우
             if port_was_disconnected:
                 print(f"✓ 시리얼 포트 연결 성공 - 정상 동작 재개")
                 port_was_disconnected = False
+            return futures
         except RuntimeError as e:
             # 시리얼 포트 연결 실패
             error_msg = str(e)
+            if on_error is not None:
+                on_error(error_msg)
             if ("시리얼 포트" in error_msg or "serial" in error_msg.lower()):
                 with _port_error_lock:
                     if not _global_port_error_shown:
@@ -236,94 +269,374 @@ def _run_macro_steps_with_error_handling(steps: List[Dict[str, Any]]) -> bool:
                 # 기타 예외는 한 번만 출력
                 with _port_error_lock:
                     if not _global_port_error_shown:
-                        print(f"✗ 매크로 스텝 {idx+1}/{len(steps)} 전송 실패: {type(e).__name__}: {e}")
+                        print(f"✗ 매크로 {label} 포즈 {pose} 전송 실패: {type(e).__name__}: {e}")
                         _global_port_error_shown = True
-        
-        # delay는 항상 실행 (시뮬레이션 모드에서도 시간 흐름 유지)
-        time.sleep(max(0, delay_ms) / 1000.0)
-    
-    # 포트 연결 실패했어도 매크로는 "성공"으로 처리 (시뮬레이션 모드)
-    return True
+            # delay는 항상 유지 (시뮬레이션 모드에서도 시간 흐름 유지)
+            return []
+
+    return _send
+
 
+def _print_playback_result(playback: Playback) -> None:
+    report = playback.report()
+    if playback.error is not None:
+        print(f"✗ {playback.label} 매크로 실행 실패: {type(playback.error).__name__}: {playback.error}")
+        return
+    print(
+        f"→ {playback.label} 매크로 실행 완료 "
+        f"(포즈 {report['steps']}개, 지연 평균 {report['mean_ms']:.2f}ms / 최대 {report['max_ms']:.2f}ms)"
+    )
+
+
+def macro_priority(name: str) -> str:
+    """매크로 이름에 해당하는 우선순위 이름을 반환합니다."""
+    return MACRO_PRIORITY_BY_NAME.get(name, DEFAULT_MACRO_PRIORITY)
+
+
+def motor_groups_of(timeline: MacroTimeline) -> FrozenSet[str]:
+    """타임라인이 움직이는 모터 그룹들 (MOTOR_GROUPS에 없는 모터는 모터 하나가 한 그룹)"""
+    return frozenset(_MOTOR_GROUP_BY_ID.get(motor_id, f"motor:{motor_id}") for motor_id in set(timeline.motor_ids))
+
+
+class MacroRun:
+    """실행기에 제출된 매크로 실행 요청 하나 (대기 → 실행 → 완료/실패/중단/거절)"""
+
+    _ids = itertools.count(1)
+    MAX_SERIAL_ERRORS = 20
+
+    def __init__(self, label: str, timeline: MacroTimeline, priority: str,
+                 send: Callable[[Pose], Any], report: bool = True) -> None:
+        if priority not in MACRO_PRIORITY_LEVELS:
+            raise ValueError(f"unknown_priority: {priority}")
+        self.id = f"{int(time.time()):x}-{next(self._ids)}"
+        self.label = label
+        self.timeline = timeline
+        self.priority = priority
+        self.level = MACRO_PRIORITY_LEVELS[priority]
+        self.groups = motor_groups_of(timeline)
+        self.state = "queued"
+        self.playback: Optional[Playback] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.serial_errors: List[str] = []
+        self.serial_error_count = 0
+        self._send = send
+        self._report = report
+        self._done = threading.Event()
+        self._finish_lock = threading.Lock()
+        self._errors_lock = threading.Lock()
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self.playback.error if self.playback is not None else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def record_serial_error(self, message: str) -> None:
+        """전송 실패를 기록합니다 (최근 MAX_SERIAL_ERRORS개의 메시지와 전체 개수)."""
+        with self._errors_lock:
+            self.serial_error_count += 1
+            self.serial_errors.append(message)
+            del self.serial_errors[:-self.MAX_SERIAL_ERRORS]
+
+    def _send_pose(self, pose: Pose) -> Any:
+        result = self._send(pose)
+        if isinstance(result, list):
+            for fut in result:
+                if isinstance(fut, Future):
+                    fut.add_done_callback(self._on_send_done)
+        return result
+
+    def _on_send_done(self, fut: Future) -> None:
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            self.record_serial_error(str(fut.exception()))
+            return
+        resp = str(fut.result())
+        if resp.startswith("Error"):
+            self.record_serial_error(resp)
+        elif resp == "":
+            self.record_serial_error("응답 없음 (시간 초과)")
+
+    def _finish(self, state: str) -> bool:
+        """최종 상태를 정합니다. 먼저 정해진 상태가 이기며 (중단 후 도착한 재생 완료 등), 정했으면 True"""
+        with self._finish_lock:
+            if self._done.is_set():
+                return False
+            self.state = state
+            self.finished_at = time.time()
+            self._done.set()
+            return True
+
+    def to_dict(self, include_steps: bool = True) -> Dict[str, Any]:
+        """실행 상태 조회 API용 요약. 스텝별 계획 시각과 실제 전송 시각(매크로 시작 기준 ms)을 포함합니다."""
+        playback = self.playback
+        poses = list(self.timeline.poses())
+        info: Dict[str, Any] = {
+            "id": self.id,
+            "name": self.label,
+            "priority": self.priority,
+            "groups": sorted(self.groups),
+            "state": self.state,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_ms": self.timeline.duration_ms,
+            "current_step": playback.current_step if playback is not None else 0,
+            "total_steps": len(poses),
+            "lateness": playback.report() if playback is not None else None,
+            "error": f"{type(self.error).__name__}: {self.error}" if self.error is not None else None,
+            "serial_error_count": self.serial_error_count,
+            "serial_errors": list(self.serial_errors),
+        }
+        if include_steps:
+            lateness = list(playback.lateness_ms) if playback is not None else []
+            info["steps"] = [
+                {
+                    "index": i,
+                    "planned_ms": at,
+                    "actual_ms": round(at + lateness[i], 3) if i < len(lateness) else None,
+                    "lateness_ms": round(lateness[i], 3) if i < len(lateness) else None,
+                    "motors": len(pose),
+                }
+                for i, (at, pose, _) in enumerate(poses)
+            ]
+        return info
+
+
+class MacroRunHistory:
+    """최근 매크로 실행을 ID로 찾을 수 있게 보관하는 고정 크기 버퍼 (가장 오래된 것부터 버림)"""
+
+    def __init__(self, max_runs: int) -> None:
+        self._max_runs = max(1, max_runs)
+        self._runs: "OrderedDict[str, MacroRun]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, run: MacroRun) -> None:
+        with self._lock:
+            self._runs[run.id] = run
+            while len(self._runs) > self._max_runs:
+                self._runs.popitem(last=False)
+
+    def get(self, run_id: str) -> Optional[MacroRun]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def recent(self, limit: int = 20) -> List[MacroRun]:
+        """최근 실행부터"""
+        with self._lock:
+            runs = list(self._runs.values())
+        return runs[::-1][:max(0, limit)]
+
+
+class MacroExecutor:
+    """
+    매크로 재생을 모터 그룹(MOTOR_GROUPS) 단위로 관리하는 실행기입니다.
+    사용하는 모터 그룹이 겹치지 않는 매크로는 최대 max_active개까지 함께 재생되며,
+    스케줄러가 각 포즈를 시각 순으로 섞어 하나의 시리얼 스트림으로 내보냅니다.
+    그룹이 겹치거나 자리가 없으면, 새 요청이 비켜야 할 매크로들보다 모두 높은 우선순위일 때
+    그것들을 중단시키고 바로 시작하고, 그렇지 않으면 대기열(우선순위 → 도착 순)에서 기다립니다.
+    대기열이 가득 차거나 같은 매크로가 이미 대기 중이면 거절합니다.
+    """
 
-def trigger_macro(file_key: str, macro_name: str) -> bool:
+    def __init__(self, scheduler: MotionScheduler, max_active: int, max_queued: int,
+                 history: Optional[MacroRunHistory] = None) -> None:
+        self._scheduler = scheduler
+        self.history = history or MacroRunHistory(MACRO_RUN_HISTORY)
+        self._max_active = max(1, max_active)
+        self._max_queued = max(0, max_queued)
+        self._active: List[MacroRun] = []
+        self._queue: List[MacroRun] = []
+        self._lock = threading.Lock()
+
+    def _blockers(self, run: MacroRun) -> List[MacroRun]:
+        """run을 시작하려면 비켜야 하는 실행 중 매크로들 (self._lock을 잡은 상태에서 호출)"""
+        blockers = [a for a in self._active if a.groups & run.groups]
+        if len(self._active) - len(blockers) >= self._max_active:
+            others = [a for a in self._active if a not in blockers]
+            blockers.append(min(others, key=lambda r: r.level))
+        return blockers
+
+    def submit(self, run: MacroRun) -> bool:
+        self.history.add(run)
+        with self._lock:
+            preempted = self._blockers(run)
+            if preempted and not all(run.level > b.level for b in preempted):
+                if len(self._queue) >= self._max_queued or any(q.label == run.label for q in self._queue):
+                    print(f"⚠️ 매크로 '{run.label}' 거절: 대기열이 가득 찼거나 이미 대기 중입니다")
+                    run._finish("rejected")
+                    return False
+                self._queue.append(run)
+                self._queue.sort(key=lambda r: -r.level)
+                print(f"… 매크로 '{run.label}' 대기 ({run.priority}, 대기 {len(self._queue)}개)")
+                return True
+            for victim in preempted:
+                self._active.remove(victim)
+            self._start(run)
+        for victim in preempted:
+            print(f"⏹ 매크로 '{victim.label}'({victim.priority}) 중단 → '{run.label}'({run.priority}) 실행")
+            # 취소하면 스케줄러가 on_done을 부르므로, 그보다 먼저 중단 상태를 정해 둠
+            victim._finish("preempted")
+            if victim.playback is not None:
+                victim.playback.cancel()
+        return True
+
+    def _start(self, run: MacroRun) -> None:
+        # self._lock을 잡은 상태에서 호출
+        run.state = "running"
+        run.started_at = time.time()
+        self._active.append(run)
+        run.playback = self._scheduler.play(
+            run.timeline, run._send_pose, label=run.label, on_done=lambda pb, r=run: self._on_playback_done(r)
+        )
+
+    def _on_playback_done(self, run: MacroRun) -> None:
+        with self._lock:
+            if run in self._active:
+                self._active.remove(run)
+            # 우선순위 순으로, 실행 중인 매크로와 그룹이 겹치지 않는 대기 매크로를 시작
+            for queued in list(self._queue):
+                if len(self._active) >= self._max_active:
+                    break
+                if not self._blockers(queued):
+                    self._queue.remove(queued)
+                    self._start(queued)
+        if run.state == "preempted":
+            return
+        finished = run._finish("failed" if run.error is not None else "done")
+        if finished and run._report and run.playback is not None:
+            _print_playback_result(run.playback)
+
+
+_executor = MacroExecutor(_scheduler, MACRO_MAX_ACTIVE, MACRO_QUEUE_SIZE)
+
+
+def _play_timeline(timeline: MacroTimeline, label: str, priority: Optional[str] = None) -> Optional[MacroRun]:
+    """컴파일된 매크로를 실행기에 제출합니다 (포트 오류는 시뮬레이션 모드로 처리)."""
+    if not len(timeline):
+        print("✗ 매크로 스텝이 비어있거나 유효하지 않습니다")
+        return None
+    if send_pose_async is None:
+        print("✗ 시리얼 제어 모듈(send_pose_async) 미준비")
+        return None
+    # 포트 연결 실패했어도 매크로는 "성공"으로 처리 (시뮬레이션 모드), 오류는 실행 기록에 남김
+    run = MacroRun(
+        label, timeline, priority or macro_priority(label),
+        _make_reporting_sender(label, on_error=lambda message: run.record_serial_error(message)),
+    )
+    return run if _executor.submit(run) else None
+
+
+def trigger_macro(file_key: str, macro_name: str, priority: Optional[str] = None) -> bool:
     """특정 매크로 파일에서 매크로를 실행합니다"""
     macros = load_macro_file(file_key)
     if not macros:
         print(f"⚠️ 매크로 파일 '{file_key}'를 로드할 수 없거나 비어있습니다.")
-        print(f"  → MACRO_FILES에 '{file_key}' 키가 있는지 확인하세요.")
+        print(f"  → 매크로 디렉터리({macro_registry.directory})에 '{file_key}' 파일이 있는지 확인하세요.")
         return False
     
-    steps = macros.get(macro_name)
-    if not steps:
+    timeline = get_compiled_file_macro(file_key, macro_name)
+    if timeline is None:
         print(f"⚠️ {file_key}에 '{macro_name}' 매크로가 없습니다.")
         print(f"  → 사용 가능한 매크로: {list(macros.keys())}")
         return False
 
-    def _runner():
-        success = _run_macro_steps_with_error_handling(steps)
-        if success:
-            print(f"→ {file_key} 매크로('{macro_name}') 실행 완료")
-        else:
-            print(f"✗ {file_key} 매크로('{macro_name}') 실행 실패")
+    return _play_timeline(timeline, macro_name, priority or macro_priority(macro_name)) is not None
 
-    threading.Thread(target=_runner, daemon=True).start()
-    return True
 
+def start_macro_run(name: str, priority: Optional[str] = None) -> Optional[MacroRun]:
+    """이름으로 매크로를 비동기 실행하고 실행 기록(MacroRun)을 반환합니다 (실패/거절 시 None)."""
+    timeline = get_compiled_macro(name)
+    if timeline is None:
+        return None
+    return _play_timeline(timeline, name, priority)
 
-def _run_steps_blocking(steps: List[Dict[str, Any]]) -> None:
-    if _send_command is None:
-        return
-    for s in steps:
-        motor_id = resolve_motor_id(s.get("motor_id"))
-        position = int(s.get("position"))
-        speed = int(s.get("speed", 0)) if str(s.get("speed", "")).isdigit() else 0
-        delay_ms = int(s.get("delay_ms")) if str(s.get("delay_ms")).isdigit() else 200
-        try:
-            _send_command(motor_id, position, speed)
-        finally:
-            time.sleep(max(0, delay_ms) / 1000.0)
 
+def run_macro_by_name_async(name: str, priority: Optional[str] = None) -> bool:
+    return start_macro_run(name, priority) is not None
 
-def _run_steps_blocking_strict(steps: List[Dict[str, Any]]) -> None:
-    """시리얼이 불가하면 예외를 발생시켜 호출자가 실패를 알 수 있게 합니다."""
-    if _send_command is None:
-        raise RuntimeError("serial_unavailable")
-    for s in steps:
-        motor_id = resolve_motor_id(s.get("motor_id"))
-        position = int(s.get("position"))
-        speed = int(s.get("speed", 0)) if str(s.get("speed", "")).isdigit() else 0
-        delay_ms = int(s.get("delay_ms")) if str(s.get("delay_ms")).isdigit() else 200
-        try:
-            _send_command(motor_id, position, speed)
-        finally:
-            time.sleep(max(0, delay_ms) / 1000.0)
 
+def get_macro_run(run_id: str) -> Optional[MacroRun]:
+    return _executor.history.get(run_id)
 
-def run_macro_by_name_async(name: str) -> bool:
-    steps = _get_macro_steps_by_name(name)
-    if not steps:
-        return False
-    th = threading.Thread(target=_run_steps_blocking, args=(steps,), daemon=True)
-    th.start()
-    return True
+
+def recent_macro_runs(limit: int = 20) -> List[MacroRun]:
+    return _executor.history.recent(limit)
 
 
 def run_macro_by_event_text_async(event_text: str) -> bool:
-    steps = _get_macro_steps_by_event_text(event_text)
-    if not steps:
+    key = _normalize_event_name(event_text)
+    if not key:
         return False
-    th = threading.Thread(target=_run_steps_blocking, args=(steps,), daemon=True)
-    th.start()
-    return True
+    return run_macro_by_name_async(key)
 
 
-def run_macro_by_name_blocking(name: str) -> None:
+def run_macro_by_name_blocking(name: str, priority: Optional[str] = None) -> None:
     """매크로를 동기적으로 실행합니다. 실패 시 예외를 던집니다."""
-    steps = _get_macro_steps_by_name(name)
-    if not steps:
+    timeline = get_compiled_macro(name)
+    if timeline is None:
         raise ValueError("not_found_or_empty")
-    _run_steps_blocking_strict(steps)
+    if send_pose_async is None:
+        raise RuntimeError("serial_unavailable")
+    # 호출자 스레드에서 연결을 먼저 확인해(첫 연결은 기다림), 연결이 없으면 바로 실패를 알립니다
+    _ensure_open()
+    pending: List[Future] = []
+    run = MacroRun(
+        name, timeline, priority or macro_priority(name),
+        lambda pose: pending.extend(send_pose_async(pose, connect_wait=0)), report=False,
+    )
+    if not _executor.submit(run):
+        raise RuntimeError("macro_queue_full")
+    run.wait()
+    if run.state == "preempted":
+        raise RuntimeError("preempted")
+    if run.error is not None:
+        raise run.error
+    # 스텝은 응답을 기다리지 않고 흘려보내고, 마지막에 전송 오류를 모아서 확인
+    for fut in pending:
+        fut.result()
+
+
+class EventDispatcher:
+    """
+    이벤트 시퀀스 번호마다 매크로를 정확히 한 번만 실행합니다.
+    여러 클라이언트가 같은 상태를 반복해서 폴링해도, 소스별로 이전보다 큰
+    시퀀스 번호가 처음 관측될 때만 트리거합니다.
+    """
+
+    def __init__(self) -> None:
+        self._last_seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def mark_seen(self, source: str, seq: int) -> None:
+        """seq까지는 이미 처리한 것으로 표시합니다 (재시작 후 복구한 이벤트를 다시 실행하지 않도록)."""
+        with self._lock:
+            self._last_seq[source] = max(seq, self._last_seq.get(source, -1))
+
+    def last_seen(self, source: str) -> int:
+        """소스별로 마지막으로 처리한 시퀀스 번호 (없으면 -1)"""
+        with self._lock:
+            return self._last_seq.get(source, -1)
+
+    def forget(self, source: str) -> None:
+        """더 이상 추적하지 않는 소스의 기록을 지웁니다."""
+        with self._lock:
+            self._last_seq.pop(source, None)
+
+    def dispatch(self, source: str, seq: int, trigger_text: str) -> bool:
+        with self._lock:
+            if seq <= self._last_seq.get(source, -1):
+                return False
+            self._last_seq[source] = seq
+        if not trigger_text:
+            return False
+        return run_macro_by_event_text_async(trigger_text)
+
+
+event_dispatcher = EventDispatcher()
 
 
 def last_event_to_trigger_text(last_event: Optional[Dict[str, Any]]) -> str:
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-import json
-import os
-import time
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional
 
 from flask import Blueprint, jsonify, request, render_template
-from macros_executor import run_macro_by_name_async, run_macro_by_event_text_async, run_macro_by_name_blocking
+from macros_executor import run_macro_by_event_text_async, run_macro_by_name_blocking
+from macros_executor import MACRO_PRIORITY_LEVELS, start_macro_run, get_macro_run, recent_macro_runs
 from config import MOTOR_ID_MAP
+from macro_store import MacroVersionConflict, macro_store
+from macro_registry import macro_registry
+from macro_sim import analyze_macro
 
 try:
     from serial_api import _send_command
@@ -18,27 +19,13 @@ except Exception:
 macros_bp = Blueprint("macros", __name__)
 
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MACROS_PATH = os.path.join(BASE_DIR, "macros.json")
-
-
 def load_macros() -> Dict[str, Any]:
-    if not os.path.exists(MACROS_PATH):
-        return {"macros": {}}
-    try:
-        with open(MACROS_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict) or "macros" not in data:
-                return {"macros": {}}
-            return data
-    except Exception:
-        return {"macros": {}}
+    """공유 저장소의 캐시된 macros.json 데이터 (읽기 전용)"""
+    return macro_store.load()
 
 
 def save_macros(data: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(MACROS_PATH), exist_ok=True)
-    with open(MACROS_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    macro_store.save(data)
 
 
 @macros_bp.route("/macros")
@@ -58,7 +45,22 @@ def api_get_macro(name: str):
     steps = data.get("macros", {}).get(name)
     if steps is None:
         return jsonify({"ok": False, "error": "not_found"}), 404
-    return jsonify({"ok": True, "name": name, "steps": steps})
+    return jsonify({"ok": True, "name": name, "steps": steps, "version": macro_store.macro_version(name)})
+
+
+def _version_arg(value: Any) -> Optional[int]:
+    """요청의 version 값 (없으면 None). 0 이상의 정수가 아니면 ValueError"""
+    if value is None or value == "":
+        return None
+    # JSON의 true/리스트/객체 등은 int()가 받아들이거나 TypeError를 내므로 먼저 거름
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(value)
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    version = int(value)
+    if version < 0:
+        raise ValueError(value)
+    return version
 
 
 @macros_bp.route("/api/macros", methods=["POST"])
@@ -73,18 +75,29 @@ def api_save_macro():
     ):
         return jsonify({"ok": False, "error": "invalid_steps"}), 400
 
-    data = load_macros()
-    data.setdefault("macros", {})[name] = steps
-    save_macros(data)
-    return jsonify({"ok": True})
+    # version: 편집을 시작할 때 받은 매크로 버전 (새 매크로는 0). 그 사이 바뀌었으면 409
+    try:
+        expected = _version_arg(body.get("version"))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_version"}), 400
+    try:
+        version = macro_store.set_macro(name, steps, expected)
+    except MacroVersionConflict as conflict:
+        return jsonify({"ok": False, "error": "version_conflict", "version": conflict.current}), 409
+    return jsonify({"ok": True, "version": version})
 
 
 @macros_bp.route("/api/macros/<name>", methods=["DELETE"])
 def api_delete_macro(name: str):
-    data = load_macros()
-    if name in data.get("macros", {}):
-        del data["macros"][name]
-        save_macros(data)
+    try:
+        expected = _version_arg(request.args.get("version"))
+    except ValueError:
+        return jsonify({"ok": False, "error": "invalid_version"}), 400
+    try:
+        deleted = macro_store.delete_macro(name, expected)
+    except MacroVersionConflict as conflict:
+        return jsonify({"ok": False, "error": "version_conflict", "version": conflict.current}), 409
+    if deleted:
         return jsonify({"ok": True})
     return jsonify({"ok": False, "error": "not_found"}), 404
 
@@ -95,16 +108,19 @@ def api_run_macro():
     name = str(body.get("name") or "").strip()
     if not name:
         return jsonify({"ok": False, "error": "missing_name"}), 400
-    data = load_macros()
-    steps: List[Dict[str, Any]] = data.get("macros", {}).get(name) or []
-    if not steps:
+    priority = body.get("priority")
+    if priority is not None and priority not in MACRO_PRIORITY_LEVELS:
+        return jsonify({"ok": False, "error": "invalid_priority"}), 400
+    # macros.json 외에 매크로 디렉터리의 모든 파일에서 이름으로 찾음
+    entry = macro_registry.get(name)
+    if entry is None or not entry[1]:
         return jsonify({"ok": False, "error": "not_found_or_empty"}), 404
 
-    # 비동기로 실행을 전환하여 HTTP 응답 지연 최소화
-    ok = run_macro_by_name_async(name)
-    if not ok:
+    # 비동기로 실행을 전환하여 HTTP 응답 지연 최소화 (진행 상황은 /api/macros/runs/<run_id>로 조회)
+    run = start_macro_run(name, priority)
+    if run is None:
         return jsonify({"ok": False, "error": "run_failed"}), 500
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "run_id": run.id, "state": run.state})
 
 
 @macros_bp.route("/api/macros/run-sync", methods=["POST"])
@@ -113,13 +129,55 @@ def api_run_macro_sync():
     name = str(body.get("name") or "").strip()
     if not name:
         return jsonify({"ok": False, "error": "missing_name"}), 400
+    priority = body.get("priority")
+    if priority is not None and priority not in MACRO_PRIORITY_LEVELS:
+        return jsonify({"ok": False, "error": "invalid_priority"}), 400
     try:
-        run_macro_by_name_blocking(name)
+        run_macro_by_name_blocking(name, priority)
         return jsonify({"ok": True})
     except ValueError as ve:
         return jsonify({"ok": False, "error": str(ve) or "not_found_or_empty"}), 404
     except Exception as e:
         return jsonify({"ok": False, "error": str(e) or "run_failed"}), 500
+
+
+@macros_bp.route("/api/macros/runs", methods=["GET"])
+def api_list_macro_runs():
+    """최근 매크로 실행 목록 (스텝 상세 제외)"""
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        limit = 20
+    return jsonify({"ok": True, "runs": [run.to_dict(include_steps=False) for run in recent_macro_runs(limit)]})
+
+
+@macros_bp.route("/api/macros/runs/<run_id>", methods=["GET"])
+def api_get_macro_run(run_id: str):
+    """매크로 실행 상태, 현재 스텝, 스텝별 계획/실제 전송 시각, 시리얼 오류"""
+    run = get_macro_run(run_id)
+    if run is None:
+        return jsonify({"ok": False, "error": "not_found"}), 404
+    return jsonify({"ok": True, "run": run.to_dict()})
+
+
+@macros_bp.route("/api/macros/<name>/analyze", methods=["GET"])
+def api_analyze_macro(name: str):
+    """
+    매크로를 하드웨어 없이 가상 재생해 길이, 모터별 궤적, 최대 명령 빈도, 시리얼 바이트를 반환합니다.
+    ?file=<파일 키>로 특정 매크로 파일을 지정하고, ?series=0이면 궤적을 생략합니다.
+    """
+    file_key = (request.args.get("file") or "").strip() or None
+    result = analyze_macro(name, file_key)
+    if result is None:
+        return jsonify({"ok": False, "error": "not_found"}), 404
+    if request.args.get("series") == "0":
+        result = {
+            **result,
+            "motors": {mid: {k: v for k, v in m.items() if k != "series"} for mid, m in result["motors"].items()},
+        }
+    return jsonify({"ok": True, **result})
+
+
 @macros_bp.route("/api/macros/export", methods=["GET"])
 def api_export_macros():
     data = load_macros()
@@ -132,7 +190,7 @@ def api_import_macros():
     macros = body.get("macros")
     if not isinstance(macros, dict):
         return jsonify({"ok": False, "error": "invalid_macros"}), 400
-    save_macros({"macros": macros})
+    macro_store.replace_all(macros)
     return jsonify({"ok": True})
 
 
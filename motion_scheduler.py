@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Pose = List[Tuple[int, int, int]]
+SendFn = Callable[[Pose], Any]
+
+# 마감 시각 직전 이 시간(초)부터는 sleep 대신 바쁜 대기로 정밀하게 맞춥니다
+SPIN_THRESHOLD = 0.001
+
+
+class Playback:
+    """
+    스케줄러에 등록된 매크로 재생 하나입니다.
+    각 포즈는 시작 시각 + 타임라인 절대 시각(ms)에 전송되며,
+    실제 전송 시각과 마감 시각의 차이를 lateness_ms에 기록합니다.
+    """
+
+    def __init__(self, timeline, send: SendFn, label: str = "",
+                 on_done: Optional[Callable[["Playback"], None]] = None) -> None:
+        self.timeline = timeline
+        self.label = label
+        self.lateness_ms: List[float] = []
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        self.started_at: Optional[float] = None
+        self._poses = list(timeline.poses())
+        self._send = send
+        self._on_done = on_done
+        self._index = 0
+        self._done = threading.Event()
+
+    @property
+    def is_done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def current_step(self) -> int:
+        """지금까지 전송한 포즈 수"""
+        return self._index
+
+    @property
+    def total_steps(self) -> int:
+        return len(self._poses)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """남은 포즈를 전송하지 않고 재생을 끝냅니다 (다음 마감 시각에 반영)."""
+        self.cancelled = True
+
+    def report(self) -> Dict[str, float]:
+        """포즈별 지연(마감 대비 실제 전송 시각) 요약"""
+        lateness = sorted(self.lateness_ms)
+        if not lateness:
+            return {"steps": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "steps": len(lateness),
+            "mean_ms": sum(lateness) / len(lateness),
+            "p95_ms": lateness[min(len(lateness) - 1, int(0.95 * (len(lateness) - 1) + 0.5))],
+            "max_ms": lateness[-1],
+        }
+
+    def _next_deadline(self) -> float:
+        if self._index < len(self._poses):
+            return self.started_at + self._poses[self._index][0] / 1000.0
+        return self.started_at + self.timeline.duration_ms / 1000.0
+
+    def _fire(self, deadline: float) -> None:
+        _, pose, _ = self._poses[self._index]
+        self.lateness_ms.append((time.perf_counter() - deadline) * 1000.0)
+        self._index += 1
+        self._send(pose)
+
+    def _finish(self) -> None:
+        if self._done.is_set():
+            return
+        self._done.set()
+        if self._on_done is not None:
+            try:
+                self._on_done(self)
+            except Exception as e:
+                print(f"✗ 매크로 완료 처리 실패 ({self.label}): {type(e).__name__}: {e}")
+
+
+class MotionScheduler:
+    """
+    모든 매크로 재생을 하나의 스레드에서 절대 마감 시각(perf_counter) 기준으로 실행합니다.
+    전송은 비동기(Future 반환)라 시리얼 지연이 다음 스텝 시각을 밀어내지 않고,
+    매 스텝의 오차가 누적되지 않습니다.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Playback]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def play(self, timeline, send: SendFn, label: str = "",
+             on_done: Optional[Callable[[Playback], None]] = None,
+             start_at: Optional[float] = None) -> Playback:
+        """타임라인 재생을 등록합니다. start_at(perf_counter)을 생략하면 즉시 시작합니다."""
+        playback = Playback(timeline, send, label=label, on_done=on_done)
+        playback.started_at = time.perf_counter() if start_at is None else start_at
+        self._push(playback)
+        return playback
+
+    def _push(self, playback: Playback) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (playback._next_deadline(), next(self._seq), playback))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="motion-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                deadline, _, playback = self._heap[0]
+                remaining = deadline - time.perf_counter()
+                if remaining > SPIN_THRESHOLD and not playback.cancelled:
+                    # 더 이른 재생이 등록되면 notify로 깨어나 다시 계산
+                    self._cond.wait(remaining - SPIN_THRESHOLD)
+                    continue
+                heapq.heappop(self._heap)
+
+            if playback.cancelled or playback._index >= len(playback._poses):
+                playback._finish()
+                continue
+
+            while time.perf_counter() < deadline:
+                pass
+            try:
+                playback._fire(deadline)
+            except Exception as e:
+                playback.error = e
+                playback._finish()
+                continue
+            self._push(playback)
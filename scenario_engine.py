@@ -0,0 +1,394 @@
+"""
+데모 시나리오 엔진.
+
+시나리오의 모든 스텝 경계에서의 경기 상태를 불러올 때 한 번 미리 계산해 두므로,
+임의 시각의 상태는 bisect 한 번으로 찾고, 재생 중에도 일시정지/탐색/배속을 바로 반영할 수 있습니다.
+
+시나리오 소스 (SCENARIO_DIR)
+- <id>.json: {"title": ..., "base": {기본 상태 덮어쓰기}, "steps": [...]}
+  스텝 형식은 기존 데모 시나리오와 같습니다 (set_teams, score_delta, count, bases, event_type, macro 등).
+  "at"(시작 기준 초)이 없으면 이전 스텝 시각 + "delay"
+- scripted_game.get_script_steps(id)가 아는 스크립트 (ScriptStep 목록)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import SCENARIO_DIR
+from state_snapshot import FrozenDict, freeze, thaw
+
+State = Dict[str, Any]
+
+# last_event를 바꾸는 (화면에 표시하는) 이벤트 종류
+# 응원가(chant), 휴식(info), 삐끼삐끼(info), 기본 자세 복귀(info), 홈런 동작(info) 등은 내부 처리만 하고 UI에 표시 안 함
+GAME_RELATED_EVENTS = {
+    "start", "live", "strikeout", "hr", "single", "double", "triple", "out",
+    "sac_fly", "walk", "error", "change", "end", "ball", "strike",
+}
+
+
+@dataclass(frozen=True)
+class ScenarioStep:
+    at: float  # 시나리오 시작 기준 초
+    description: str
+    apply: Callable[[State], None]  # 상태만 바꾸는 순수 함수 (매크로는 macro로 따로 실행)
+    macro: Optional[str] = None
+
+
+def apply_step(step: Dict[str, Any], state: State) -> None:
+    """데모 시나리오 스텝(dict) 하나를 상태에 반영합니다."""
+    teams = state["teams"]
+
+    team_names = step.get("set_teams")
+    if team_names:
+        if "home" in team_names:
+            teams["home"]["name"] = team_names["home"]
+        if "away" in team_names:
+            teams["away"]["name"] = team_names["away"]
+
+    for key, field in (("set_scores", "runs"), ("set_hits", "hits"), ("set_errors", "errors")):
+        for side, value in (step.get(key) or {}).items():
+            if side in teams:
+                teams[side][field] = max(0, int(value))
+
+    for key, field in (("score_delta", "runs"), ("hits_delta", "hits"), ("errors_delta", "errors")):
+        for side, delta in (step.get(key) or {}).items():
+            if side in teams:
+                teams[side][field] = max(0, teams[side][field] + int(delta))
+
+    if "inning" in step:
+        state["inning"] = int(step["inning"])
+
+    if "half" in step:
+        state["half"] = step["half"]
+
+    if "count" in step:
+        state["count"].update(step["count"])
+
+    if "bases" in step:
+        state["bases"].update(step["bases"])
+        # runners 정보도 함께 업데이트 (선택적)
+        if "runners" in step:
+            state.setdefault("runners", {"first": "", "second": "", "third": ""}).update(step["runners"])
+
+    if "batter" in step:
+        state.setdefault("batter", {"name": "", "active": False}).update(step["batter"])
+
+    if "fielders" in step:
+        state["fielders"].update(step["fielders"])
+
+    # 경기 관련 이벤트만 last_event 업데이트 (UI에 표시)
+    event_type = step.get("event_type", "live")
+    if event_type in GAME_RELATED_EVENTS:
+        popup_desc = step.get("popup_description")
+        state["last_event"] = {
+            "type": event_type,
+            "description": step.get("description", ""),
+            "popup_description": popup_desc if popup_desc is not None else None,
+        }
+
+
+def _merge(base: State, overrides: Dict[str, Any]) -> None:
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+
+
+class Scenario:
+    """스텝 경계마다 상태를 미리 계산해 둔 시나리오입니다."""
+
+    def __init__(self, scenario_id: str, title: str, steps: List[ScenarioStep], base_state: State) -> None:
+        self.id = scenario_id
+        self.title = title
+        self.steps = sorted(steps, key=lambda step: step.at)  # 같은 시각은 원래 순서 유지
+        self.times = [step.at for step in self.steps]
+        self.duration = self.times[-1] if self.times else 0.0
+        # states[i]: 스텝 0..i-1을 적용한 상태 (바뀌지 않은 하위 구조는 이전 상태와 공유)
+        # event_marks[i]: 스텝 0..i-1 중 last_event를 새로 쓴 스텝 수 (내용이 같은 이벤트가 반복돼도 구분)
+        frozen = freeze(base_state)
+        self.states: List[FrozenDict] = [frozen]
+        self.event_marks: List[int] = [0]
+        for index, step in enumerate(self.steps):
+            draft = thaw(frozen)
+            last_event = draft.get("last_event")
+            try:
+                step.apply(draft)
+            except Exception as e:
+                raise ValueError(f"scenario '{scenario_id}' step {index + 1} ({step.description}): {e}") from e
+            frozen = freeze(draft, frozen)
+            self.states.append(frozen)
+            self.event_marks.append(self.event_marks[-1] + (draft.get("last_event") is not last_event))
+
+    def applied_at(self, position: float) -> int:
+        """position(초)까지 적용된 스텝 수"""
+        return bisect_right(self.times, position)
+
+    def state_at(self, position: float) -> FrozenDict:
+        return self.states[self.applied_at(position)]
+
+    def find(self, text: str) -> Optional[float]:
+        """설명에 text가 들어간 첫 스텝의 시각 (예: "홈런")"""
+        for step in self.steps:
+            if text in step.description:
+                return step.at
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "duration": self.duration,
+            "steps": [
+                {"at": step.at, "description": step.description, "macro": step.macro}
+                for step in self.steps
+            ],
+        }
+
+
+def scenario_from_dict(scenario_id: str, data: Dict[str, Any], base_state: State) -> Scenario:
+    _merge(base_state, data.get("base") or {})
+    steps: List[ScenarioStep] = []
+    at = 0.0
+    for index, raw in enumerate(data.get("steps") or []):
+        if not isinstance(raw, dict):
+            raise ValueError(f"scenario '{scenario_id}' step {index + 1}: must be an object")
+        at = float(raw["at"]) if "at" in raw else at + float(raw.get("delay", 0))
+        steps.append(ScenarioStep(at, str(raw.get("description", "")), partial(apply_step, raw), raw.get("macro") or None))
+    return Scenario(scenario_id, str(data.get("title") or scenario_id), steps, base_state)
+
+
+class ScenarioLibrary:
+    """
+    시나리오 id → 컴파일된 Scenario. JSON 파일은 바뀌었을 때만 다시 컴파일합니다.
+    base_state_factory는 시나리오가 덮어쓰기 전의 기본 경기 상태를 만듭니다.
+    """
+
+    def __init__(self, base_state_factory: Callable[[], State], directory: str = SCENARIO_DIR) -> None:
+        self.directory = directory
+        self._base_state_factory = base_state_factory
+        self._cache: Dict[str, Tuple[Any, Scenario]] = {}
+        self._lock = threading.Lock()
+
+    def ids(self) -> List[str]:
+        """파일 시나리오 id 목록 (scripted_game의 스크립트는 포함하지 않음)"""
+        try:
+            return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+        except OSError:
+            return []
+
+    def get(self, scenario_id: str) -> Optional[Scenario]:
+        path = os.path.join(self.directory, f"{os.path.basename(scenario_id)}.json")
+        try:
+            st = os.stat(path)
+            signature: Any = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = "script"
+        with self._lock:
+            cached = self._cache.get(scenario_id)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            if signature == "script":
+                scenario = self._load_script(scenario_id)
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    scenario = scenario_from_dict(scenario_id, json.load(f), self._base_state_factory())
+            if scenario is not None:
+                self._cache[scenario_id] = (signature, scenario)
+                print(f"✓ 시나리오 '{scenario_id}' 컴파일 완료: {len(scenario.steps)}개 스텝, {scenario.duration:.0f}초")
+            return scenario
+
+    def _load_script(self, scenario_id: str) -> Optional[Scenario]:
+        # 스크립트의 스텝 목록만 읽어 컴파일 (재생기를 만들지 않으므로 매크로가 실행되지 않음)
+        try:
+            from scripted_game import get_script_base_state, get_script_steps
+            script_steps = get_script_steps(scenario_id)
+        except ValueError:
+            return None
+        base = self._base_state_factory()
+        base.update(get_script_base_state(scenario_id))
+        steps = [ScenarioStep(step.at, step.description, step.apply_to, step.macro) for step in script_steps]
+        return Scenario(scenario_id, scenario_id, steps, base)
+
+
+class ScenarioPlayer:
+    """
+    시나리오를 실제 시간으로 재생합니다.
+    - publish(state, event_mark): 재생 상태(스텝, 일시정지, 속도 등)가 바뀔 때마다 호출.
+      state는 새 경기 상태(그대로면 None), event_mark는 그 상태의 Scenario.event_marks 값
+    - on_macro(name): 재생 중 지나간 스텝의 매크로 (탐색으로 건너뛴 스텝의 매크로는 실행하지 않음)
+    콜백은 재생 스레드에서 호출됩니다.
+    """
+
+    def __init__(self, publish: Callable[[Optional[FrozenDict], int], None], on_macro: Callable[[str], None]) -> None:
+        self._publish = publish
+        self._on_macro = on_macro
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stop = False
+        self.scenario: Optional[Scenario] = None
+        self._index = 0  # 적용한 스텝 수
+        self._published = -1  # 마지막으로 publish한 상태의 스텝 수
+        self._status_dirty = False
+        self._paused = False
+        self._speed = 1.0
+        # 재생 위치 = _anchor_pos + (지금 - _anchor_time) * _speed (일시정지 중에는 _anchor_pos)
+        self._anchor_pos = 0.0
+        self._anchor_time = 0.0
+
+    # ----- 조회 -----
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def current_step(self) -> Optional[str]:
+        """진행 중(다음에 적용될) 스텝 설명"""
+        scenario = self.scenario
+        if not self._running or scenario is None or self._index >= len(scenario.steps):
+            return None
+        return scenario.steps[self._index].description
+
+    def _position_locked(self) -> float:
+        if self._paused:
+            return self._anchor_pos
+        return self._anchor_pos + (time.monotonic() - self._anchor_time) * self._speed
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            scenario = self.scenario
+            return {
+                "running": self._running,
+                "step": self.current_step,
+                "scenario": scenario.id if scenario else None,
+                "position": round(min(self._position_locked(), scenario.duration), 3) if scenario else None,
+                "duration": scenario.duration if scenario else None,
+                "paused": self._paused,
+                "speed": self._speed,
+            }
+
+    # ----- 제어 -----
+
+    def start(self, scenario: Scenario, at: float = 0.0, speed: float = 1.0) -> bool:
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+        with self._lock:
+            if self._running:
+                return False
+            self.scenario = scenario
+            self._running = True
+            self._stop = False
+            self._paused = False
+            self._speed = speed
+            self._seek_locked(at)
+            self._published = -1
+        self._thread = threading.Thread(target=self._run, name="scenario-player", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self._running:
+                return
+            self._stop = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def pause(self) -> bool:
+        return self._control(lambda: self._set_paused_locked(True))
+
+    def resume(self) -> bool:
+        return self._control(lambda: self._set_paused_locked(False))
+
+    def seek(self, position: float) -> bool:
+        """position(초)으로 이동합니다. 그 시각의 스텝은 (매크로 포함) 바로 실행됩니다."""
+        return self._control(lambda: self._seek_locked(position))
+
+    def set_speed(self, speed: float) -> bool:
+        if speed <= 0:
+            raise ValueError("speed must be positive")
+
+        def apply() -> None:
+            self._anchor_pos = self._position_locked()
+            self._anchor_time = time.monotonic()
+            self._speed = speed
+
+        return self._control(apply)
+
+    def _control(self, apply: Callable[[], None]) -> bool:
+        with self._lock:
+            if not self._running:
+                return False
+            apply()
+            self._status_dirty = True
+        self._wake.set()
+        return True
+
+    def _set_paused_locked(self, paused: bool) -> None:
+        self._anchor_pos = self._position_locked()
+        self._anchor_time = time.monotonic()
+        self._paused = paused
+
+    def _seek_locked(self, position: float) -> None:
+        scenario = self.scenario
+        position = max(0.0, min(float(position), scenario.duration if scenario else 0.0))
+        self._anchor_pos = position
+        self._anchor_time = time.monotonic()
+        # position에 있는 스텝은 아직 적용하지 않은 것으로 두어 재생 루프가 매크로와 함께 실행
+        self._index = bisect_left(scenario.times, position) if scenario else 0
+
+    # ----- 재생 -----
+
+    def _run(self) -> None:
+        try:
+            while True:
+                self._wake.clear()
+                with self._lock:
+                    scenario = self.scenario
+                    if self._stop or scenario is None:
+                        break
+                    position = self._position_locked()
+                    start = self._index
+                    end = max(start, scenario.applied_at(position))
+                    self._index = end
+                    due = scenario.steps[start:end]
+                    state = scenario.states[end] if end != self._published else None
+                    self._published = end
+                    notify = state is not None or self._status_dirty
+                    self._status_dirty = False
+                    finished = end >= len(scenario.steps)
+                    if finished:
+                        wait: Optional[float] = 0.0
+                    elif self._paused:
+                        wait = None
+                    else:
+                        wait = max(0.0, (scenario.times[end] - position) / self._speed)
+
+                for step in due:
+                    if step.macro:
+                        try:
+                            self._on_macro(step.macro)
+                        except Exception as e:
+                            print(f"✗ 시나리오 매크로 '{step.macro}' 실행 중 예외 발생: {type(e).__name__}: {e}")
+                if notify:
+                    self._publish(state, scenario.event_marks[end])
+                if finished:
+                    break
+                self._wake.wait(wait)
+        finally:
+            with self._lock:
+                self._running = False
+            self._publish(None, -1)
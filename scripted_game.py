@@ -1,16 +1,8 @@
 from __future__ import annotations
 
-import time
 from copy import deepcopy
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
-
-try:
-    from macros_executor import run_macro_by_name_async
-except Exception:  # pragma: no cover - macro system optional during tests
-    def run_macro_by_name_async(_name: str) -> bool:
-        return False
-
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 State = Dict[str, Any]
 ApplyFn = Callable[[State], None]
@@ -22,49 +14,21 @@ class ScriptStep:
     description: str
     type: str = "script"
     apply: Optional[ApplyFn] = None
-
-
-class ScriptedGame:
-    """Plays back a predefined sequence of baseball events over time."""
-
-    def __init__(self, steps: List[ScriptStep], base_state_factory: Callable[[], State]):
-        if not steps:
-            raise ValueError("ScriptedGame requires at least one step")
-        self._steps = sorted(steps, key=lambda step: step.at)
-        self._base_state_factory = base_state_factory
-        self._state: State = {}
-        self._start_time: float = 0.0
-        self._cursor: int = -1
-        self.reset()
-
-    def reset(self) -> None:
-        """Restart the script from the beginning."""
-        self._state = self._base_state_factory()
-        self._start_time = time.monotonic()
-        self._cursor = -1
-        # Apply any steps scheduled for t=0 immediately.
-        self._apply_until_elapsed(0.0)
-
-    def _apply_step(self, step: ScriptStep) -> None:
-        if step.apply:
-            step.apply(self._state)
-        if step.description:
-            self._state["last_event"] = {
-                "type": step.type,
-                "description": step.description,
+    # Macro to play when playback reaches this step. Kept out of `apply` so that
+    # states can be computed ahead of time without moving the robot
+    # (playback and precomputation live in scenario_engine).
+    macro: Optional[str] = None
+
+    def apply_to(self, state: State) -> None:
+        """Apply this step's state changes (no side effects)."""
+        if self.apply:
+            self.apply(state)
+        if self.description:
+            state["last_event"] = {
+                "type": self.type,
+                "description": self.description,
             }
 
-    def _apply_until_elapsed(self, elapsed: float) -> None:
-        while self._cursor + 1 < len(self._steps) and self._steps[self._cursor + 1].at <= elapsed:
-            self._cursor += 1
-            self._apply_step(self._steps[self._cursor])
-
-    def current_state(self) -> State:
-        """Return the latest state snapshot for the current playback time."""
-        elapsed = time.monotonic() - self._start_time
-        self._apply_until_elapsed(elapsed)
-        return deepcopy(self._state)
-
 
 def _blank_state() -> State:
     return {
@@ -152,15 +116,6 @@ def _set_fielders(state: State, fielders: Dict[str, Dict[str, Any]]) -> None:
     state["fielders"] = deepcopy(fielders)
 
 
-def _trigger_macro(name: str) -> None:
-    if not name:
-        return
-    try:
-        run_macro_by_name_async(name)
-    except Exception:
-        pass
-
-
 def _kia_vs_samsung_steps() -> List[ScriptStep]:
     steps: List[ScriptStep] = []
 
@@ -168,7 +123,6 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
         _reset_count(state)
         _set_outs(state, 0)
         _set_bases(state, first=False, second=False, third=False)
-        _trigger_macro("차렷자세")
 
     steps.append(
         ScriptStep(
@@ -176,18 +130,16 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
             type="intro",
             description="데모 준비",
             apply=stage_reset,
+            macro="차렷자세",
         )
     )
 
-    def kim_jichan_entrance(_state: State) -> None:
-        _trigger_macro("김지찬 응원가")
-
     steps.append(
         ScriptStep(
             at=3.0,
             type="entrance",
             description="김지찬 타석 입장, 삼성 팬들의 함성이 커집니다",
-            apply=kim_jichan_entrance,
+            macro="김지찬 응원가",
         )
     )
 
@@ -298,15 +250,12 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
         )
     )
 
-    def kim_doyoung_entrance(_state: State) -> None:
-        _trigger_macro("김도영 응원가")
-
     steps.append(
         ScriptStep(
             at=36.0,
             type="entrance",
             description="김도영 타석 입장, 기아 팬들의 기대가 커집니다",
-            apply=kim_doyoung_entrance,
+            macro="김도영 응원가",
         )
     )
 
@@ -340,7 +289,6 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
         _add_run(state, "home")
         _reset_count(state)
         _set_bases(state, first=False, second=False, third=False)
-        _trigger_macro("홈런")
 
     steps.append(
         ScriptStep(
@@ -348,6 +296,7 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
             type="hr",
             description="김도영, 좌월 솔로 홈런! 동점을 만들며 분위기를 바꿉니다",
             apply=kim_doyoung_hr,
+            macro="홈런",
         )
     )
 
@@ -410,7 +359,6 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
         state["half"] = "F"
         _set_bases(state, first=False, second=False, third=False)
         _set_fielders(state, _kia_fielders())
-        _trigger_macro("KIA 승리")
 
     steps.append(
         ScriptStep(
@@ -418,6 +366,7 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
             type="final",
             description="KIA 2:1 승리",
             apply=kia_victory,
+            macro="KIA 승리",
         )
     )
 
@@ -427,23 +376,34 @@ def _kia_vs_samsung_steps() -> List[ScriptStep]:
             type="end",
             description="경기 종료",
             apply=stage_reset,
+            macro="차렷자세",
         )
     )
 
     return steps
 
 
-def create_kia_vs_samsung_demo() -> ScriptedGame:
-    return ScriptedGame(
-        steps=_kia_vs_samsung_steps(),
-        base_state_factory=_blank_state,
-    )
+# script id -> (steps factory, base state factory)
+_SCRIPTS: Dict[str, Tuple[Callable[[], List[ScriptStep]], Callable[[], State]]] = {
+    "kia_samsung_demo": (_kia_vs_samsung_steps, _blank_state),
+}
+_SCRIPT_ALIASES = {"", "demo", "kia", "kia_vs_samsung", "kia_samsung_demo"}
 
 
-def get_scripted_game(script_id: str) -> ScriptedGame:
+def _resolve_script(script_id: str) -> Tuple[Callable[[], List[ScriptStep]], Callable[[], State]]:
     normalized = (script_id or "").strip().lower()
-    if normalized in {"", "demo", "kia", "kia_vs_samsung", "kia_samsung_demo"}:
-        return create_kia_vs_samsung_demo()
+    if normalized in _SCRIPT_ALIASES:
+        return _SCRIPTS["kia_samsung_demo"]
     raise ValueError(f"Unknown script id: {script_id}")
 
 
+def get_script_steps(script_id: str) -> List[ScriptStep]:
+    """The steps of a script, sorted by time. Building them has no side effects."""
+    steps_factory, _ = _resolve_script(script_id)
+    return sorted(steps_factory(), key=lambda step: step.at)
+
+
+def get_script_base_state(script_id: str) -> State:
+    """A fresh copy of the script's state before any step is applied."""
+    _, base_state_factory = _resolve_script(script_id)
+    return base_state_factory()
@@ -2,7 +2,11 @@ from __future__ import annotations
 
 from flask import Blueprint, jsonify, request
 
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
 try:
     import serial as pyserial
@@ -11,109 +15,500 @@ except Exception:  # pragma: no cover
     pyserial = None
     list_ports = None
 
-from config import SERIAL_PORT as PORT, SERIAL_BAUD as BAUDRATE
+from config import (
+    SERIAL_ACK_TIMEOUT,
+    SERIAL_BAUD as BAUDRATE,
+    SERIAL_CONNECT_WAIT,
+    SERIAL_HANDSHAKE_TIMEOUT,
+    SERIAL_MAX_IN_FLIGHT,
+    SERIAL_PORT as PORT,
+    SERIAL_RECONNECT_MAX,
+    SERIAL_SYNC_FRAMES,
+)
 
-# 전역 시리얼 핸들 (필요 시 열기)
+# 전역 시리얼 핸들 (연결 관리자가 준비 확인 후 게시)
 ser = None
 _detected_port = None
 
+_READY_PREFIXES = ("Ready", "Arduino is ready")
+_RECONNECT_INITIAL = 0.5
 
-def _find_serial_port():
-    """시리얼 포트를 자동으로 찾습니다."""
-    global _detected_port
-    
-    # 이미 찾은 포트가 있고 사용 가능하면 재사용
+
+def _candidate_ports() -> List[str]:
+    """연결을 시도할 포트 목록 (마지막으로 성공한 포트 → 설정된 포트 → 자동 검색 순)."""
+    candidates: List[str] = []
     if _detected_port:
-        try:
-            test_ser = pyserial.Serial(_detected_port, BAUDRATE, timeout=1)
-            test_ser.close()
-            return _detected_port
-        except (pyserial.SerialException, OSError):
-            _detected_port = None  # 포트가 더 이상 사용 불가능하면 재검색
-    
-    # config에서 지정된 포트가 있으면 먼저 시도
+        candidates.append(_detected_port)
     if PORT:
+        candidates.append(PORT)
+    if list_ports is not None:
+        ports = [p.device for p in list_ports.comports()]
+        # Linux: ttyACM, ttyUSB 우선, 그 다음 Windows: COM 포트
+        candidates += [name for name in ports if "ttyACM" in name or "ttyUSB" in name]
+        candidates += [name for name in ports if name.startswith("COM")]
+    return list(dict.fromkeys(candidates))
+
+
+class SerialConnection:
+    """
+    시리얼 연결 관리자입니다.
+    백그라운드 스레드가 포트를 찾아 열고, 준비 응답(핸드셰이크)을 확인한 뒤에만
+    전역 `ser`로 게시합니다. 연결이 끊기면 지수 백오프로 재연결하며, 그동안
+    호출자는 기다리지 않고 즉시 RuntimeError를 받습니다.
+    """
+
+    def __init__(self, handshake_timeout: float, reconnect_max: float) -> None:
+        self._handshake_timeout = handshake_timeout
+        self._reconnect_max = max(_RECONNECT_INITIAL, reconnect_max)
+        self._backoff = _RECONNECT_INITIAL
+        self._retry_in = _RECONNECT_INITIAL
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._attempt_done = threading.Event()
+        self._wanted = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_error = "연결 시도 전"
+        self._error_shown = False
+
+    @property
+    def is_connected(self) -> bool:
+        return ser is not None and getattr(ser, "is_open", False)
+
+    def ensure(self, wait: float = 0.0) -> None:
+        """
+        연결되어 있으면 바로 반환합니다. 아니면 백그라운드 연결을 시작하고,
+        첫 연결 시도에 한해 최대 wait초 기다린 뒤에도 연결이 없으면 예외를 던집니다.
+        """
+        if pyserial is None:
+            raise RuntimeError("pyserial_not_installed")
+        if self.is_connected:
+            return
+        with self._lock:
+            if not self._wanted:
+                self._wanted = True
+                self._attempt_done.clear()
+                self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="serial-connection", daemon=True)
+                self._thread.start()
+        if wait > 0:
+            self._attempt_done.wait(wait)
+        if not self.is_connected:
+            raise RuntimeError(f"시리얼 포트 연결 대기 중: {self._last_error}")
+
+    def mark_down(self, port) -> None:
+        """전송/수신 오류로 끊긴 포트를 정리하고 즉시 재연결을 시작합니다."""
+        global ser
         try:
-            test_ser = pyserial.Serial(PORT, BAUDRATE, timeout=1)
-            test_ser.close()
-            _detected_port = PORT
-            print(f"✓ 지정된 포트 사용: {PORT}")
-            return PORT
-        except (pyserial.SerialException, OSError):
-            print(f"⚠ 지정된 포트 {PORT} 사용 불가, 자동 검색 중...")
-    
-    # 자동 검색
-    if list_ports is None:
-        return None
-    
-    ports = list_ports.comports()
-    
-    # Linux: ttyACM, ttyUSB 우선
-    for port in ports:
-        port_name = port.device
-        if 'ttyACM' in port_name or 'ttyUSB' in port_name:
+            port.close()
+        except Exception:
+            pass
+        with self._lock:
+            if ser is port:
+                ser = None
+                self._last_error = "연결이 끊어졌습니다"
+                self._backoff = _RECONNECT_INITIAL
+                self._wake.set()
+
+    def disconnect(self) -> None:
+        """포트를 닫고 다음 사용 요청 전까지 재연결하지 않습니다."""
+        global ser
+        with self._lock:
+            self._wanted = False
+            port, ser = ser, None
+        if port is not None:
             try:
-                test_ser = pyserial.Serial(port_name, BAUDRATE, timeout=1)
-                test_ser.close()
-                _detected_port = port_name
-                print(f"✓ 자동 검색된 포트: {port_name}")
-                return port_name
+                port.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(timeout=None if self.is_connected or not self._wanted else self._retry_in)
+            self._wake.clear()
+            if not self._wanted or self.is_connected:
+                continue
+            try:
+                self._connect()
+                self._backoff = _RECONNECT_INITIAL
+            except RuntimeError as e:
+                self._retry_in = self._backoff
+                self._backoff = min(self._backoff * 2, self._reconnect_max)
+                self._last_error = f"{e} (재시도 {self._retry_in:.1f}초 후)"
+                if not self._error_shown:
+                    print(f"✗ {e} → 백그라운드에서 재연결을 시도합니다")
+                    self._error_shown = True
+            finally:
+                self._attempt_done.set()
+
+    def _connect(self) -> None:
+        global ser, _detected_port
+        candidates = _candidate_ports()
+        if not candidates:
+            raise RuntimeError("시리얼 포트를 찾을 수 없습니다")
+        for port_name in candidates:
+            try:
+                port = pyserial.Serial(port_name, BAUDRATE, timeout=1)
             except (pyserial.SerialException, OSError):
                 continue
-    
-    # Windows: COM 포트
-    for port in ports:
-        port_name = port.device
-        if port_name.startswith('COM'):
             try:
-                test_ser = pyserial.Serial(port_name, BAUDRATE, timeout=1)
-                test_ser.close()
-                _detected_port = port_name
-                print(f"✓ 자동 검색된 포트: {port_name}")
-                return port_name
+                ready = self._handshake(port)
             except (pyserial.SerialException, OSError):
+                port.close()
+                continue
+            if not ready:
+                # 준비 응답을 모르는 구형 펌웨어는 포트가 열린 것으로 연결 완료 처리
+                print(f"⚠ {port_name} 준비 응답 없음 ({self._handshake_timeout:.1f}초), 연결된 것으로 간주합니다")
+            with self._lock:
+                if not self._wanted:
+                    port.close()
+                    return
+                ser = port
+                _detected_port = port_name
+            self._error_shown = False
+            print(f"✓ 시리얼 포트 연결 성공: {port_name} ({BAUDRATE} baud)")
+            return
+        raise RuntimeError(f"시리얼 포트 연결 실패: {', '.join(candidates)}")
+
+    def _handshake(self, port) -> bool:
+        """'?' 핑에 대한 준비 응답(또는 부팅 메시지)이 올 때까지 기다립니다."""
+        deadline = time.monotonic() + self._handshake_timeout
+        next_ping = 0.0
+        buffer = bytearray()
+        port.reset_input_buffer()
+        while time.monotonic() < deadline:
+            now = time.monotonic()
+            if now >= next_ping:
+                port.write(b"?\n")
+                next_ping = now + 0.1
+            waiting = port.in_waiting
+            if waiting:
+                buffer += port.read(waiting)
+            while b"\n" in buffer:
+                raw, _, rest = buffer.partition(b"\n")
+                buffer = bytearray(rest)
+                if raw.decode("utf-8", errors="ignore").strip().startswith(_READY_PREFIXES):
+                    return True
+            time.sleep(0.01)
+        return False
+
+
+_connection = SerialConnection(SERIAL_HANDSHAKE_TIMEOUT, SERIAL_RECONNECT_MAX)
+
+
+def _ensure_open(connect_wait: float = SERIAL_CONNECT_WAIT):
+    """시리얼 포트가 준비되어 있는지 확인합니다. 연결이 없으면 즉시 예외를 던집니다."""
+    _connection.ensure(wait=connect_wait)
+
+
+_ACK_PREFIXES = ("Command Received", "Sync OK", "Error")
+
+# 전송하지 않고 완료된 명령의 응답 문자열
+RESP_SUPERSEDED = "Skipped -> superseded"  # 전송 전에 같은 모터의 새 목표로 대체됨
+RESP_UNCHANGED = "Skipped -> unchanged"    # 마지막으로 보낸 위치/속도와 같음
+
+# sync 프레임: AA 55 | N | N × (ID u8, 위치 u16 LE, 속도 u16 LE) | 체크섬
+# 체크섬은 N부터 마지막 항목까지 바이트 합의 2의 보수(하위 8비트)입니다.
+SYNC_FRAME_HEADER = b"\xAA\x55"
+SYNC_FRAME_MAX_MOTORS = 6
+
+Command = Tuple[int, int, int]
+
+
+def _fits_sync_frame(motor_id: int, position: int, speed: int) -> bool:
+    return 0 <= motor_id <= 0xFF and 0 <= position <= 0xFFFF and 0 <= speed <= 0xFFFF
+
+
+def encode_sync_frame(commands: Iterable[Command]) -> bytes:
+    """(모터 ID, 위치, 속도) 목록을 한 번에 적용할 sync 프레임으로 인코딩합니다."""
+    body = bytearray()
+    entries = list(commands)
+    if not entries or len(entries) > SYNC_FRAME_MAX_MOTORS:
+        raise ValueError(f"sync 프레임 모터 수는 1~{SYNC_FRAME_MAX_MOTORS}개여야 합니다: {len(entries)}")
+    body.append(len(entries))
+    for motor_id, position, speed in entries:
+        if not _fits_sync_frame(motor_id, position, speed):
+            raise ValueError(f"sync 프레임 범위를 벗어난 명령: {motor_id},{position},{speed}")
+        body.append(motor_id)
+        body += position.to_bytes(2, "little")
+        body += speed.to_bytes(2, "little")
+    checksum = (-sum(body)) & 0xFF
+    return SYNC_FRAME_HEADER + bytes(body) + bytes([checksum])
+
+
+class SerialWriter:
+    """
+    시리얼 포트를 단독으로 소유하는 전송 스레드입니다.
+
+    대기 중인 명령은 모터 ID(MOTOR_ID_MAP의 각 모터)마다 한 칸씩만 유지합니다.
+    아직 전송되지 않은 목표는 같은 모터의 새 목표로 대체되고(last-write-wins),
+    마지막으로 보낸 위치/속도와 같은 목표는 전송하지 않습니다. 호출자는 Future를
+    돌려받으며, 아두이노 응답은 전송 순서대로 비동기 매칭됩니다. 응답을 기다리는
+    전송 단위(텍스트 한 줄 또는 sync 프레임 하나)는 최대 max_in_flight개입니다.
+    """
+
+    def __init__(self, max_in_flight: int, ack_timeout: float, sync_frames: bool) -> None:
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Tuple[int, int, Future]] = {}
+        self._close_requests: List[Future] = []
+        self._in_flight: Deque[Tuple[List[Tuple[Command, Future]], float]] = deque()
+        self._last_sent: Dict[int, Tuple[int, int]] = {}
+        self._last_port = None
+        self._max_in_flight = max(1, max_in_flight)
+        self._ack_timeout = ack_timeout
+        self._sync_frames = sync_frames
+        self._rx_buffer = bytearray()
+        # 응답 시간 초과 뒤 '?' → Ready로 응답 순서를 다시 맞추는 중이면 그 마감 시각
+        self._resync_deadline: Optional[float] = None
+        self._resync_ping = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="serial-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, motor_id: int, position: int, speed: int) -> Future:
+        """모터 목표를 대기 칸에 넣고 응답 문자열로 완료될 Future를 반환합니다."""
+        return self.submit_pose([(motor_id, position, speed)])[0]
+
+    def submit_pose(self, commands: List[Command]) -> List[Future]:
+        """
+        여러 모터 목표를 한 번에 대기 칸에 넣습니다. 같은 잠금 안에서 들어가므로
+        sync 프레임 모드에서는 하나의 프레임으로 함께 전송됩니다.
+        """
+        self._start()
+        futures: List[Future] = []
+        superseded: List[Future] = []
+        with self._cond:
+            for motor_id, position, speed in commands:
+                fut: Future = Future()
+                previous = self._pending.get(motor_id)
+                if previous is not None:
+                    superseded.append(previous[2])
+                # 기존 키에 대입하면 대기 순서는 유지됩니다
+                self._pending[motor_id] = (position, speed, fut)
+                futures.append(fut)
+            self._cond.notify()
+        for fut in superseded:
+            if fut.set_running_or_notify_cancel():
+                fut.set_result(RESP_SUPERSEDED)
+        return futures
+
+    def close_port(self) -> None:
+        """대기 중인 명령을 모두 전송한 뒤 포트를 닫습니다."""
+        self._start()
+        fut: Future = Future()
+        with self._cond:
+            self._close_requests.append(fut)
+            self._cond.notify()
+        fut.result(timeout=self._ack_timeout * (self._max_in_flight + 2))
+
+    def _run(self) -> None:
+        while True:
+            self._read_acks()
+            self._expire_acks()
+            self._resync()
+            with self._cond:
+                if not self._pending and self._close_requests:
+                    requests, self._close_requests = self._close_requests, []
+                    batch = None
+                elif (self._pending and len(self._in_flight) < self._max_in_flight
+                        and self._resync_deadline is None):
+                    batch = self._take_batch()
+                    requests = []
+                else:
+                    busy = self._in_flight or self._resync_deadline is not None
+                    self._cond.wait(timeout=0.001 if busy else 0.1)
+                    continue
+            if requests:
+                self._close(requests)
+            elif batch:
+                self._write(batch)
+
+    def _take_batch(self) -> List[Tuple[Command, Future]]:
+        # sync 프레임 모드에서는 대기 중인 모든 모터를 프레임 하나로, 아니면 한 모터씩
+        count = SYNC_FRAME_MAX_MOTORS if self._sync_frames else 1
+        batch: List[Tuple[Command, Future]] = []
+        for motor_id in list(self._pending)[:count]:
+            position, speed, fut = self._pending.pop(motor_id)
+            batch.append(((motor_id, position, speed), fut))
+        return batch
+
+    def _write(self, batch: List[Tuple[Command, Future]]) -> None:
+        port = ser
+        if port is not self._last_port:
+            # 새로 연결된 장치는 이전 목표를 알 수 없으므로 중복 판단 기록을 초기화
+            self._last_sent.clear()
+            self._last_port = port
+        to_send: List[Tuple[Command, Future]] = []
+        for cmd, fut in batch:
+            if not fut.set_running_or_notify_cancel():
                 continue
-    
-    return None
-
-
-def _ensure_open():
-    """시리얼 포트가 열려 있는지 확인하고, 필요 시 엽니다."""
-    global ser
-    if pyserial is None:
-        raise RuntimeError("pyserial_not_installed")
-    if ser is None or not getattr(ser, "is_open", False):
-        # 포트 자동 검색
-        detected_port = _find_serial_port()
-        if not detected_port:
-            error_msg = "시리얼 포트를 찾을 수 없습니다"
-            print(f"✗ {error_msg}")
-            raise RuntimeError(error_msg)
-        
+            if port is None or not getattr(port, "is_open", False):
+                fut.set_exception(RuntimeError("시리얼 포트가 열려 있지 않습니다"))
+            elif self._last_sent.get(cmd[0]) == (cmd[1], cmd[2]):
+                fut.set_result(RESP_UNCHANGED)
+            else:
+                to_send.append((cmd, fut))
+        if not to_send:
+            return
+
+        commands = [cmd for cmd, _ in to_send]
+        if len(to_send) > 1 and all(_fits_sync_frame(*cmd) for cmd in commands):
+            units = [(encode_sync_frame(commands), to_send)]
+        else:
+            units = [(f"{m},{p},{v}\n".encode("utf-8"), [((m, p, v), fut)]) for (m, p, v), fut in to_send]
+        for payload, entries in units:
+            try:
+                port.write(payload)
+            except Exception as e:
+                self._drop_port(port)
+                for _, fut in entries:
+                    fut.set_exception(RuntimeError(f"시리얼 포트 쓰기 실패: {e}"))
+                continue
+            for (motor_id, position, speed), _ in entries:
+                self._last_sent[motor_id] = (position, speed)
+            self._in_flight.append((entries, time.monotonic()))
+
+    def _read_acks(self) -> None:
+        port = ser
+        if port is None or not self._in_flight:
+            return
         try:
-            ser = pyserial.Serial(detected_port, BAUDRATE, timeout=1)
-            # 아두이노 리셋 대기
-            time.sleep(2)
-            print(f"✓ 시리얼 포트 연결 성공: {detected_port} ({BAUDRATE} baud)")
-        except pyserial.SerialException as e:
-            error_msg = f"시리얼 포트 연결 실패: {detected_port} - {str(e)}"
-            print(f"✗ {error_msg}")
-            raise RuntimeError(error_msg) from e
+            waiting = port.in_waiting
+            if waiting:
+                self._rx_buffer += port.read(waiting)
         except Exception as e:
-            error_msg = f"시리얼 포트 열기 중 오류: {str(e)}"
-            print(f"✗ {error_msg}")
-            raise RuntimeError(error_msg) from e
+            self._drop_port(port)
+            self._fail_in_flight(RuntimeError(f"시리얼 포트 읽기 실패: {e}"))
+            return
+        while b"\n" in self._rx_buffer:
+            raw, _, rest = self._rx_buffer.partition(b"\n")
+            self._rx_buffer = bytearray(rest)
+            resp = raw.decode("utf-8", errors="ignore").strip()
+            # 부팅 메시지 등 명령 응답이 아닌 줄은 무시
+            if self._in_flight and resp.startswith(_ACK_PREFIXES):
+                entries, _ = self._in_flight.popleft()
+                for (motor_id, _, _), fut in entries:
+                    if resp.startswith("Error"):
+                        # 적용되지 않은 목표는 다음에 같은 값이 와도 다시 보내야 함
+                        self._last_sent.pop(motor_id, None)
+                    fut.set_result(resp)
+
+    def _expire_acks(self) -> None:
+        """
+        응답이 없는 명령은 기존 readline 타임아웃과 같이 빈 응답으로 완료합니다.
+        늦게 도착한 응답이 다음 명령의 응답으로 밀려 매칭되지 않도록, 응답을 기다리던 나머지 명령도
+        함께 빈 응답으로 끝내고 '?' → Ready로 응답 줄을 다시 맞출 때까지 전송을 멈춥니다.
+        """
+        now = time.monotonic()
+        if not self._in_flight or now - self._in_flight[0][1] < self._ack_timeout:
+            return
+        while self._in_flight:
+            entries, _ = self._in_flight.popleft()
+            for (motor_id, _, _), fut in entries:
+                # 적용됐는지 알 수 없으므로 다음에 같은 목표가 와도 다시 보냄
+                self._last_sent.pop(motor_id, None)
+                fut.set_result("")
+        self._rx_buffer.clear()
+        self._resync_deadline = now + SERIAL_HANDSHAKE_TIMEOUT
+        self._resync_ping = 0.0
+
+    def _resync(self) -> None:
+        """Ready 응답이 올 때까지 '?'를 보내며 그 전에 받은 줄(늦은 응답 등)은 버립니다."""
+        if self._resync_deadline is None:
+            return
+        port = ser
+        if port is None or not getattr(port, "is_open", False) or port is not self._last_port:
+            # 포트가 바뀌면 연결 관리자의 핸드셰이크가 이미 입력을 비움
+            self._resync_deadline = None
+            return
+        now = time.monotonic()
+        try:
+            if now >= self._resync_ping:
+                port.write(b"?\n")
+                self._resync_ping = now + 0.1
+            waiting = port.in_waiting
+            if waiting:
+                self._rx_buffer += port.read(waiting)
+        except Exception as e:
+            print(f"✗ 시리얼 응답 재동기화 실패: {e}")
+            self._drop_port(port)
+            return
+        while b"\n" in self._rx_buffer:
+            raw, _, rest = self._rx_buffer.partition(b"\n")
+            self._rx_buffer = bytearray(rest)
+            if raw.decode("utf-8", errors="ignore").strip().startswith(_READY_PREFIXES):
+                # 여러 번 보낸 '?'의 남은 Ready는 명령 응답이 아니므로 _read_acks가 무시함
+                self._resync_deadline = None
+                self._rx_buffer.clear()
+                return
+        if now >= self._resync_deadline:
+            print("⚠️ 시리얼 응답 재동기화 시간 초과 → 다시 연결합니다")
+            self._drop_port(port)
+
+    def _fail_in_flight(self, error: Exception) -> None:
+        while self._in_flight:
+            entries, _ = self._in_flight.popleft()
+            for _, fut in entries:
+                fut.set_exception(error)
+        self._rx_buffer.clear()
+
+    def _drop_port(self, port) -> None:
+        self._last_sent.clear()
+        self._resync_deadline = None
+        _connection.mark_down(port)
+
+    def _close(self, requests: List[Future]) -> None:
+        deadline = time.monotonic() + self._ack_timeout
+        while self._in_flight and time.monotonic() < deadline:
+            self._read_acks()
+            time.sleep(0.001)
+        self._expire_acks()
+        self._fail_in_flight(RuntimeError("시리얼 포트가 닫혔습니다"))
+        self._last_sent.clear()
+        self._resync_deadline = None
+        _connection.disconnect()
+        for fut in requests:
+            fut.set_result(None)
+
+
+_writer = SerialWriter(SERIAL_MAX_IN_FLIGHT, SERIAL_ACK_TIMEOUT, SERIAL_SYNC_FRAMES)
+
+
+def send_command_async(motor_id: int, position: int, speed: int) -> Future:
+    """
+    'ID,위치,속도\n' 명령을 전송 스레드에 넘기고 Future를 반환합니다.
+    포트 연결 실패는 즉시 RuntimeError로, 전송/응답 오류는 Future로 전달됩니다.
+    """
+    _ensure_open()
+    return _writer.submit(motor_id, position, speed)
+
+
+def send_pose_async(commands: List[Command], connect_wait: float = SERIAL_CONNECT_WAIT) -> List[Future]:
+    """
+    동시에 시작해야 하는 (모터 ID, 위치, 속도) 묶음을 전송합니다.
+    SERIAL_SYNC_FRAMES가 켜져 있으면 sync 프레임 하나(펌웨어 SyncWrite)로,
+    아니면 기존처럼 모터별 텍스트 명령으로 보냅니다.
+    connect_wait=0이면 첫 연결도 기다리지 않습니다 (타이밍이 중요한 호출자용).
+    """
+    if not commands:
+        return []
+    _ensure_open(connect_wait)
+    return _writer.submit_pose(commands)
 
 
 def _send_command(motor_id: int, position: int, speed: int) -> str:
     """
     'ID,위치,속도\n' 형식으로 명령을 전송하고, 아두이노로부터 응답을 받습니다.
     """
-    _ensure_open()
-    command = f"{motor_id},{position},{speed}\n".encode("utf-8")
-    ser.write(command)
-    resp = ser.readline().decode("utf-8", errors="ignore").strip()
-    return resp
+    fut = send_command_async(motor_id, position, speed)
+    return fut.result(timeout=SERIAL_ACK_TIMEOUT * (SERIAL_MAX_IN_FLIGHT + 2))
 
 
 serial_bp = Blueprint("serial", __name__)
@@ -142,11 +537,8 @@ def api_serial_send():
 @serial_bp.route("/api/serial/close", methods=["POST"])
 def api_serial_close():
     """시리얼 포트를 닫습니다."""
-    global ser
     try:
-        if ser and getattr(ser, "is_open", False):
-            ser.close()
-            ser = None
+        _writer.close_port()
     except Exception:
         pass
     return jsonify({"ok": True})
@@ -0,0 +1,79 @@
+"""
+불변 상태 스냅샷.
+
+경기 상태처럼 여러 스레드가 읽고 가끔 한 곳에서만 바꾸는 데이터를 위한 도구입니다.
+- 쓰는 쪽: thaw()로 얻은 가변 사본을 고친 뒤 freeze(사본, 이전 스냅샷)으로 새 스냅샷을 만들어 참조를 통째로 교체
+- 읽는 쪽: 현재 스냅샷 참조를 한 번 읽어 그대로 사용 (잠금/복사 불필요, 바뀌지 않음이 보장됨)
+freeze는 바뀌지 않은 하위 dict를 이전 스냅샷의 객체 그대로 재사용합니다 (구조 공유).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+_MISSING = object()
+
+
+class FrozenDict(dict):
+    """수정할 수 없는 dict. dict의 하위 클래스라 json.dumps/jsonify에 그대로 넘길 수 있습니다."""
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("FrozenDict is read-only; use thaw() to get a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: Any) -> "FrozenDict":
+        return self
+
+    def __reduce__(self) -> Any:
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"FrozenDict({dict.__repr__(self)})"
+
+
+def _same(a: Any, b: Any) -> bool:
+    if a is b:
+        return True
+    # 새로 계산한 스칼라 값은 객체가 달라도 같은 값이면 공유로 봄 (True == 1 같은 타입 차이는 구분)
+    return not isinstance(a, (dict, list, tuple)) and type(a) is type(b) and a == b
+
+
+def freeze(value: Any, previous: Any = None) -> Any:
+    """
+    value를 불변 스냅샷으로 바꿉니다 (dict → FrozenDict, list → tuple).
+    previous(이전 스냅샷)와 내용이 같은 하위 dict는 previous의 객체를 그대로 돌려줍니다.
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        prev: Optional[FrozenDict] = previous if isinstance(previous, FrozenDict) else None
+        items = {k: freeze(v, prev.get(k) if prev is not None else None) for k, v in value.items()}
+        if prev is not None and len(prev) == len(items) and all(
+            _same(prev.get(k, _MISSING), v) for k, v in items.items()
+        ):
+            return prev
+        return FrozenDict(items)
+    if isinstance(value, (list, tuple)):
+        frozen = tuple(freeze(v) for v in value)
+        if isinstance(previous, tuple) and len(previous) == len(frozen) and all(
+            _same(a, b) for a, b in zip(previous, frozen)
+        ):
+            return previous
+        return frozen
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """스냅샷의 가변 사본 (FrozenDict/dict → dict, tuple/list → list, 중첩 포함)"""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
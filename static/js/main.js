@@ -6,6 +6,10 @@
   let victoryPopupDismissed = false; // 우승 팝업이 닫혔는지 여부
   let demoRunning = false;
   let forceDemoMode = false;
+  let stateStream = null; // 로컬(데모) 상태 SSE 연결
+  let streamConnected = false;
+  // 경기 방: 페이지 주소의 ?room= 값 (없으면 서버의 default 방)
+  const room = new URLSearchParams(window.location.search).get('room') || '';
 
   const el = {
       nameAway: document.getElementById('name-away'),
@@ -70,6 +74,13 @@
       batterName: document.getElementById('batter-name')
   };
 
+  function roomUrl(path, params = {}) {
+      const query = new URLSearchParams(params);
+      if (room) query.set('room', room);
+      const qs = query.toString();
+      return qs ? `${path}?${qs}` : path;
+  }
+
   async function fetchState() {
       const useLocal = demoRunning || forceDemoMode || !currentGameId;
       if (!useLocal) {
@@ -78,8 +89,9 @@
           if (!res.ok) return null;
           return await res.json();
       }
-      const advanceParam = (demoRunning || forceDemoMode) ? '' : '?advance=1';
-      const res = await fetch(`/api/game-state${advanceParam}`, { cache: 'no-store' });
+      const params = (demoRunning || forceDemoMode) ? {} : { advance: '1' };
+      // no-cache: 브라우저가 ETag로 재검증하고, 바뀐 것이 없으면 304로 본문 전송을 생략
+      const res = await fetch(roomUrl('/api/game-state', params), { cache: 'no-cache' });
       if (!res.ok) return null;
       return await res.json();
   }
@@ -403,8 +415,38 @@
       }
   }
 
+  // 로컬 상태를 볼 때는 서버가 바뀔 때마다 밀어주는 SSE를 사용하고,
+  // 연결이 끊겨 있는 동안(또는 EventSource 미지원)에는 기존 폴링으로 동작합니다.
+  function openStateStream() {
+      if (stateStream || typeof EventSource === 'undefined') return;
+      stateStream = new EventSource(roomUrl('/api/game-state/stream'));
+      stateStream.addEventListener('open', () => { streamConnected = true; });
+      stateStream.addEventListener('error', () => { streamConnected = false; });
+      stateStream.addEventListener('state', (ev) => {
+          streamConnected = true;
+          try {
+              render(JSON.parse(ev.data));
+          } catch (e) {
+              console.error(e);
+          }
+      });
+  }
+
+  function closeStateStream() {
+      if (!stateStream) return;
+      stateStream.close();
+      stateStream = null;
+      streamConnected = false;
+  }
+
   async function tick() {
       try {
+          if (demoRunning || forceDemoMode) {
+              openStateStream();
+          } else {
+              closeStateStream();
+          }
+          if (streamConnected) return;
           const state = await fetchState();
           render(state);
       } catch (e) {
@@ -432,7 +474,7 @@
 
   async function fetchDemoStatus() {
       try {
-          const res = await fetch('/api/demo/status', { cache: 'no-store' });
+          const res = await fetch(roomUrl('/api/demo/status'), { cache: 'no-store' });
           if (!res.ok) return;
           const data = await res.json();
           demoRunning = Boolean(data.running);
@@ -480,7 +522,7 @@
           }
       }
       try {
-          const res = await fetch('/api/demo/start', { method: 'POST' });
+          const res = await fetch(roomUrl('/api/demo/start'), { method: 'POST' });
           if (!res.ok) {
               const err = await res.json().catch(() => ({}));
               alert('데모 시작에 실패했습니다.' + (err.error ? ` (${err.error})` : ''));